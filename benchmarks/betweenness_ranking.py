@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""
+betweenness_ranking.py compares the edge rankings of approximate, pivot-sampled
+edge betweenness against a reference ranking. Only the top 5-100% of ranked
+edges are ever cancelled, so agreement is reported as the overlap of the top k
+edges of both rankings at every effort level.
+
+Usage:
+
+    betweenness_ranking.py [--pivots=<k,k,...>] [--reps=<n>] [--jobs=<n>]
+        [--reference=<edgelist>] <airport database> <route database>
+
+Option:
+    --pivots=<k,..> Comma separated pivot counts to test (default:
+                    50,100,200,400,800).
+    --reps=<n>      The number of pivot samples per pivot count (default: 3).
+    --jobs=<n>      The number of worker processes per betweenness run.
+    --reference=<f> A reference ranking with "IATA_From","IATA_To" and
+                    "Edge_Betweenness" columns (default: data/edgelist.csv).
+                    "exact" computes the exact betweenness instead.
+
+Output:
+    One CSV row per pivot sample with the pivot count, seed, run time, the
+    top 5% agreement of both halves of the pivots that edge_betweenness()
+    reports, and the top-k overlap at each effort level.
+"""
+
+# Title:  betweenness_ranking.py
+# Date:   2026-10-16
+
+import csv
+import getopt
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+import simulator
+
+
+def main():
+    """
+    Rank the network's edges by approximate betweenness for every pivot count
+    and report their agreement with the reference ranking.
+    """
+
+    PIVOTS = [50, 100, 200, 400, 800]
+    REPS = 3
+    JOBS = 0
+    REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "data", "edgelist.csv")
+
+    opts, args = getopt.getopt(sys.argv[1:], "", ["pivots=", "reps=",
+                                                  "jobs=", "reference="])
+    if len(args) < 2:
+        print(__doc__)
+        exit()
+
+    for o, a in opts:
+        if o == "--pivots":
+            PIVOTS = [int(k) for k in a.split(",")]
+        elif o == "--reps":
+            REPS = int(a)
+        elif o == "--jobs":
+            JOBS = int(a)
+        elif o == "--reference":
+            REFERENCE = a
+
+    cache = simulator.network_cache_path(args[0], args[1], ".network-cache")
+    network = simulator.cached_network(args[0], args[1], cache)
+
+    # Compare rankings by IATA codes, as used by the reference edge list.
+    codes = dict((edge, (network[edge[0]][edge[1]]["IATAFrom"],
+                         network[edge[0]][edge[1]]["IATATo"]))
+                 for edge in network.edges())
+
+    if REFERENCE == "exact":
+        start = time.time()
+        exact, agreement = simulator.edge_betweenness(network, jobs=JOBS)
+        print("# exact betweenness in {0:.1f}s".format(time.time() - start),
+              file=sys.stderr)
+        reference = ranking(dict((codes[edge], value)
+                                 for edge, value in exact.items()))
+    else:
+        reference = read_reference(REFERENCE)
+
+    # Only rank the routes present in both the network and the reference.
+    common = set(reference) & set(codes.values())
+    reference = [edge for edge in reference if edge in common]
+    print("# {0} of {1} network edges found in the reference".format(
+          len(common), len(codes)), file=sys.stderr)
+
+    efforts = range(5, 101, 5)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["pivots", "seed", "seconds", "agreement"] +
+                    ["top_{0}".format(effort) for effort in efforts])
+
+    for pivots in PIVOTS:
+        for seed in range(REPS):
+            start = time.time()
+            approximate, agreement = simulator.edge_betweenness(
+                network, pivots=pivots, jobs=JOBS, seed=seed)
+            seconds = time.time() - start
+
+            ranked = [edge for edge in ranking(
+                      dict((codes[edge], value)
+                           for edge, value in approximate.items()))
+                      if edge in common]
+
+            writer.writerow([pivots, seed, "{0:.2f}".format(seconds),
+                             "{0:.4f}".format(agreement)] +
+                            ["{0:.4f}".format(top_overlap(ranked, reference,
+                                                          effort))
+                             for effort in efforts])
+            sys.stdout.flush()
+
+def read_reference(file_name):
+    """
+    Read a reference edge list and rank its edges by betweenness.
+
+    Args:
+        file_name: The path to a .csv file with "IATA_From", "IATA_To" and
+                   "Edge_Betweenness" columns.
+
+    Returns:
+        ranked: A list of (IATA_From, IATA_To) tuples, highest first.
+    """
+
+    values = dict()
+    with open(file_name, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            values[(row["IATA_From"], row["IATA_To"])] = \
+                float(row["Edge_Betweenness"])
+
+    return ranking(values)
+
+def ranking(values):
+    """
+    Sort the keys of a dictionary by their values, highest first.
+    """
+
+    return sorted(values.keys(), key=lambda k: values[k], reverse=True)
+
+def top_overlap(ranked, reference, effort):
+    """
+    Find the fraction of the reference's top effort% edges that are also in
+    the top effort% of a ranking.
+
+    Args:
+        ranked: A list of edges, highest ranked first.
+        reference: A list of the same edges in reference order.
+        effort: The percentage of edges to compare.
+
+    Returns:
+        overlap: The shared fraction of the top edges, between 0 and 1.
+    """
+
+    k = max(1, int(len(reference) * (effort/100)))
+    return len(set(ranked[:k]) & set(reference[:k])) / k
+
+if __name__ == "__main__":
+    main()
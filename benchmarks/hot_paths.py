@@ -0,0 +1,347 @@
+#!/usr/bin/python3
+"""
+hot_paths.py times the hot paths of the simulator, and measures their peak
+memory: building the network, weighting its edges, ranking its edges by
+betweenness, and full effort sweeps of every infection engine. It runs on the
+airport and route databases, and on synthetic scale-free networks of the given
+sizes, and writes its results as JSON so that two commits can be compared.
+
+Usage:
+
+    hot_paths.py [--sizes=<n,n,...>] [--engines=<name,...>] [--targets=<n>]
+        [--pivots=<k>] [--repeat=<n>] [--no-memory] [--networkx-limit=<n>]
+        [--output=<file>] [<airport database> <route database>]
+
+    hot_paths.py --compare <before.json> <after.json>
+
+Option:
+    --sizes=<n,..>  Comma separated numbers of airports of the synthetic
+                    networks (default: 1000,10000,100000,1000000). An empty
+                    value only benchmarks the databases.
+    --engines=<..>  Comma separated infection engines to sweep with
+                    (default: networkx,numpy,frontier).
+    --targets=<n>   The number of target sets per sweep (default: 2).
+    --pivots=<k>    The number of betweenness pivots (default: 50). 0
+                    computes the exact betweenness.
+    --repeat=<n>    The number of timed runs per benchmark (default: 1).
+    --no-memory     Skip the extra run that measures peak memory.
+    --networkx-limit=<n> Skip the networkx engine sweep on networks of
+                    more than n airports (default: 10000). It takes about
+                    half a minute at 10000 airports and grows with the
+                    network, so larger sweeps would take hours. 0 removes
+                    the limit.
+    --output=<file> Write the JSON results to a file instead of stdout.
+    --compare       Print the change of every benchmark between two result
+                    files.
+
+Output:
+    A JSON object with the commit, library versions and one result per
+    benchmark and network: the timed "seconds", the "best" of them, the
+    "peak_bytes" allocated, and for sweeps the simulated "node_steps" and
+    their throughput in "node_steps_per_second".
+"""
+
+# Title:  hot_paths.py
+# Date:   2026-10-16
+
+import contextlib
+import getopt
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+import simulator
+
+
+def main():
+    """
+    Run every benchmark on the databases and the synthetic networks, and
+    write the results.
+    """
+
+    ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    SIZES = [1000, 10000, 100000, 1000000]
+    ENGINES = ["networkx", "numpy", "frontier"]
+    TARGETS = 2
+    PIVOTS = 50
+    REPEAT = 1
+    MEMORY = True
+    NETWORKX_LIMIT = 10000
+    OUTPUT = None
+
+    opts, args = getopt.getopt(sys.argv[1:], "", ["sizes=", "engines=",
+                                                  "targets=", "pivots=",
+                                                  "repeat=", "no-memory",
+                                                  "networkx-limit=",
+                                                  "output=", "compare"])
+
+    for o, a in opts:
+        if o == "--sizes":
+            SIZES = [int(n) for n in a.split(",") if n]
+        elif o == "--engines":
+            ENGINES = [engine for engine in a.split(",") if engine]
+        elif o == "--targets":
+            TARGETS = int(a)
+        elif o == "--pivots":
+            PIVOTS = int(a)
+        elif o == "--repeat":
+            REPEAT = int(a)
+        elif o == "--no-memory":
+            MEMORY = False
+        elif o == "--networkx-limit":
+            NETWORKX_LIMIT = int(a)
+        elif o == "--output":
+            OUTPUT = a
+        elif o == "--compare":
+            if len(args) < 2:
+                print(__doc__)
+                exit()
+            compare(args[0], args[1])
+            exit()
+
+    if len(args) >= 2:
+        databases = [("databases", args[0], args[1])]
+    else:
+        databases = [("databases", os.path.join(ROOT, "data", "airports.dat"),
+                      os.path.join(ROOT, "data", "routes.dat"))]
+
+    simulator.QUIET = True
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            airports = os.path.join(directory, "airports-{0}.dat".format(size))
+            routes = os.path.join(directory, "routes-{0}.dat".format(size))
+            simulator.write_databases(*simulator.synthetic_databases(
+                size, seed=size), nodes=airports, edges=routes)
+            databases.append(("synthetic-{0}".format(size), airports, routes))
+
+        for name, airports, routes in databases:
+            print("# {0}".format(name), file=sys.stderr)
+            results.extend(benchmark_network(name, airports, routes, ENGINES,
+                                             TARGETS, PIVOTS, REPEAT, MEMORY,
+                                             NETWORKX_LIMIT))
+
+    report = {"commit": git_commit(ROOT),
+              "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+              "python": platform.python_version(),
+              "numpy": np.__version__,
+              "networkx": nx.__version__,
+              "results": results}
+
+    if OUTPUT:
+        with open(OUTPUT, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+
+def benchmark_network(name, airports, routes, engines, targets, pivots,
+                      repeat, memory, networkx_limit=0):
+    """
+    Run every benchmark on the network of one pair of databases.
+
+    Args:
+        name: The label of the network in the results.
+        airports, routes: The paths of the airport and route databases.
+        engines: The infection engines to sweep with.
+        targets: The number of target sets per sweep.
+        pivots: The number of betweenness pivots, or 0 for all airports.
+        repeat: The number of timed runs per benchmark.
+        memory: Measure the peak memory of every benchmark.
+        networkx_limit: The largest network, in airports, to sweep with the
+                        networkx engine, or 0 for no limit.
+
+    Returns:
+        results: A list of result dictionaries.
+    """
+
+    results = list()
+
+    def record(benchmark, function, **labels):
+        result, value = measure(function, repeat, memory)
+        result.update({"benchmark": benchmark, "network": name,
+                       "nodes": len(network), "edges": len(network.edges())})
+        result.update(labels)
+        results.append(result)
+        print("#\t{0} {1}: {2:.3f}s".format(
+              benchmark, labels.get("engine", ""), result["best"]),
+              file=sys.stderr)
+        return result, value
+
+    # Build the network once outside of the measurements to label them.
+    network = quietly(simulator.create_network, airports, routes)
+    record("create_network", lambda: quietly(simulator.create_network,
+                                              airports, routes))
+    record("calculate_weights", lambda: simulator.calculate_weights(network))
+    record("edge_betweenness", lambda: quietly(simulator.edge_betweenness,
+                                               network, pivots or None,
+                                               seed=0),
+           pivots=pivots)
+    betweennesses, agreement = quietly(simulator.edge_betweenness, network,
+                                       pivots or None, seed=0)
+    record("betweenness_ranking", lambda: sorted(
+           betweennesses.keys(), key=lambda k: betweennesses[k],
+           reverse=True))
+    arrays = record("network_arrays",
+                    lambda: simulator.network_arrays(network))[1]
+
+    # Sweep every effort level of a random ranking, like main() does.
+    efforts = [0]
+    efforts.extend(range(1,101,5))
+    edges = network.edges()
+    cancellist = random.Random(0).sample(edges, len(edges))
+    weights = dict((airport, network.out_degree(airport) +
+                    network.in_degree(airport)) for airport in network)
+    target_sets = simulator.choose_targets(simulator.weighted_sampler(weights),
+                                           targets, rng=random.Random(0))
+
+    for engine in engines:
+        if engine == "networkx" and 0 < networkx_limit < len(network):
+            print("#\tsweep networkx: skipped above {0} airports".format(
+                  networkx_limit), file=sys.stderr)
+            continue
+        steps = list()
+
+        def sweep():
+            random.seed(0)
+            del steps[:]
+            for target in target_sets:
+                trace = simulator.create_trace("none", efforts)
+                simulator.simulate_target(network, cancellist, target,
+                                          efforts, ENGINE=engine,
+                                          arrays=arrays, trace=trace)
+                steps.append(simulated_steps(trace))
+
+        result, value = record("sweep", sweep, engine=engine,
+                               targets=targets)
+        result["node_steps"] = sum(steps) * len(network)
+        result["node_steps_per_second"] = result["node_steps"] / result["best"]
+
+    return results
+
+def measure(function, repeat=1, memory=True):
+    """
+    Time a function, and measure its peak memory in one more run.
+
+    Args:
+        function: The function to call without arguments.
+        repeat: The number of timed runs.
+        memory: Measure the peak memory allocated by a run.
+
+    Returns:
+        result: A dictionary of the "seconds" of every timed run, the "best"
+                of them and the "peak_bytes" allocated, or None.
+        value: The return value of the last run.
+    """
+
+    seconds = list()
+    for run in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        seconds.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        value = function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "best": min(seconds), "peak_bytes": peak}, \
+           value
+
+def simulated_steps(trace):
+    """
+    Count the steps simulated at every effort level of a trace.
+    """
+
+    steps = 0
+    for counts in trace["counts"]:
+        if counts[0, 0] < 0:
+            continue
+        ended = np.flatnonzero(counts[:, simulator.INFECTED] == 0)
+        steps += ended[0] + 1 if len(ended) else simulator.MAX_STEPS
+
+    return int(steps)
+
+def quietly(function, *args, **kwargs):
+    """
+    Call a function without its progress output.
+    """
+
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            return function(*args, **kwargs)
+
+def git_commit(directory):
+    """
+    The commit checked out in directory, marked "+dirty" when it has
+    uncommitted changes, or None outside of a git repository.
+    """
+
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                         cwd=directory,
+                                         stderr=subprocess.DEVNULL)
+        status = subprocess.check_output(["git", "status", "--porcelain",
+                                          "--untracked-files=no"],
+                                         cwd=directory,
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return commit.decode().strip() + ("+dirty" if status.strip() else "")
+
+def compare(before_file, after_file):
+    """
+    Print the time and memory of every benchmark in two result files, and
+    their ratio after/before.
+
+    Args:
+        before_file, after_file: The paths of two JSON result files.
+
+    Returns:
+        Void
+    """
+
+    with open(before_file, "r") as f:
+        before = json.load(f)
+    with open(after_file, "r") as f:
+        after = json.load(f)
+
+    def key(result):
+        return (result["network"], result["benchmark"],
+                result.get("engine", ""))
+
+    previous = dict((key(result), result) for result in before["results"])
+    print("# {0} -> {1}".format(before["commit"], after["commit"]))
+    print("{0:<20}{1:<22}{2:>11}{3:>11}{4:>8}{5:>9}".format(
+          "network", "benchmark", "before", "after", "time", "memory"))
+    for result in after["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name = result["benchmark"]
+        if result.get("engine"):
+            name += " " + result["engine"]
+        memory = ""
+        if old["peak_bytes"] and result["peak_bytes"]:
+            memory = "{0:.2f}x".format(result["peak_bytes"] /
+                                       old["peak_bytes"])
+        print("{0:<20}{1:<22}{2:>10.3f}s{3:>10.3f}s{4:>7.2f}x{5:>9}".format(
+              result["network"], name, old["best"], result["best"],
+              result["best"] / old["best"], memory))
+
+if __name__ == "__main__":
+    main()
@@ -6,41 +6,204 @@ simulation is to test edge-based quarantine strategies for the given network.
 
 Usage:
 
-    simulator.py -brcsidv [--delay=<days>] [--nsim=<n>]
+    simulator.py -bracgwsidv [--delay=<days>] [--delays=<days>-<days>]
+        [--nsim=<n>] [--engine=<name>]
+        [--batch] [--jobs=<n>] [--cache=<dir>] [--rebuild] [--pivots=<k>]
+        [--mode=<mode>] [--replicates=<n>] [--contain=<n>]
+        [--tolerance=<pct>] [--store-only] [--max-nsim=<n>]
+        [--precision=<n>] [--targets=<file>] [--trace=<level>] [--quiet]
+        [--dpi=<n>] [--profile] [--crn] <airport database> <route database>
+
+    simulator.py --resume=<run directory>
+
+    simulator.py --export=<results.npy> [<directory>]
+
+    simulator.py --render=<run directory> [--jobs=<n>] [--dpi=<n>]
+
+    simulator.py --generate=<n> [--spokes=<n>] [--exponent=<g>]
+        [--countries=<n>] [--domestic=<share>] [--one-way=<share>]
         <airport database> <route database>
 
 Flags:
     -b: Run a betweenness-based quarantine simulation.
     -r: Run a random quarantine simulation.
+    -a: Run an adaptive betweenness-based quarantine simulation, which
+        recomputes the betweenness of the remaining flights after the
+        cancellations of every effort level. --pivots sets the number of
+        sampled airports of all recomputations together.
     -c: Run a simulation based on vertex clustering coefficent.
+    -g: Run a simulation based on the product of the degrees of the
+        airports of each flight.
+    -w: Run a simulation based on the transmission weight of each flight.
     -s: Run a naive simulation and output the SIR data.
     -i: Filter to only quarantine international flights.
     -d: Filter to only quarantine domestic flights.
-    -v: Visualize the network by plotting each time step.
+    Rankings are cached next to the network for each strategy and filter.
+    -v: Visualize the network by plotting each time step. Implies
+        --trace=nodes; the frames are rendered once the run is done.
 
 Option:
     --delay=<days>  The number of days to delay a cancellation strategy.
+    --delays=<a>-<b> Sweep every delay from a to b days, or a comma
+                    separated list of delays and ranges, in one run. The
+                    steps before a delay are simulated once and shared by
+                    the later delays. Each delay's results go to delay-N/,
+                    as separate --delay runs would. Replaces --delay.
     --nsim=<n>      The number of simulations to perform per strategy.
+    --engine=<name> The infection engine to use, either "networkx" (default),
+                    "numpy" for the array-backed engine, or "frontier" to
+                    only step the exposed and infected airports. Frontier
+                    makes the same draws as networkx; numpy draws each step
+                    in one batch, so its outbreaks follow the same
+                    distribution, but not the same draws.
+    --batch         Run every target set of an effort level together as one
+                    state matrix. Implies --engine=numpy.
+    --jobs=<n>      Simulate the target sets of each strategy, and compute
+                    edge betweenness, in a pool of n worker processes. The
+                    workers share one memory-mapped copy of the network.
+    --cache=<dir>   The directory of the cached networks (default: 
+                    .network-cache). An empty value disables the cache.
+    --rebuild       Rebuild the cached network from the databases.
+    --pivots=<k>    Approximate edge betweenness from k sampled source
+                    airports instead of all of them. The run reports how
+                    well the top 5% edges of both halves of the sample
+                    agree.
+    --mode=<mode>   Either "sweep" (default) to simulate every effort level,
+                    or "threshold" to search for the minimal effort that
+                    contains the outbreak of each target set.
+    --replicates=<n> The largest number of simulations per threshold
+                    probe (default: 3). A probe stops once the majority of
+                    its replicates is decided. A search probes full effort,
+                    then bisects down to --tolerance: 5 probes, or 10 to 15
+                    simulations per target set at the defaults, against 21
+                    for a sweep. Target sets that full effort does not
+                    contain stop after the first probe, and are reported
+                    as not contained. The confidence limits pool the
+                    replicates of neighbouring probes; more replicates
+                    narrow them.
+    --contain=<n>   The largest number of infected airports, seeds
+                    included, that counts as contained (default: only the
+                    seed airports).
+    --tolerance=<pct> The width, in percent effort, at which the threshold
+                    search stops (default: 10).
+    --store-only    Only record sweeps in results.npy, without the
+                    per-target CSV files.
+    --max-nsim=<n>  Run the sweep adaptively: start with --nsim target sets,
+                    and keep adding rounds of target sets while the 95%
+                    confidence interval of the median total at any effort
+                    level is wider than --precision, up to n target sets.
+    --precision=<n> The widest acceptable confidence interval, in
+                    airports, of an adaptive sweep (default: 10).
+    --targets=<file> Simulate the target sets of a targets.csv file, as
+                    written to the directory of every run, instead of
+                    choosing new ones. Replaces --nsim.
+    --trace=<level> Save a trace of every target set's sweep to
+                    <strategy>/trace_NNNN.npz: "none" (default), "final"
+                    S/E/I/R counts of each effort level, per-step "steps"
+                    counts, or "nodes" for the state of every airport at
+                    every step as well.
+    --quiet         Do not print the progress of every simulation step.
+    --dpi=<n>       The resolution of rendered frames (default: 600).
+    --profile       Time the phases of the run, count the steps, flights and
+                    random draws of the simulations, including those of
+                    worker processes, and write them to profile.json.
+    --crn           Draw the transmission over each flight at each step
+                    from common random numbers keyed to the target set,
+                    step and flight, so all effort levels, strategies and
+                    delays of a target set see the same draws on the
+                    flights they keep. Sweeps report the variance reduction
+                    of the difference between consecutive effort levels to
+                    <strategy>/variance.csv. Uses the frontier engine
+                    instead of networkx.
+    --resume=<dir>  Continue an interrupted sweep in its run directory with
+                    the options it was started with, skipping the target
+                    sets it finished. The resumed run gives the results of
+                    an uninterrupted one.
+    --render=<dir>  Render the frames of every "nodes" trace of a run
+                    visualized with -v into <strategy>/trace_NNNN/, in a
+                    pool of --jobs worker processes, then exit.
+    --export=<file> Write the .matrix, median .csv and per-target CSV files
+                    of a results.npy store to a directory (default: the
+                    store's directory), then exit.
+    --generate=<n>  Write a synthetic scale-free network of n airports to
+                    the given airport and route databases, then exit.
+    --spokes=<n>    The number of routes every new synthetic airport opens
+                    to existing airports (default: 2).
+    --exponent=<g>  The exponent, above 2, of the synthetic degree
+                    distribution (default: 3). Lower values grow larger
+                    hubs.
+    --countries=<n> The number of synthetic countries (default: one per 50
+                    airports).
+    --domestic=<share> The share of synthetic routes within a country
+                    (default: 0.5).
+    --one-way=<share> The share of synthetic routes flown in one direction
+                    only (default: 0).
 """
 
 # Title:  simulator.py
 # Authors: Nicholas A. Yager and Matthew Taylor
 # Date:   2013-01-12
 
+import array
+import bisect
+import collections
+import contextlib
 import copy
+import csv
 import getopt
+import hashlib
+import heapq
+import itertools
+import json
 import math
+import multiprocessing
+import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import operator
 import os
 import random
 import sys
+import tempfile
+from scipy import sparse
 from scipy import stats
 import time
 
 global VISUALIZE
 
+# Integer state codes used by the array-backed engines.
+SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED = 0, 1, 2, 3
+
+# The state codes of the statuses of the NetworkX engine.
+STATE_CODES = {"s": SUSCEPTIBLE, "v": SUSCEPTIBLE, "e": EXPOSED,
+               "i": INFECTED, "r": RECOVERED}
+
+# The node colors of each state code in visualizations.
+STATE_COLORS = ["#A0C8F0", "#FF6F00", "green", "purple"]
+
+# Bump whenever create_network() or the cached edge metrics change.
+CACHE_VERSION = 4
+
+# Disease timeline, in days since exposure.
+LATENT_PERIOD = 3
+RECOVERY_AGE = 11
+
+# The number of days a simulation runs for at most.
+MAX_STEPS = 99
+
+# The infection engines that run on network_arrays().
+ARRAY_ENGINES = ("numpy", "frontier")
+
+# Silences the per-simulation console output, see --quiet.
+QUIET = False
+
+# The phase timers and counters of --profile, or None when not profiling.
+PROFILE = None
+
+# The levels of detail of the traces recorded per target set, see --trace.
+TRACE_LEVELS = ("none", "final", "steps", "nodes")
+
 def main():
     """
     Primary function that initiates network creation and handles execution of
@@ -54,17 +217,81 @@ def main():
 
     """
 
+    global QUIET, PROFILE
+
     # Flag defaults
     VISUALIZE = False
     INTERNATIONAL = False
     DOMESTIC = False
     DELAY = 0
+    DELAYS = None
     NUM_SIMULATIONS = 100
+    ENGINE = "networkx"
+    BATCH = False
+    JOBS = 0
+    CACHE = ".network-cache"
+    REBUILD = False
+    PIVOTS = None
+    MODE = "sweep"
+    REPLICATES = 3
+    CONTAIN = None
+    TOLERANCE = 10.0
+    STORE_ONLY = False
+    MAX_NSIM = 0
+    PRECISION = 10.0
+    TARGETS = None
+    TRACE = "none"
+    DPI = 600
+    WALL = time.perf_counter()
+    RESUME = None
+    CRN = False
 
     # Determine the parameters of the current simulation.
-    opts, args = getopt.getopt(sys.argv[1:], "brcsidv", ["delay=",
-                                                         "nsim="]
-                                                            )
+    long_options = ["delay=", "delays=", "nsim=", "engine=", "batch", "jobs=",
+                    "cache=", "rebuild", "pivots=", "mode=", "replicates=",
+                    "contain=", "tolerance=", "store-only", "export=",
+                    "max-nsim=", "precision=", "targets=", "trace=", "quiet",
+                    "render=", "dpi=", "profile", "generate=", "spokes=",
+                    "exponent=", "countries=", "domestic=", "one-way=",
+                    "resume=", "crn"]
+    argv = sys.argv[1:]
+    opts, args = getopt.getopt(argv, "bracgwsidv", long_options)
+
+    for o, a in opts:
+        if o == "--resume":
+            # Replay the options of the interrupted run from where it ran.
+            RESUME = os.path.abspath(a)
+            checkpoint = read_checkpoint(os.path.join(RESUME,
+                                                      "checkpoint.json"))
+            os.chdir(checkpoint["cwd"])
+            argv = checkpoint["argv"]
+            opts, args = getopt.getopt(argv, "bracgwsidv", long_options)
+
+    for o, a in opts:
+        if o == "--export":
+            export_results(a, args[0] if args else None)
+            exit()
+        elif o == "--render":
+            options = dict(opts)
+            render_run(a, jobs=int(options.get("--jobs", 0)),
+                       dpi=int(options.get("--dpi", DPI)))
+            exit()
+        elif o == "--generate":
+            if len(args) < 2:
+                print(__doc__)
+                exit()
+            options = dict(opts)
+            print("Generating {0} airports.".format(a))
+            airports, routes = synthetic_databases(
+                int(a), spokes=int(options.get("--spokes", 2)),
+                exponent=float(options.get("--exponent", 3.0)),
+                countries=int(options.get("--countries", 0)) or None,
+                domestic=float(options.get("--domestic", 0.5)),
+                one_way=float(options.get("--one-way", 0.0)), seed=100)
+            write_databases(airports, routes, args[0], args[1])
+            print("\t{0} airports, {1} routes".format(len(airports["id"]),
+                                                      len(routes["source"])))
+            exit()
 
     # Check if the data arguments are available
     if len(args) < 2:
@@ -86,18 +313,117 @@ def main():
             simulations.append("sir")
         elif o == "-c":
             simulations.append("clustering")
+        elif o == "-a":
+            simulations.append("adaptive-betweenness")
+        elif o == "-g":
+            simulations.append("degree")
+        elif o == "-w":
+            simulations.append("weight")
         elif o == "-v":
             VISUALIZE = True
         elif o == "-i":
             INTERNATIONAL = True
-        elif o == "-q":
+        elif o == "-d":
             DOMESTIC = True
         elif o == "-y":
             RECALCULATE = False
         elif o == "--delay":
             DELAY = int(a)
+        elif o == "--delays":
+            DELAYS = parse_delays(a)
         elif o == "--nsim":
             NUM_SIMULATIONS = int(a)
+        elif o == "--engine":
+            ENGINE = a
+        elif o == "--batch":
+            BATCH = True
+            ENGINE = "numpy"
+        elif o == "--jobs":
+            JOBS = int(a)
+        elif o == "--cache":
+            CACHE = a
+        elif o == "--rebuild":
+            REBUILD = True
+        elif o == "--pivots":
+            PIVOTS = int(a)
+        elif o == "--mode":
+            MODE = a
+        elif o == "--replicates":
+            REPLICATES = int(a)
+        elif o == "--contain":
+            CONTAIN = int(a)
+        elif o == "--tolerance":
+            TOLERANCE = float(a)
+        elif o == "--store-only":
+            STORE_ONLY = True
+        elif o == "--max-nsim":
+            MAX_NSIM = int(a)
+        elif o == "--precision":
+            PRECISION = float(a)
+        elif o == "--targets":
+            TARGETS = a
+        elif o == "--trace":
+            TRACE = a
+        elif o == "--quiet":
+            QUIET = True
+        elif o == "--dpi":
+            DPI = int(a)
+        elif o == "--profile":
+            PROFILE = new_profile()
+        elif o == "--crn":
+            CRN = True
+
+    if ENGINE not in ("networkx",) + ARRAY_ENGINES:
+        print("Unknown engine: {0}".format(ENGINE))
+        exit()
+
+    if TRACE not in TRACE_LEVELS:
+        print("Unknown trace level: {0}".format(TRACE))
+        exit()
+
+    if VISUALIZE:
+        # Frames are rendered after the run from the states of every step.
+        TRACE = "nodes"
+
+    if CRN and ENGINE == "networkx":
+        # The frontier engine draws like networkx, from flight positions.
+        print("Common random numbers use the frontier engine.")
+        ENGINE = "frontier"
+
+    if MODE not in ("sweep", "threshold"):
+        print("Unknown mode: {0}".format(MODE))
+        exit()
+
+    if BATCH and MODE != "sweep":
+        # Threshold probes depend on earlier probes, so they can't be batched.
+        print("Threshold searches are not batched.")
+        BATCH = False
+
+    if MAX_NSIM and MODE != "sweep":
+        print("Adaptive rounds only apply to sweeps.")
+        MAX_NSIM = 0
+
+    if DELAYS and MODE != "sweep":
+        print("Delay sweeps only apply to sweeps.")
+        DELAYS = None
+
+    if DELAYS and BATCH:
+        # The rows of a batch can't fork from each other's prefixes.
+        print("Delay sweeps are not batched.")
+        BATCH = False
+
+    if DELAYS and MAX_NSIM:
+        # Each delay would need rounds of its own.
+        print("Adaptive rounds only apply to single delays.")
+        MAX_NSIM = 0
+
+    if MAX_NSIM:
+        NUM_SIMULATIONS = min(NUM_SIMULATIONS, MAX_NSIM)
+
+    if BATCH and JOBS:
+        # The batch already sweeps every target set in one array.
+        print("Batched runs use a single process.")
+        JOBS = 0
 
 
             
@@ -109,8 +435,29 @@ def main():
     print("Air Disease Simulator 2.0.0")
     print("Created by Nicholas A. Yager and Matthew Taylor\n\n")
 
-    # Create the network using the command arguments.
-    network = create_network(AIRPORT_DATA, ROUTE_DATA)
+    # Create the network using the command arguments, or load it from the
+    # cache when the databases have not changed.
+    start = time.perf_counter()
+    if CACHE:
+        cache = network_cache_path(AIRPORT_DATA, ROUTE_DATA, CACHE)
+        network = cached_network(AIRPORT_DATA, ROUTE_DATA, cache, REBUILD)
+    else:
+        cache = None
+        network = create_network(AIRPORT_DATA, ROUTE_DATA)
+    add_time("network", start)
+
+    # Flatten the network once for the array-backed engines.
+    arrays = None
+    if ENGINE in ARRAY_ENGINES:
+        arrays = network_arrays(network)
+
+    # Publish the network once for the workers to map, instead of pickling
+    # it into each of them. The directory is removed when the run ends,
+    # normally or not.
+    shared = None
+    if JOBS:
+        shared = tempfile.TemporaryDirectory(prefix="network-")
+        share_network(network, shared.name)
   
     # Generate target-selection weights, and choose target vertices to infect.
     degrees = network.degree()
@@ -118,41 +465,94 @@ def main():
     for airport, degree in degrees.items():
         weights[airport] = network.out_degree(airport) +\
                            network.in_degree(airport)
-    targets = list()
-    for ind in range(0,NUM_SIMULATIONS):
-        target_round = list()
-        while len(target_round) < 10:
-             chosen_airport = weighted_random(weights)
-             if chosen_airport not in target_round:
-                 target_round.append(chosen_airport)
-        targets.append(target_round)
+    # Targets are drawn from their own stream, so that simulating imported
+    # target sets repeats the simulations of the run that chose them.
+    sampler = weighted_sampler(weights)
+    chooser = random.Random(seed)
+    if TARGETS:
+        targets = read_targets(TARGETS, network)
+        NUM_SIMULATIONS = len(targets)
+    else:
+        targets = choose_targets(sampler, NUM_SIMULATIONS, rng=chooser)
 
 
-    # Make a directory for the data, and change into that directory.
-    currenttime = time.strftime("%Y-%m-%dT%H%M%S", time.gmtime())
-    os.makedirs(currenttime)
-    os.chdir(currenttime)
+    # Make a directory for the data, and change into that directory. The
+    # checkpoint records the options and progress, so the run can resume.
+    if RESUME:
+        os.chdir(RESUME)
+    else:
+        checkpoint = {"cwd": os.getcwd(), "argv": argv, "seed": seed,
+                      "ranked": list(), "done": dict(), "random_state": None}
+        currenttime = time.strftime("%Y-%m-%dT%H%M%S", time.gmtime())
+        os.makedirs(currenttime)
+        os.chdir(currenttime)
+        write_checkpoint("checkpoint.json", checkpoint)
+
+    # Keep the target sets, so that the run can be repeated with --targets.
+    write_targets("targets.csv", targets)
 
     # Record relevent data about the simulation.
     # TMP simulation_data(network, currenttime, target, seed)
 
+    # Record the S/E/I/R counts of every sweep in a single results store.
+    efforts = [0]
+    efforts.extend(range(1,101,5))
+    if MODE == "sweep" and DELAYS:
+        # Every delay keeps its own store in its own directory.
+        rounds = dict()
+        result_files = dict((delay, os.path.join(delay_directory(delay),
+                                                 "results.npy"))
+                            for delay in DELAYS)
+        store = dict()
+        for delay, file_name in result_files.items():
+            if RESUME:
+                store[delay] = np.load(file_name, mmap_mode="r+")
+                continue
+            os.makedirs(delay_directory(delay), exist_ok=True)
+            store[delay] = create_results(file_name, simulations,
+                                          len(targets), efforts,
+                                          {"seed": seed, "delay": delay,
+                                           "delays": DELAYS,
+                                           "nsim": NUM_SIMULATIONS,
+                                           "international": INTERNATIONAL,
+                                           "domestic": DOMESTIC,
+                                           "engine": ENGINE,
+                                           "max_nsim": MAX_NSIM,
+                                           "precision": PRECISION,
+                                           "crn": CRN})
+    elif MODE == "sweep" and RESUME:
+        rounds = dict()
+        store = np.load("results.npy", mmap_mode="r+")
+    elif MODE == "sweep":
+        # Adaptive runs reserve room for every round they may schedule.
+        rounds = dict()
+        store = create_results("results.npy", simulations,
+                               MAX_NSIM or len(targets),
+                               efforts, {"seed": seed, "delay": DELAY,
+                                         "nsim": NUM_SIMULATIONS,
+                                         "international": INTERNATIONAL,
+                                         "domestic": DOMESTIC,
+                                         "engine": ENGINE,
+                                         "max_nsim": MAX_NSIM,
+                                         "precision": PRECISION,
+                                         "crn": CRN})
+
 
     # Prepare simulations
 
     # Remove some edges as per necessary from the pool of edges that can be
     # used as cancelled edges.
 
+    edges = network.edges()
     edgepool = network.edges(data=True)
+    metrics = edge_metrics(network)
+    edge_filter, filter_name = None, "all"
     if INTERNATIONAL:
-        for i,j,data in edgepool:
-            if data["international"] == False:
-                edgepool.remove((i,j,data))
-            index += 1
+        edge_filter, filter_name = metrics["international"], "international"
     elif DOMESTIC:
-        for i,j,data in edgepool:
-            if data["domestic"] == False:
-                degrees.edgepool((i,j,data))
-            index += 1
+        edge_filter, filter_name = ~metrics["international"], "domestic"
+    if edge_filter is not None:
+        edgepool = [edge for edge, keep in zip(edgepool, edge_filter) if keep]
 
 
     for strategy in simulations:
@@ -164,402 +564,3070 @@ def main():
         # Generate a list a sorted list of flights to cancel based on the
         # strategy.
         
+        start = time.perf_counter()
         cancellist = list()
-        if strategy == "random":
+        ranking = os.path.join(strategy, "ranking.npy")
+        if strategy not in checkpoint["ranked"]:
+            resume_random(checkpoint)
+
+        if strategy in checkpoint["ranked"]:
+            # A resumed run reuses its rankings instead of drawing again.
+            cancellist = read_ranking(ranking)
+
+        elif strategy == "random":
             # Sort the edges randomly
 
             cancellist = random.sample(edgepool, len(edgepool))
 
         elif strategy == "clustering":
-            # Sort the edges based on the sum of the clustering coefficent.
+            # Sort the edges based on the sum of the clustering coefficent,
+            # skipping flights whose airports share no or every neighbor.
 
-            sorted_cluster = sorted(edgepool, key=lambda k: k[2]['cluster'],
-                            reverse=True)
-            for cluster_item in sorted_cluster:
-                if network[cluster_item[0]][cluster_item[1]]['cluster'] < 2:
-                    if network[cluster_item[0]][cluster_item[1]]['cluster'] > 0:
-                        cancellist.append((cluster_item[0], cluster_item[1]))
+            order = cached_ranking(cache, "clustering-" + filter_name,
+                                   lambda: rank_edges(metrics["cluster"],
+                                                      edge_filter, low=0,
+                                                      high=2), REBUILD)
+            cancellist = [edges[k] for k in order.tolist()]
 
         elif strategy == "betweenness":
             # Sort the edges based on weighted edge-betweenness.
 
-            betweennesses = nx.edge_betweenness_centrality(network,
-                                                           weight="weight")
-            cancellist = sorted(betweennesses.keys(), 
-                                key=lambda k: betweennesses[k], reverse=True)
-
+            def betweenness_ranking():
+                betweennesses = cached_betweenness(
+                    network, cache, REBUILD, pivots=PIVOTS, jobs=JOBS,
+                    seed=seed, shared=shared and shared.name)
+                return rank_edges(np.array([betweennesses[edge]
+                                            for edge in edges]), edge_filter)
+
+            name = "betweenness-" + filter_name
+            if PIVOTS is not None:
+                name = "betweenness-{0}-{1}-{2}".format(PIVOTS, seed,
+                                                        filter_name)
+            order = cached_ranking(cache, name, betweenness_ranking, REBUILD)
+            cancellist = [edges[k] for k in order.tolist()]
+
+        elif strategy == "adaptive-betweenness":
+            # Sort the edges based on weighted edge-betweenness, recomputed
+            # on the remaining network after every effort level's batch.
+
+            name = "adaptive-betweenness-{0}-{1}-{2}".format(
+                   PIVOTS or "all", seed, filter_name)
+            order = cached_ranking(cache, name,
+                                   lambda: adaptive_betweenness(
+                                       network, efforts, edge_filter,
+                                       PIVOTS, JOBS, seed,
+                                       shared and shared.name),
+                                   REBUILD)
+            cancellist = [edges[k] for k in order.tolist()]
+
+        elif strategy in ("degree", "weight"):
+            # Sort the edges based on the product of their airports' numbers
+            # of flights, or on their transmission weight.
+
+            order = cached_ranking(cache, strategy + "-" + filter_name,
+                                   lambda: rank_edges(metrics[strategy],
+                                                      edge_filter), REBUILD)
+            cancellist = [edges[k] for k in order.tolist()]
+        add_time("rank/" + strategy, start)
 
         print(cancellist[:20])
         # Make a new folder for the data.
-        os.makedirs(strategy)
-        
-        iteration = 0
-        efforts = [0]
-        efforts.extend(range(1,101,5))
-        for target in targets:
-
-            # Open a file for this targets dataset
-            output_file = open("{0}/{0}_{1}.csv".format(strategy,
-                                                        pad_string(iteration,4)
-                                                        ),"w")
-            output_file.write('"effort","total_infected, edges_closed"\n')
-
-
-            for effort in efforts:
-                if effort != 0:
-                    max_index = int(len(cancellist) * (effort/100))-1
-                    cancelled = cancellist[0:max_index]
+        os.makedirs(strategy, exist_ok=True)
+        for delay in DELAYS or ():
+            os.makedirs(os.path.join(delay_directory(delay), strategy),
+                        exist_ok=True)
+        strategy_index = simulations.index(strategy)
+        if strategy not in checkpoint["ranked"]:
+            write_ranking(ranking, cancellist)
+            checkpoint["ranked"].append(strategy)
+            save_checkpoint("checkpoint.json", checkpoint)
+        if shared is not None:
+            share_ranking(shared.name, strategy, cancellist, arrays)
+
+        if MODE == "threshold":
+            # Threshold searches resume a strategy at a time.
+            if len(checkpoint["done"].get(strategy, ())) == len(targets):
+                continue
+            resume_random(checkpoint)
+            settings = {"network": network, "arrays": arrays,
+                        "cancellist": cancellist, "ENGINE": ENGINE,
+                        "DELAY": DELAY, "CONTAIN": CONTAIN,
+                        "REPLICATES": REPLICATES, "TOLERANCE": TOLERANCE,
+                        "CRN": CRN, "seed": seed,
+                        "QUIET": QUIET, "PROFILE": PROFILE is not None,
+                        "SHARED": shared and (shared.name, strategy)}
+            start = time.perf_counter()
+            tasks = [(strategy, iteration, target,
+                      task_seed(seed, strategy, iteration))
+                     for iteration, target in enumerate(targets)]
+            if JOBS:
+                with multiprocessing.Pool(JOBS, initializer=init_worker,
+                                          initargs=(worker_settings(
+                                                    settings),)) as workers:
+                    thresholds = workers.map(threshold_task, tasks)
+            else:
+                init_worker(settings)
+                thresholds = [threshold_task(task) for task in tasks]
+            add_time("threshold/" + strategy, start)
+
+            for threshold in thresholds:
+                profile = threshold.pop("profile")
+                if PROFILE is not None:
+                    merge_profile(PROFILE, profile)
+            write_thresholds(strategy, thresholds)
+            checkpoint_done(checkpoint, strategy, range(len(targets)))
+            continue
+
+        settings = {"network": network, "arrays": arrays,
+                    "cancellist": cancellist, "efforts": efforts,
+                    "ENGINE": ENGINE, "DELAY": DELAY, "DELAYS": DELAYS,
+                    "BATCH": BATCH, "JOBS": JOBS, "TRACE": TRACE,
+                    "CRN": CRN, "QUIET": QUIET,
+                    "PROFILE": PROFILE is not None,
+                    "SHARED": shared and (shared.name, strategy),
+                    "seed": seed, "RESULTS": os.path.abspath("results.npy"),
+                    "strategy_index": strategy_index}
+        if DELAYS:
+            settings["RESULTS"] = dict((delay, os.path.abspath(file_name))
+                                       for delay, file_name in
+                                       result_files.items())
+        start = time.perf_counter()
+        if MAX_NSIM:
+            totals, cells = adaptive_sweep(settings, strategy, targets,
+                                           sampler, chooser,
+                                           NUM_SIMULATIONS,
+                                           MAX_NSIM, PRECISION, store,
+                                           checkpoint)
+            write_precision(strategy, efforts, cells)
+            rounds[strategy] = len(totals)
+        else:
+            totals = sweep_targets(settings, strategy, targets,
+                                   range(len(targets)), store, checkpoint)
+        add_time("sweep/" + strategy, start)
+
+        start = time.perf_counter()
+        if not STORE_ONLY:
+            for iteration, rows in enumerate(totals):
+                if DELAYS:
+                    for delay in DELAYS:
+                        write_efforts(strategy, iteration, rows[delay],
+                                      delay_directory(delay))
                 else:
-                    cancelled = None
+                    write_efforts(strategy, iteration, rows)
+        if CRN and DELAYS:
+            for delay in DELAYS:
+                print("\tDelay {0}:".format(delay))
+                write_variance(strategy, efforts,
+                               [rows[delay] for rows in totals],
+                               delay_directory(delay))
+        elif CRN:
+            write_variance(strategy, efforts, totals)
+        add_time("output/efforts", start)
+
+    if MODE == "sweep":
+        start = time.perf_counter()
+        for delay_store in (store.values() if DELAYS else [store]):
+            delay_store.flush()
+        add_time("output/results", start)
+        if MAX_NSIM:
+            update_results("results.npy", {"rounds": rounds})
+            write_targets("targets.csv", targets)
+
+    if VISUALIZE:
+        # Keep the layout with the traces, so the run can be rendered again.
+        layout = cached_layout(network, cache, REBUILD)
+        start = time.perf_counter()
+        for directory in [delay_directory(delay) for delay in DELAYS or ()] \
+                         or ["."]:
+            np.savez(os.path.join(directory, "layout.npz"), **layout)
+            render_run(directory, jobs=JOBS, dpi=DPI)
+        add_time("render", start)
+
+    if shared is not None:
+        shared.cleanup()
+
+    if PROFILE is not None:
+        write_profile("profile.json", PROFILE, time.perf_counter() - WALL,
+                      JOBS)
+        print("Profile written to {0}".format(
+              os.path.abspath("profile.json")))
+
+
+# Settings shared by the tasks of a worker process.
+WORKER_STATE = dict()
+
+def init_worker(settings):
+    """
+    Store the settings shared by every task in a worker process.
+    """
 
-                title = "{0} - {1}%".format(strategy, effort/100)
-                results = infection(network, cancelled, target, vis=VISUALIZE,
-                                    title=title, DELAY=DELAY)
-                total_infected = results["Infected"] + results["Recovered"]
-                output_file.write("{0},{1}\n".format(effort/100,total_infected))
-                
-                if total_infected == 1:
-                    for remaining_effort in range(effort+5,101,5):
-                        output_file.write("{0},{1}\n".format(remaining_effort/100,
-                                                              total_infected))
-                    break
+    global QUIET, PROFILE
+    WORKER_STATE.update(settings)
+    if settings.get("SHARED"):
+        WORKER_STATE.update(attach_network(settings["SHARED"],
+                                           settings["ENGINE"]))
+    if settings.get("FRAMES"):
+        WORKER_STATE.update(attach_arrays(settings["FRAMES"],
+                                          ("positions", "edges", "states")))
+    QUIET = settings.get("QUIET", QUIET)
+    if settings.get("PROFILE") and PROFILE is None:
+        PROFILE = new_profile()
+
+def target_task(task):
+    """
+    Simulate a single target set in a worker process.
 
-            iteration += 1
-            output_file.close()
+    Args:
+        task: A (strategy, iteration, target, seed) tuple.
 
+    Returns:
+        result: An (iteration, totals, profile) tuple of the target set's
+                index, its simulate_target() totals and the task's profile,
+                or None when not profiling.
+    """
 
+    strategy, iteration, target, seed = task
+    random.seed(seed)
 
-def weighted_random(weights):
-    number = random.random() * sum(weights.values())
-    for k,v in weights.items():
-        if number <= v:
-            break
-        number -= v
-    return k
+    if WORKER_STATE.get("DELAYS"):
+        return delays_task(task)
+
+    with task_profile() as collected:
+        # Workers write their own slots of the shared results store.
+        store = np.load(WORKER_STATE["RESULTS"], mmap_mode="r+")
+        trace = create_trace(WORKER_STATE["TRACE"], WORKER_STATE["efforts"],
+                             WORKER_STATE["network"].nodes())
+        totals = simulate_target(WORKER_STATE["network"],
+                                 WORKER_STATE["cancellist"], target,
+                                 WORKER_STATE["efforts"], strategy=strategy,
+                                 ENGINE=WORKER_STATE["ENGINE"],
+                                 DELAY=WORKER_STATE["DELAY"],
+                                 arrays=WORKER_STATE["arrays"],
+                                 ranked=WORKER_STATE.get("ranked"),
+                                 record=store[WORKER_STATE["strategy_index"],
+                                              iteration], trace=trace,
+                                 crn=common_key(WORKER_STATE, iteration))
+        start = time.perf_counter()
+        store.flush()
+        del store
+        write_trace(trace_path(strategy, iteration), trace)
+        add_time("output/trace", start)
+
+    return iteration, totals, collected.get("profile")
+
+def delays_task(task):
+    """
+    Simulate a single target set at every delay of a --delays sweep in a
+    worker process, like target_task(), whose seeded task it continues.
+    """
 
-def pad_string(integer, n):
+    strategy, iteration, target, seed = task
+    delays = WORKER_STATE["DELAYS"]
+
+    with task_profile() as collected:
+        stores = dict((delay, np.load(WORKER_STATE["RESULTS"][delay],
+                                      mmap_mode="r+")) for delay in delays)
+        traces = dict((delay, create_trace(WORKER_STATE["TRACE"],
+                                           WORKER_STATE["efforts"],
+                                           WORKER_STATE["network"].nodes()))
+                      for delay in delays)
+        index = WORKER_STATE["strategy_index"]
+        totals = simulate_delays(WORKER_STATE["network"],
+                                 WORKER_STATE["cancellist"], target,
+                                 WORKER_STATE["efforts"], delays,
+                                 strategy=strategy,
+                                 ENGINE=WORKER_STATE["ENGINE"],
+                                 arrays=WORKER_STATE["arrays"],
+                                 ranked=WORKER_STATE.get("ranked"),
+                                 records=dict((delay, store[index, iteration])
+                                              for delay, store in
+                                              stores.items()),
+                                 traces=traces,
+                                 crn=common_key(WORKER_STATE, iteration))
+        start = time.perf_counter()
+        for delay, store in stores.items():
+            store.flush()
+            write_trace(trace_path(strategy, iteration, delay), traces[delay])
+        del stores
+        add_time("output/trace", start)
+
+    return iteration, totals, collected.get("profile")
+
+def sweep_targets(settings, strategy, targets, iterations, store,
+                  checkpoint=None):
     """
-    Add "0" to the front of an interger so that the resulting string in n 
-    characters long.
+    Simulate target sets at every effort level of a sweep, batched, in a pool
+    of worker processes or one after the other, as the settings ask. Target
+    sets the checkpoint records as done are read back from the store. Every
+    target set draws from a random stream of its own, seeded with
+    task_seed(), so the results do not depend on how the target sets are
+    run, or whether the run was resumed.
 
     Args:
-        integer: The number to pad.
-        n: The desired length of the string
+        settings: The sweep settings: network, arrays, cancellist, efforts,
+                  ENGINE, DELAY, DELAYS, BATCH, JOBS, TRACE, QUIET, SHARED,
+                  CRN, seed, RESULTS and strategy_index. Workers attach the
+                  network and ranking published in SHARED, when it is set.
+                  With DELAYS, every target set is simulated at each of
+                  them with simulate_delays(), and RESULTS is a dictionary
+                  of the paths of their stores.
+        strategy: The name of the cancellation strategy.
+        targets: The list of every target set of the run.
+        iterations: The indices of the target sets to simulate.
+        store: The results store that receives the S/E/I/R counts, or a
+               dictionary of them by delay.
+        checkpoint: The run's checkpoint from write_checkpoint(), updated
+                    as target sets finish, or None.
 
-    Returns
-        string: The padded string representation of the integer.
-        
+    Returns:
+        totals: A list of simulate_target() totals, or of dictionaries of
+                them by delay, by target set in iterations.
     """
 
-    string = str(integer)
-
-    while len(string) < n:
-        string = "0" + string
-
-    return string
-
-def simulation_data(network, time, targets, seed):
+    network = settings["network"]
+    arrays = settings["arrays"]
+    cancellist = settings["cancellist"]
+    efforts = settings["efforts"]
+    strategy_index = settings["strategy_index"]
+    iterations = list(iterations)
+
+    if checkpoint is not None:
+        done = set(checkpoint["done"].get(strategy, ()))
+        if done.intersection(iterations):
+            pending = [iteration for iteration in iterations
+                       if iteration not in done]
+            totals = dict()
+            if pending:
+                totals.update(zip(pending, sweep_targets(
+                              settings, strategy, targets, pending, store,
+                              checkpoint)))
+            return [totals[iteration] if iteration in totals else
+                    stored_totals(store, strategy_index, iteration, efforts)
+                    for iteration in iterations]
+        resume_random(checkpoint)
+
+    if settings["BATCH"]:
+        # Step every target set through each effort level together,
+        # dropping the rows that have already stopped spreading.
+        totals = [list() for iteration in iterations]
+        traces = [create_trace(settings["TRACE"], efforts, network.nodes())
+                  for iteration in iterations]
+        ranked = edge_positions(arrays, cancellist)
+        overlay = None
+        # Each row draws its engine seeds from its target set's stream, as
+        # infection_numpy() does at every effort level.
+        streams = [random.Random(task_seed(settings["seed"], strategy,
+                                           iteration))
+                   for iteration in iterations]
+        for effort in efforts:
+            cancelled = effort_cancellations(cancellist, effort)
+            if cancelled is not None:
+                overlay = cancellation_overlay(arrays, ranked,
+                                               len(cancelled), base=overlay)
+            seeds = [stream.getrandbits(32) for stream in streams]
+            rows = [row for row in range(len(iterations))
+                    if not totals[row] or totals[row][-1][1] != 1]
+            if not rows:
+                break
+            crn = None
+            if settings.get("CRN"):
+                crn = [common_key(settings, iterations[row]) for row in rows]
+
+            level = efforts.index(effort)
+            record = np.empty((len(rows), MAX_STEPS, 4), dtype=np.int32)
+            snapshots = None
+            if settings["TRACE"] == "nodes":
+                snapshots = np.empty((len(rows), MAX_STEPS, len(network)),
+                                     dtype=np.int8)
+            results = infection_batch(network, cancelled,
+                                      [targets[iterations[row]]
+                                       for row in rows],
+                                      DELAY=settings["DELAY"], arrays=arrays,
+                                      seeds=[seeds[row] for row in rows],
+                                      overlay=overlay, record=record,
+                                      snapshots=snapshots, crn=crn)
+            store[strategy_index, [iterations[row] for row in rows],
+                  level] = record
+            for position, (row, result) in enumerate(zip(rows, results)):
+                total_infected = result["Infected"] + result["Recovered"]
+                totals[row].append((effort, total_infected))
+                traces[row]["counts"][level] = record[position]
+                if snapshots is not None:
+                    traces[row]["states"][level] = snapshots[position]
+
+        start = time.perf_counter()
+        for iteration, trace in zip(iterations, traces):
+            write_trace(trace_path(strategy, iteration), trace)
+        add_time("output/trace", start)
+        checkpoint_done(checkpoint, strategy, iterations, store)
+
+        return totals
+
+    if settings["JOBS"]:
+        tasks = [(strategy, iteration, targets[iteration],
+                  task_seed(settings["seed"], strategy, iteration))
+                 for iteration in iterations]
+        pool = multiprocessing.Pool(settings["JOBS"], initializer=init_worker,
+                                    initargs=(worker_settings(settings),))
+        totals = dict()
+        for iteration, rows, profile in pool.imap_unordered(target_task,
+                                                            tasks):
+            print("\t{0} target {1} [Done]".format(strategy, iteration))
+            totals[iteration] = rows
+            checkpoint_done(checkpoint, strategy, [iteration])
+            if PROFILE is not None:
+                merge_profile(PROFILE, profile)
+        pool.close()
+        pool.join()
+
+        return [totals[iteration] for iteration in iterations]
+
+    totals = list()
+    delays = settings.get("DELAYS")
+    for iteration in iterations:
+        random.seed(task_seed(settings["seed"], strategy, iteration))
+        if delays:
+            traces = dict((delay, create_trace(settings["TRACE"], efforts,
+                                               network.nodes()))
+                          for delay in delays)
+            totals.append(simulate_delays(network, cancellist,
+                                          targets[iteration], efforts,
+                                          delays, strategy=strategy,
+                                          ENGINE=settings["ENGINE"],
+                                          arrays=arrays,
+                                          records=dict(
+                                              (delay, store[delay][
+                                               strategy_index, iteration])
+                                              for delay in delays),
+                                          traces=traces,
+                                          crn=common_key(settings,
+                                                         iteration)))
+            start = time.perf_counter()
+            for delay in delays:
+                write_trace(trace_path(strategy, iteration, delay),
+                            traces[delay])
+            add_time("output/trace", start)
+            checkpoint_done(checkpoint, strategy, [iteration], store)
+            continue
+
+        trace = create_trace(settings["TRACE"], efforts, network.nodes())
+        totals.append(simulate_target(network, cancellist, targets[iteration],
+                                      efforts, strategy=strategy,
+                                      ENGINE=settings["ENGINE"],
+                                      DELAY=settings["DELAY"],
+                                      arrays=arrays,
+                                      record=store[strategy_index,
+                                                   iteration], trace=trace,
+                                      crn=common_key(settings, iteration)))
+        start = time.perf_counter()
+        write_trace(trace_path(strategy, iteration), trace)
+        add_time("output/trace", start)
+        checkpoint_done(checkpoint, strategy, [iteration], store)
+
+    return totals
+
+def adaptive_sweep(settings, strategy, targets, sampler, rng, initial,
+                   limit, precision, store, checkpoint=None):
     """
-    Output various statistics of the nature of the network to a file, including
-    the diameter, the number of verticies and edges, and the
-    average in and out degrees.
+    Sweep rounds of target sets until the 95% confidence interval of the
+    median total at every effort level is at most precision airports wide,
+    or limit target sets have been simulated. New target sets are drawn with
+    choose_targets() and appended to targets, so later strategies reuse them.
 
     Args:
-        network: A NetworkX network graph.
+        settings: The sweep settings of sweep_targets().
+        strategy: The name of the cancellation strategy.
+        targets: The list of every target set of the run.
+        sampler: The weighted_sampler() of the target-selection weights.
+        rng: The random stream new target sets are drawn from.
+        initial: The number of target sets of the first round.
+        limit: The largest number of target sets to simulate.
+        precision: The widest acceptable confidence interval, in airports.
+        store: The results store that receives the S/E/I/R counts.
+        checkpoint: The run's checkpoint, as for sweep_targets().
 
     Returns:
-        VOID
+        totals: A list of simulate_target() totals, by target set.
+        cells: A list of RunningStatistics of the totals, by effort level.
+    """
 
-    IO:
-        network.dat: A file with all of the relevent netowkr information.
+    efforts = settings["efforts"]
+    cells = [RunningStatistics() for effort in efforts]
+
+    # Later rounds keep every worker busy.
+    chunk = max(10, settings["JOBS"])
+
+    totals = list()
+    count = min(initial, limit)
+    while count > 0:
+        iterations = range(len(totals), len(totals) + count)
+        if len(targets) < iterations[-1] + 1:
+            targets.extend(choose_targets(sampler,
+                                          iterations[-1] + 1 - len(targets),
+                                          rng=rng))
+
+        for rows in sweep_targets(settings, strategy, targets, iterations,
+                                  store, checkpoint):
+            totals.append(rows)
+
+            # Stopped simulations keep their last total, like write_efforts().
+            values = [total_infected for effort, total_infected in rows]
+            values.extend(values[-1:] * (len(efforts) - len(values)))
+            for cell, value in zip(cells, values):
+                cell.add(value)
+
+        widest = max(cell.width() for cell in cells)
+        print("\t{0}: {1} target sets, widest interval {2:.1f} airports"
+              .format(strategy, len(totals), widest))
+        if widest <= precision:
+            break
+        count = min(chunk, limit - len(totals))
 
-    """
+    return totals, cells
 
-    print("\tDetermining network type.")
-    # Determine if the graph is directed or undirected
-    if isinstance(network,nx.DiGraph):
-        network_type = "Directed"
-    else:
-        network_type = "Undirected"
+def write_precision(strategy, efforts, cells):
+    """
+    Write the estimates an adaptive sweep reached at each effort level to
+    "<strategy>/precision.csv", and print the median and its interval.
 
-    print("\tCalculaing edges and verticies.")
-    # Number of verticies and edges
-    edges = network.number_of_edges()
-    verticies = network.number_of_nodes()
+    Args:
+        strategy: The name of the cancellation strategy.
+        efforts: The effort levels, in order.
+        cells: A list of RunningStatistics, by effort level.
 
-    
-    # Not every vertex can lead to every other vertex.
-    # Create a subgraph that can.
-    print("\tTemporarily converting to undirected.")
-    undirected = network.to_undirected()
-    print("\tFinding subgraphs.")
-    subgraphs = nx.connected_component_subgraphs(undirected)
+    Returns:
+        Void
+    """
 
+    output_file = open("{0}/precision.csv".format(strategy), "w")
+    output_file.write('"effort","simulations","mean","sd","q25","median",'
+                      '"q75","lower","upper"\n')
 
-    # Find the number of vertices in the diameter of the network
+    for effort, cell in zip(efforts, cells):
+        lower, upper = cell.interval()
+        output_file.write("{0},{1},{2},{3},{4},{5},{6},{7},{8}\n".format(
+                          effort/100, cell.count, cell.mean, cell.sd(),
+                          cell.quantile(0.25), cell.quantile(0.5),
+                          cell.quantile(0.75), lower, upper))
+        print("\t{0}%\t{1:.1f} [{2:.1f}, {3:.1f}]".format(
+              effort, cell.quantile(0.5), lower, upper))
 
-    print("\tFinding network diameter.")
-    diameter = nx.diameter(subgraphs[0])
+    output_file.close()
 
+def write_variance(strategy, efforts, totals, directory=""):
+    """
+    Write the variance reduction common random numbers achieved to
+    "<strategy>/variance.csv", and print its median over the effort levels.
 
-    print("\tStoring network parameters")
+    Each effort level is compared with the one before by the difference of
+    their totals, paired by target set. Independent runs of the two levels
+    would estimate it with the variance of the one plus that of the other;
+    under common random numbers it is the variance of the paired
+    differences. Their ratio is the reduction, i.e. how many times more
+    target sets independent runs would need for the same precision.
 
-    data_file = open("network.dat", "w")
-    data_file.write("Simulation name: {0}\n\n".format(time))
-    data_file.write("Network properties\n===============\n")
-    data_file.write("Network type: {0}\n".format(network_type))
-    data_file.write("Number of verticies: {0}\n".format(verticies))
-    data_file.write("Number of edges: {0}\n".format(edges))
-    data_file.write("Diameter: {0}\n".format(diameter))
+    Args:
+        strategy: The name of the cancellation strategy.
+        efforts: The effort levels, in order.
+        totals: A list of simulate_target() totals, by target set.
+        directory: The directory holding the strategy folders.
 
-    data_file.close()
+    Returns:
+        Void
+    """
 
-def create_network(nodes, edges):
+    # Stopped simulations keep their last total, like write_efforts().
+    values = list()
+    for rows in totals:
+        row = [total_infected for effort, total_infected in rows]
+        values.append(row + row[-1:] * (len(efforts) - len(row)))
+    values = np.array(values, dtype=float)
+    if len(values) < 2:
+        return
+
+    output_file = open(os.path.join(directory,
+                                    "{0}/variance.csv".format(strategy)), "w")
+    output_file.write('"effort","previous","difference","independent",'
+                      '"paired","reduction"\n')
+
+    reductions = list()
+    for level in range(1, len(efforts)):
+        difference = values[:, level] - values[:, level - 1]
+        independent = values[:, level].var(ddof=1) + \
+                      values[:, level - 1].var(ddof=1)
+        paired = difference.var(ddof=1)
+        reduction = independent / paired if paired > 0 else float("nan")
+        if paired > 0:
+            reductions.append(reduction)
+        output_file.write("{0},{1},{2},{3},{4},{5}\n".format(
+                          efforts[level]/100, efforts[level - 1]/100,
+                          difference.mean(), independent, paired, reduction))
+
+    output_file.close()
+
+    if reductions:
+        print("\t{0}: common random numbers reduced the variance of effort "
+              "differences {1:.1f}x (median, {2:.1f}x to {3:.1f}x)".format(
+              strategy, np.median(reductions), min(reductions),
+              max(reductions)))
+
+def threshold_task(task):
     """
-    Create a NetworkX graph object using the airport and route databases.
+    Search the containment threshold of a single target set, in a worker
+    process or with the settings stored by init_worker().
 
     Args:
-        nodes: The file path to the nodes .csv file.
-        edeges: The file path to the edges .csv file.
+        task: A (strategy, iteration, target, seed) tuple.
 
     Returns:
-        G: A NetworkX DiGraph object populated with the nodes and edges assigned
-           by the data files from the arguments.
-           
+        threshold: The threshold_search() result of the target set, with
+                   the task's "profile", or None when not profiling.
     """
 
-    print("Creating network.")
-    G = nx.DiGraph()
+    strategy, iteration, target, seed = task
+    random.seed(seed)
 
-    print("\tLoading airports", end="")
-    sys.stdout.flush()
-    # Populate the graph with nodes.
-    with open(nodes, 'r', encoding='utf-8') as f:
+    with task_profile() as collected:
+        threshold = threshold_search(WORKER_STATE["network"],
+                                     WORKER_STATE["cancellist"], target,
+                                     contain=WORKER_STATE["CONTAIN"],
+                                     replicates=WORKER_STATE["REPLICATES"],
+                                     tolerance=WORKER_STATE["TOLERANCE"],
+                                     ENGINE=WORKER_STATE["ENGINE"],
+                                     DELAY=WORKER_STATE["DELAY"],
+                                     arrays=WORKER_STATE["arrays"],
+                                     ranked=WORKER_STATE.get("ranked"),
+                                     crn=common_key(WORKER_STATE, iteration))
+    threshold["profile"] = collected.get("profile")
+    if math.isnan(threshold["threshold"]):
+        print("\t{0} target {1}: not contained".format(strategy, iteration))
+    else:
+        print("\t{0} target {1}: {2:.1f}% [{3:.1f}%, {4:.1f}%]".format(
+              strategy, iteration, threshold["threshold"],
+              threshold["lower"], threshold["upper"]))
 
-        for line in f.readlines():
-            entries = line.replace('"',"").rstrip().split(",")
+    return threshold
 
-            G.add_node(int(entries[0]),
-                       country=entries[3],
-                       name=entries[1], 
-                       lat=entries[6],
-                       lon=entries[7])
+def threshold_search(network, cancellist, target, contain=None,
+                     replicates=3, tolerance=10.0, ENGINE="networkx",
+                     DELAY=0, arrays=None, ranked=None, crn=None):
+    """
+    Bisect the effort, as a percentage of cancellist, at which an outbreak
+    from the target set is contained in at least half of the simulations.
+    Containment is assumed to become more likely as the effort increases.
+    Full effort is probed first; when even that does not contain the
+    outbreak, e.g. because the cancellations are limited to international
+    flights, there is no threshold to bisect. A probe stops as soon as the
+    majority of its replicates is decided.
+
+    The confidence interval spans the final bracket of the search, widened
+    to the nearest probes that threshold_interval() finds decided on either
+    side, pooling the replicates of neighbouring probes.
 
+    Args:
+        network: A weighted NetworkX DiGraph object.
+        cancellist: The strategy's ranked list of edges to cancel.
+        target: A list of nodes to infect at the start of each simulation.
+        contain: The largest total number of infected airports that counts
+                 as contained. Defaults to the number of target airports.
+        replicates: The largest number of simulations per probed effort.
+        tolerance: The bracket width, in percent effort, to stop at.
+        ENGINE: The infection engine, "networkx", "numpy" or "frontier".
+        arrays: The network_arrays() of network for the numpy engine.
+        ranked: The CSR positions of cancellist, when already known.
+        crn: The common_draws() key of the target set. Each replicate
+             derives its own key from it, shared by every probe.
 
-    print("\t\t\t\t\t[Done]")
-    
-    print("\tLoading routes",end="")
-    sys.stdout.flush()
-    # Populate the graph with edges.
-    edge_count = 0
-    error_count = 0
-    duplicate_count = 0
-    line_num = 1
-    with open(edges, 'r', encoding="utf-8") as f:
+    Returns:
+        threshold: A dictionary of the estimated "threshold" and its "lower"
+                   and "upper" confidence limits in percent effort, all NaN
+                   when full effort does not contain the outbreak, and the
+                   number of "simulations" run.
+    """
 
-        for line in f.readlines():
-            entries = line.replace('"',"").rstrip().split(",")
-            try:
-                if G.has_edge(int(entries[3]),int(entries[5])):
-                    duplicate_count += 1
-                else:
-                    if line_num > 1:
-                        from_vertex = int(entries[3])
-                        to_vertex = int(entries[5])
-                        G.add_edge(from_vertex, to_vertex )
-                        G.edge[from_vertex][to_vertex]['IATAFrom'] = entries[2]
-                        G.edge[from_vertex][to_vertex]['IATATo'] = entries[4]
-                        edge_count += 1
-            except ValueError:
-                # The value doesn't exist
-                error_count += 1
-                pass
-            line_num += 1
-    
-    print("\t\t\t\t\t\t[Done]")
+    if contain is None:
+        contain = len(target)
 
-    # Limit to the first subgraph
-    print("\tFinding largest subgraph",end="")
-    undirected = G.to_undirected()
-    subgraphs = nx.connected_component_subgraphs(undirected)
-    subgraph_nodes = subgraphs[0].nodes()
-    to_remove = list()
-    for node in G.nodes():
-        if node not in subgraph_nodes:
-            to_remove.append(node)
-    G.remove_nodes_from(to_remove)
-    print("\t\t\t\t[Done]")
+    if ENGINE in ARRAY_ENGINES and ranked is None:
+        ranked = edge_positions(arrays, cancellist)
 
-    
-    print("\tRemoving isolated vertices",end="")
-    # Remove nodes without inbound edges
-    indeg = G.in_degree()
-    outdeg = G.out_degree()
-    to_remove = [n for n in indeg if (indeg[n] + outdeg[n] < 1)] 
-    G.remove_nodes_from(to_remove)
-    print("\t\t\t\t[Done]")
+    probes = list()
+    simulations = 0
 
+    def probe(effort):
+        # Whether most replicates at the effort contain the outbreak.
+        nonlocal simulations
+        cancelled = effort_cancellations(cancellist, effort)
+        if ENGINE in ARRAY_ENGINES and cancelled is not None:
+            overlay = cancellation_overlay(arrays, ranked, len(cancelled))
+        else:
+            overlay = None
+
+        # Stop as soon as the majority is decided either way.
+        contained = failures = 0
+        while (contained * 2 < replicates and
+               (replicates - failures) * 2 >= replicates):
+            results = run_engine(ENGINE, network, cancelled, target,
+                                 arrays=arrays, overlay=overlay,
+                                 crn=None if crn is None else
+                                     task_seed(crn, contained + failures),
+                                 DELAY=DELAY)
+            if results["Infected"] + results["Recovered"] <= contain:
+                contained += 1
+            else:
+                failures += 1
+        simulations += contained + failures
+        probes.append((effort, contained, contained + failures))
 
+        return contained * 2 >= replicates
 
-    # Calculate the edge weights
-    print("\tCalculating edge weights",end="")
-    G = calculate_weights(G)
-    print("\t\t\t\t[Done]")
-    
-    # Add clustering data
-    print("\tCalculating clustering coefficents",end="")
-    cluster_network = nx.Graph(G)
-    lcluster = nx.clustering(cluster_network)
-    for i,j in G.edges():
-        cluster_sum = lcluster[i] + lcluster[j]
-        G[i][j]['cluster'] = cluster_sum
-    print("\t\t\t[Done]")
+    if not probe(100.0):
+        return {"threshold": float("nan"), "lower": float("nan"),
+                "upper": float("nan"), "simulations": simulations}
 
-    # Flag flights as domestic or international.
-    print("\tCategorizing international and domestic flights",end="")
-    for i,j in G.edges():
-        if G.node[i]["country"] == G.node[j]['country']:
-            G[i][j]['international'] = False
+    lower, upper = 0.0, 100.0
+    while upper - lower > tolerance:
+        effort = (lower + upper) / 2
+        if probe(effort):
+            upper = effort
         else:
-            G[i][j]['international'] = True
-    print("\t\t[Done]")
+            lower = effort
 
-    return G
+    low, high = threshold_interval(probes)
+    return {"threshold": (lower + upper) / 2,
+            "lower": min(lower, low),
+            "upper": max(upper, high),
+            "simulations": simulations}
 
-def calculate_weights(input_network):
+def threshold_interval(probes, z=1.96):
     """
-    Add weights to the edges of a network based on the degrees of the connecting
-    verticies, and return the network.
+    Bound the containment threshold by the probes that are decided on either
+    side of it. As containment becomes more likely with effort, the
+    containment rate at an effort is at most the pooled rate of the probes
+    from it upwards, and at least that of the probes from it downwards. An
+    effort is decided below the threshold when the Wilson interval of some
+    run of probes from it upwards lies below one half, and above it when
+    that of some run from it downwards lies above one half. A single probe
+    of a few replicates never decides anything, but neighbouring probes
+    together do.
 
     Args:
-        input_network: A NetworkX graph object
+        probes: A list of (effort, contained, trials) tuples.
+        z: The standard normal quantile of the confidence level.
+
     Returns:
-        G: A weighted NetworkX graph object.
+        interval: The (lower, upper) limits in percent effort: the highest
+                  effort decided below the threshold, or 0, and the lowest
+                  decided above it, or 100.
     """
-    
-    G = input_network.copy()
 
-    # Add weights to edges
-    for node in G.nodes():
-        successors = G.successors(node)
-        weights = dict()
+    probes = sorted(probes)
+    lower, upper = 0.0, 100.0
+    for i, (effort, contained, trials) in enumerate(probes):
+        successes = total = 0
+        for above, contained, trials in probes[i:]:
+            successes, total = successes + contained, total + trials
+            if wilson_interval(successes, total, z)[1] < 0.5:
+                lower = max(lower, effort)
+                break
+
+        successes = total = 0
+        for below, contained, trials in reversed(probes[:i + 1]):
+            successes, total = successes + contained, total + trials
+            if wilson_interval(successes, total, z)[0] > 0.5:
+                upper = min(upper, effort)
+                break
+
+    return (lower, upper)
+
+def wilson_interval(successes, trials, z=1.96):
+    """
+    Calculate the Wilson score interval of a binomial proportion.
 
-        # Calculate the total out degree of all succs
-        total_degree = 0
-        for successor in successors:
-  
-            try:
-                total_degree += G.out_degree(successor)
-            except TypeError:
-                # Don't add anything
-                pass
+    Args:
+        successes: The number of successful trials.
+        trials: The number of trials.
+        z: The standard normal quantile of the confidence level.
 
-        # Find the weight for all possible successors
-        for successor in successors:
-            successor_degree = G.out_degree(successor)
+    Returns:
+        interval: A (lower, upper) tuple of proportions.
+    """
 
-            try:
-                int(successor_degree)
-            except TypeError:
-                successor_degree = 0
+    if trials == 0:
+        return (0.0, 1.0)
 
-            if total_degree > 0:
-                probability_of_infection = successor_degree / \
-                                           total_degree
-            else:
-                probability_of_infection = 0
+    p = successes / trials
+    center = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    spread = z * math.sqrt(p * (1 - p) / trials +
+                           z * z / (4 * trials * trials)) / \
+             (1 + z * z / trials)
 
-            weights[successor] = probability_of_infection
-        
-        largest_weight = 0
-        smallest_weight = 2
-        for successor, weight in weights.items():
-            if weight > largest_weight:
-                largest_weight = weight
-            elif weight < smallest_weight:
-                smallest_weight = weight
-        #(strat.shared_fitness - lowest_fitness) / \
-        #                       (highest_fitness - lowest_fitness)
-
-        for successor in successors:
-            if largest_weight != smallest_weight:
-                relative_weight = (weights[successor] - smallest_weight) /\
-                                  (largest_weight - smallest_weight)
-            else:
-                relative_weight = 0
-            G[node][successor]['weight'] = relative_weight
+    return (max(0.0, center - spread), min(1.0, center + spread))
 
-    return G
+class RunningStatistics(object):
+    """
+    Streaming estimates of the mean, variance and quartiles of a sample,
+    kept in constant memory. The quartiles follow the P-square algorithm of
+    Jain and Chlamtac (1985), which moves five markers per quantile towards
+    their ideal positions as the observations arrive.
+    """
 
-def infection(input_network, vaccination, starts,DELAY=0, vis = False, 
-              file_name = "sir.csv", title="",  RECALCULATE = True):
+    def __init__(self, quantiles=(0.25, 0.5, 0.75)):
+        self.count = 0
+        self.mean = 0.0
+        self.squares = 0.0
+        self.markers = dict()
+        for p in quantiles:
+            self.markers[p] = {"heights": list(),
+                               "positions": [1, 2, 3, 4, 5],
+                               "desired": [1, 1 + 2*p, 1 + 4*p, 3 + 2*p, 5],
+                               "increments": [0, p/2, p, (1 + p)/2, 1]}
+
+    def add(self, value):
+        """
+        Add an observation to the estimates.
+        """
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (value - self.mean)
+
+        for marker in self.markers.values():
+            heights = marker["heights"]
+            if self.count <= 5:
+                heights.append(value)
+                heights.sort()
+                continue
+
+            positions = marker["positions"]
+            if value < heights[0]:
+                heights[0] = value
+                cell = 0
+            elif value >= heights[4]:
+                heights[4] = value
+                cell = 3
+            else:
+                cell = max(i for i in range(4) if heights[i] <= value)
+            for i in range(cell + 1, 5):
+                positions[i] += 1
+            for i in range(5):
+                marker["desired"][i] += marker["increments"][i]
+
+            # Move the middle markers that drifted a position or more.
+            for i in range(1, 4):
+                drift = marker["desired"][i] - positions[i]
+                if (drift >= 1 and positions[i+1] - positions[i] > 1) or \
+                   (drift <= -1 and positions[i-1] - positions[i] < -1):
+                    step = 1 if drift > 0 else -1
+                    height = heights[i] + step / (positions[i+1] -
+                             positions[i-1]) * \
+                             ((positions[i] - positions[i-1] + step) *
+                              (heights[i+1] - heights[i]) /
+                              (positions[i+1] - positions[i]) +
+                              (positions[i+1] - positions[i] - step) *
+                              (heights[i] - heights[i-1]) /
+                              (positions[i] - positions[i-1]))
+                    if not heights[i-1] < height < heights[i+1]:
+                        height = heights[i] + step * \
+                                 (heights[i+step] - heights[i]) / \
+                                 (positions[i+step] - positions[i])
+                    heights[i] = height
+                    positions[i] += step
+
+    def sd(self):
+        """
+        The sample standard deviation.
+        """
+
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.squares / (self.count - 1))
+
+    def quantile(self, p):
+        """
+        The estimate of one of the tracked quantiles.
+        """
+
+        heights = self.markers[p]["heights"]
+        if not heights:
+            return float("nan")
+        if self.count <= 5:
+            return heights[int(round(p * (len(heights) - 1)))]
+        return heights[2]
+
+    def interval(self, z=1.96):
+        """
+        The confidence interval of the median, from its asymptotic standard
+        error 1/(2 f sqrt(n)), with the density f at the median estimated as
+        one half over the interquartile range.
+
+        Returns:
+            interval: A (lower, upper) tuple, infinite below five
+                      observations.
+        """
+
+        if self.count < 5:
+            return (float("-inf"), float("inf"))
+
+        median = self.quantile(0.5)
+        spread = z * (self.quantile(0.75) - self.quantile(0.25)) / \
+                 math.sqrt(self.count)
+        return (median - spread, median + spread)
+
+    def width(self):
+        """
+        The width of the confidence interval of the median.
+        """
+
+        lower, upper = self.interval()
+        return upper - lower
+
+def write_thresholds(strategy, thresholds):
     """
-    Simulate an infection within network, generated using seed, and with the
-    givin vaccination strategy. This function will write data from each timestep
-    to "data.csv".
+    Write the containment threshold of every target set, as fractions of the
+    cancellation list, to "<strategy>/threshold.csv".
 
     Args:
-        network: A NetworkX DiGraph object.
-        vaccination: A list of node indices to label as recovered from the 
-                     begining.
+        strategy: The name of the cancellation strategy.
+        thresholds: A list of threshold_search() results, by target set.
 
     Returns:
-        state: A dictionary of the total suscceptable, infected, and recovered.
-
+        Void
     """
 
-    print("Simulating infection.")
+    output_file = open("{0}/threshold.csv".format(strategy), "w")
+    output_file.write('"target","threshold","lower","upper","simulations"\n')
 
-    network = input_network.copy()
-    
-    # Recalculate the weights of the network as per necessary
+    for iteration, threshold in enumerate(thresholds):
+        # Outbreaks that full effort does not contain have no threshold.
+        limits = ["NA" if math.isnan(threshold[key]) else
+                  threshold[key]/100 for key in ("threshold", "lower",
+                                                 "upper")]
+        output_file.write("{0},{1},{2},{3},{4}\n".format(
+                          iteration, limits[0], limits[1], limits[2],
+                          threshold["simulations"]))
 
-    # Open the data file
-    f = open(file_name, "w")
-    f.write("time, s, e, i, r\n")
+    output_file.close()
 
-    # Set the default to susceptable
-    sys.stdout.flush()
-    for node in network.nodes():
-        network.node[node]["status"] =  "s"
-        network.node[node]["color"] = "#A0C8F0"
-        network.node[node]["age"] = 0
-    
-    # Assign the infected
-    for start in starts:
-        infected = start
-        network.node[infected]["status"] = "i"
-        network.node[infected]["color"]  = "green"
-        
-        if isinstance(network,nx.DiGraph):
-            in_degree = network.in_degree()[infected] 
-            out_degree = network.out_degree()[infected]
-            degree = in_degree + out_degree
-        else:
-            degree = network.degree()[infected]
+def write_checkpoint(file_name, checkpoint):
+    """
+    Save the checkpoint of a run: the working directory and options it was
+    started with, the seed, the strategies whose rankings are saved, the
+    target sets done by strategy and the state of the random stream after
+    the last of them. The file is replaced in one step, so an interrupted
+    run always leaves a whole checkpoint behind.
 
-        print("\t",network.node[infected]["name"],"[",degree,"]")
+    Args:
+        file_name: The path of the .json file to write.
+        checkpoint: The checkpoint dictionary.
 
+    Returns:
+        Void
+    """
 
-    if vaccination is not None:
-        print("\tVaccinated: ", len(vaccination) )
-    else: 
-        print("\tVaccinated: None")
+    temporary = file_name + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary, file_name)
 
-    if vis:
-        pos = nx.spring_layout(network, scale=2)
+def read_checkpoint(file_name):
+    """
+    Read a checkpoint saved with write_checkpoint().
 
-    # Iterate through the evolution of the disease.
-    for step in range(0,99):
-        # If the delay is over, vaccinate.
-        # Convert the STRING! 
-        if int(step) == int(DELAY):
+    Args:
+        file_name: The path of the .json file.
+
+    Returns:
+        checkpoint: The checkpoint dictionary.
+    """
+
+    with open(file_name, "r") as f:
+        return json.load(f)
+
+def save_checkpoint(file_name, checkpoint):
+    """
+    Record the current state of the random stream in the checkpoint, and
+    save it. Work done after the last save is repeated on resume.
+    """
+
+    version, state, gauss = random.getstate()
+    checkpoint["random_state"] = [version, list(state), gauss]
+    write_checkpoint(file_name, checkpoint)
+
+def checkpoint_done(checkpoint, strategy, iterations, store=None):
+    """
+    Record target sets of a strategy as done, once their counts are safely
+    in the results store.
+
+    Args:
+        checkpoint: The run's checkpoint, or None to record nothing.
+        strategy: The name of the cancellation strategy.
+        iterations: The indices of the finished target sets.
+        store: The results store, or a dictionary of them by delay, to
+               flush first, unless the simulations flushed it themselves.
+
+    Returns:
+        Void
+    """
+
+    if checkpoint is None:
+        return
+    if isinstance(store, dict):
+        for delay_store in store.values():
+            delay_store.flush()
+    elif store is not None:
+        store.flush()
+    checkpoint["done"].setdefault(strategy, list()).extend(iterations)
+    save_checkpoint("checkpoint.json", checkpoint)
+
+def resume_random(checkpoint):
+    """
+    Restore the random stream of a resumed run before its first unfinished
+    work, so it continues where the interrupted run stopped. Only the first
+    call restores anything.
+    """
+
+    state = checkpoint.pop("random_state", None) if checkpoint else None
+    if state is not None:
+        random.setstate((state[0], tuple(state[1]), state[2]))
+
+def stored_totals(store, strategy_index, iteration, efforts):
+    """
+    Rebuild the simulate_target() totals of a finished target set from the
+    results store.
+
+    Args:
+        store: The results store, or a dictionary of them by delay.
+        strategy_index: The index of the strategy.
+        iteration: The index of the target set.
+        efforts: The effort levels, in order.
+
+    Returns:
+        totals: A list of (effort, total_infected) tuples, or a dictionary
+                of them by delay.
+    """
+
+    if isinstance(store, dict):
+        return dict((delay, stored_totals(delay_store, strategy_index,
+                                          iteration, efforts))
+                    for delay, delay_store in store.items())
+
+    final = store[strategy_index, iteration, :, -1, :]
+    return [(effort, int(counts[INFECTED]) + int(counts[RECOVERED]))
+            for effort, counts in zip(efforts, final)
+            if counts[INFECTED] >= 0]
+
+def write_ranking(file_name, cancellist):
+    """
+    Save a strategy's ranked list of edges to cancel as a (edges, 2) array
+    of airport IDs.
+    """
+
+    np.save(file_name, np.array([edge[:2] for edge in cancellist],
+                                dtype=np.int64).reshape(-1, 2))
+
+def read_ranking(file_name):
+    """
+    Read a ranking saved with write_ranking() as a list of (u, v) edges.
+    """
+
+    return [tuple(edge) for edge in np.load(file_name).tolist()]
+
+def task_seed(seed, *coordinates):
+    """
+    Derive the seed of a task from the top level seed and the coordinates of
+    the task, independent of the process or order it runs in.
+
+    Args:
+        seed: The top level random seed.
+        coordinates: Values identifying the task, e.g. strategy and target.
+
+    Returns:
+        seed: An integer seed.
+    """
+
+    key = "/".join(str(value) for value in (seed,) + coordinates)
+    return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:16], 16)
+
+def simulate_target(network, cancellist, target, efforts, strategy="",
+                    ENGINE="networkx", DELAY=0, arrays=None, ranked=None,
+                    record=None, trace=None, crn=None):
+    """
+    Simulate one target set at increasing effort levels, stopping once the
+    infection no longer spreads beyond a single airport.
+
+    Args:
+        network: A weighted NetworkX DiGraph object.
+        cancellist: The strategy's ranked list of edges to cancel.
+        target: A list of nodes to infect at the start of each simulation.
+        efforts: The effort levels to simulate, in increasing order.
+        strategy: The name of the cancellation strategy.
+        ENGINE: The infection engine, "networkx", "numpy" or "frontier".
+        arrays: The network_arrays() of network for the numpy engine.
+        ranked: The CSR positions of cancellist, when already known.
+        record: An optional (efforts, MAX_STEPS, 4) array that receives the
+                S/E/I/R counts of every step at every effort level, written
+                in one piece once the last effort level has run.
+        trace: An optional create_trace() of efforts to record into.
+        crn: The common_draws() key of the target set, shared by every
+             effort level, or None for independent draws.
+
+    Returns:
+        totals: A list of (effort, total_infected) tuples.
+    """
+
+    if trace is None:
+        trace = create_trace("none", efforts)
+
+    # Each effort level cancels a longer prefix of the same ranking, so the
+    # array engines' overlay is extended from one level to the next.
+    if ENGINE in ARRAY_ENGINES and ranked is None:
+        ranked = edge_positions(arrays, cancellist)
+    overlay = None
+
+    totals = list()
+    for level, effort in enumerate(efforts):
+        cancelled = effort_cancellations(cancellist, effort)
+        steps = trace["counts"][level]
+        states = trace["states"][level] if "states" in trace else None
+
+        title = "{0} - {1}%".format(strategy, effort/100)
+        if ENGINE in ARRAY_ENGINES and cancelled is not None:
+            overlay = cancellation_overlay(arrays, ranked, len(cancelled),
+                                           base=overlay)
+        results = run_engine(ENGINE, network, cancelled, target,
+                             arrays=arrays, overlay=overlay, crn=crn,
+                             title=title, DELAY=DELAY, record=steps,
+                             snapshots=states)
+        total_infected = results["Infected"] + results["Recovered"]
+        totals.append((effort, total_infected))
+
+        if total_infected == 1:
+            break
+
+    if record is not None:
+        record[:] = trace["counts"]
+
+    return totals
+
+def simulate_delays(network, cancellist, target, efforts, delays,
+                    strategy="", ENGINE="networkx", arrays=None, ranked=None,
+                    records=None, traces=None, crn=None):
+    """
+    Simulate one target set at increasing effort levels, as simulate_target()
+    does, for several cancellation delays at once. Until a delay is over the
+    infection does not depend on it, so every effort level simulates the
+    shared prefix once without cancellations, forks its state at the start
+    of each delay, and only simulates the steps after each fork. Effort
+    levels without cancellations are simulated once for every delay.
+
+    Every delay continues the same prefix, so the delays differ only by
+    their cancellations. Their results follow the same distribution as
+    separate runs with --delay, but not the same random draws.
+
+    Args:
+        network: A weighted NetworkX DiGraph object.
+        cancellist: The strategy's ranked list of edges to cancel.
+        target: A list of nodes to infect at the start of each simulation.
+        efforts: The effort levels to simulate, in increasing order.
+        delays: The cancellation delays to simulate, in steps.
+        strategy: The name of the cancellation strategy.
+        ENGINE: The infection engine, "networkx", "numpy" or "frontier".
+        arrays: The network_arrays() of network for the array engines.
+        ranked: The CSR positions of cancellist, when already known.
+        records: An optional dictionary of the simulate_target() record of
+                 each delay.
+        traces: An optional dictionary of the create_trace() of each delay.
+        crn: The common_draws() key of the target set, or None.
+
+    Returns:
+        totals: A dictionary of the simulate_target() totals of each delay.
+    """
+
+    if traces is None:
+        traces = dict((delay, create_trace("none", efforts))
+                      for delay in delays)
+    if ENGINE in ARRAY_ENGINES and ranked is None:
+        ranked = edge_positions(arrays, cancellist)
+    overlay = None
+
+    totals = dict((delay, list()) for delay in delays)
+    for level, effort in enumerate(efforts):
+        # Each delay stops once its infection no longer spreads.
+        running = [delay for delay in delays
+                   if not totals[delay] or totals[delay][-1][1] != 1]
+        if not running:
+            break
+
+        cancelled = effort_cancellations(cancellist, effort)
+        title = "{0} - {1}%".format(strategy, effort/100)
+        if ENGINE in ARRAY_ENGINES and cancelled is not None:
+            overlay = cancellation_overlay(arrays, ranked, len(cancelled),
+                                           base=overlay)
+
+        # The prefix runs in the trace of the first delay, which is
+        # overwritten by its own fork, if any.
+        shared = traces[running[0]]
+        steps = shared["counts"][level]
+        states = shared["states"][level] if "states" in shared else None
+        forks = None
+        if cancelled is not None:
+            forks = dict((delay, None) for delay in running)
+        prefix = run_engine(ENGINE, network, None, target, arrays=arrays,
+                            crn=crn, title=title, record=steps,
+                            snapshots=states, forks=forks)
+
+        results = dict()
+        for delay in running:
+            trace = traces[delay]
+            if forks is None or forks[delay] is None:
+                # Nothing is cancelled, or not before the infection ended.
+                trace["counts"][level] = steps
+                if states is not None:
+                    trace["states"][level] = states
+                results[delay] = prefix
+        for delay in running:
+            if delay not in results:
+                trace = traces[delay]
+                results[delay] = run_engine(
+                    ENGINE, network, cancelled, target, arrays=arrays,
+                    overlay=overlay, crn=crn, title=title, DELAY=delay,
+                    record=trace["counts"][level],
+                    snapshots=trace["states"][level] if "states" in trace
+                              else None,
+                    fork=forks[delay])
+
+        for delay in running:
+            totals[delay].append((effort, results[delay]["Infected"] +
+                                          results[delay]["Recovered"]))
+
+    if records is not None:
+        for delay, record in records.items():
+            record[:] = traces[delay]["counts"]
+
+    return totals
+
+def run_engine(ENGINE, network, cancelled, target, arrays=None,
+               overlay=None, crn=None, **options):
+    """
+    Run a single simulation with the given infection engine, without
+    writing its counts to a file.
+
+    Args:
+        ENGINE: The infection engine, "networkx", "numpy" or "frontier".
+        network: A weighted NetworkX DiGraph object.
+        cancelled: The edges to cancel, or None.
+        target: A list of nodes to infect at the start of the simulation.
+        arrays: The network_arrays() of network for the array engines.
+        overlay: The cancellation_overlay() of cancelled for the array
+                 engines.
+        crn: The common_draws() key of the array engines, or None.
+        options: Further keyword arguments of the engine, e.g. DELAY.
+
+    Returns:
+        state: The engine's dictionary of the final S/I/R totals.
+    """
+
+    if ENGINE == "numpy":
+        return infection_numpy(network, cancelled, target, file_name=None,
+                               arrays=arrays, overlay=overlay, crn=crn,
+                               **options)
+    elif ENGINE == "frontier":
+        return infection_frontier(network, cancelled, target,
+                                  file_name=None, arrays=arrays,
+                                  overlay=overlay, crn=crn, **options)
+    if crn is not None:
+        raise ValueError("Common random numbers need an array engine.")
+    return infection(network, cancelled, target, file_name=None, **options)
+
+def create_trace(level, efforts, nodes=None):
+    """
+    Preallocate the trace of a target set's simulations at every effort
+    level. The engines fill it in place, and write_trace() saves it once the
+    target set is done. Effort levels that never ran are left at -1.
+
+    Args:
+        level: The level of detail, one of TRACE_LEVELS.
+        efforts: The effort levels, in order.
+        nodes: The nodes of the network, in order. Only needed at the
+               "nodes" level.
+
+    Returns:
+        trace: A dictionary of the "level", the "efforts", the (efforts,
+               MAX_STEPS, 4) S/E/I/R "counts" and, at the "nodes" level, the
+               "nodes" and their (efforts, MAX_STEPS, nodes) "states".
+    """
+
+    trace = {"level": level, "efforts": list(efforts),
+             "counts": np.full((len(efforts), MAX_STEPS, 4), -1,
+                               dtype=np.int32)}
+    if level == "nodes":
+        trace["nodes"] = np.array(nodes)
+        trace["states"] = np.full((len(efforts), MAX_STEPS, len(nodes)), -1,
+                                  dtype=np.int8)
+
+    return trace
+
+def trace_path(strategy, iteration, delay=None):
+    """
+    The path of the trace file of a target set, in the directory of its
+    delay when sweeping several.
+    """
+
+    path = "{0}/trace_{1}.npz".format(strategy, pad_string(iteration,4))
+    if delay is not None:
+        path = os.path.join(delay_directory(delay), path)
+    return path
+
+def delay_directory(delay):
+    """
+    The directory of the results of one delay of a --delays sweep, in the
+    delay-N layout of data/edge-based.
+    """
+
+    return "delay-{0}".format(delay)
+
+def parse_delays(text):
+    """
+    Parse a --delays value of comma separated delays and ranges, e.g.
+    "0-7" or "0,2,4-6", into a sorted list of delays.
+    """
+
+    delays = set()
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        delays.update(range(int(low), int(high or low) + 1))
+    return sorted(delays)
+
+def write_trace(file_name, trace):
+    """
+    Save a create_trace() to a .npz file: the "efforts" and the "final"
+    S/E/I/R counts at every effort level, plus the per-step "counts" at the
+    "steps" level and the "nodes" and their "states" at the "nodes" level.
+    Nothing is written at the "none" level.
+
+    Args:
+        file_name: The path of the .npz file.
+        trace: The create_trace() to save.
+
+    Returns:
+        Void
+    """
+
+    level = trace["level"]
+    if level == "none":
+        return
+
+    arrays = {"efforts": np.array(trace["efforts"]),
+              "final": trace["counts"][:, -1]}
+    if level in ("steps", "nodes"):
+        arrays["counts"] = trace["counts"]
+    if level == "nodes":
+        arrays["nodes"] = trace["nodes"]
+        arrays["states"] = trace["states"]
+
+    np.savez(file_name, **arrays)
+
+def effort_cancellations(cancellist, effort):
+    """
+    Select the flights cancelled at the given effort level.
+
+    Args:
+        cancellist: The strategy's ranked list of edges to cancel.
+        effort: The percentage of the ranked edges to cancel.
+
+    Returns:
+        cancelled: A prefix of cancellist, or None for no effort.
+    """
+
+    if effort == 0:
+        return None
+
+    max_index = int(len(cancellist) * (effort/100))-1
+    return cancellist[0:max_index]
+
+def write_efforts(strategy, iteration, totals, directory=""):
+    """
+    Write the total number of infections of a target set at each effort level
+    to "<strategy>/<strategy>_<iteration>.csv". Once a simulation stopped at
+    its single seed airport, the remaining effort levels are padded with it.
+
+    Args:
+        strategy: The name of the cancellation strategy.
+        iteration: The index of the target set.
+        totals: A list of (effort, total_infected) tuples.
+        directory: The directory holding the strategy folders.
+
+    Returns:
+        Void
+    """
+
+    output_file = open(os.path.join(directory, "{0}/{0}_{1}.csv".format(
+                                     strategy, pad_string(iteration,4))),"w")
+    output_file.write('"effort","total_infected, edges_closed"\n')
+
+    for effort, total_infected in totals:
+        output_file.write("{0},{1}\n".format(effort/100,total_infected))
+
+    if totals and totals[-1][1] == 1:
+        effort, total_infected = totals[-1]
+        for remaining_effort in range(effort+5,101,5):
+            output_file.write("{0},{1}\n".format(remaining_effort/100,
+                                                  total_infected))
+
+    output_file.close()
+
+def choose_targets(sampler, count, size=10, rng=random):
+    """
+    Choose target sets of distinct airports, each airport drawn with
+    probability proportional to its weight.
+
+    Args:
+        sampler: A weighted_sampler() of the target-selection weights.
+        count: The number of target sets to choose.
+        size: The number of airports per target set.
+        rng: The random stream to draw from.
+
+    Returns:
+        targets: A list of count lists of airports.
+    """
+
+    keys, cumulative = sampler
+    if size > sum(1 for low, high in zip([0] + cumulative, cumulative)
+                  if high > low):
+        raise ValueError("Cannot choose {0} airports with positive "
+                         "weights.".format(size))
+
+    return [weighted_sample(sampler, size, rng) for ind in range(0,count)]
+
+def write_counts(file_name, counts):
+    """
+    Write the S/E/I/R counts of a simulation, one line per step.
+
+    Args:
+        file_name: The path of the .csv file.
+        counts: A (steps, 4) array of S/E/I/R counts.
+
+    Returns:
+        Void
+    """
+
+    with open(file_name, "w") as f:
+        f.write("time, s, e, i, r\n")
+        f.write("".join("{0}, {1}, {2}, {3}, {4}\n".format(step, *row)
+                        for step, row in enumerate(counts.tolist())))
+
+def new_profile():
+    """
+    Create an empty profile of phase timers and counters.
+
+    Returns:
+        profile: A dictionary of "timers", each a [seconds, calls] list by
+                 phase, and "counters" by name.
+    """
+
+    return {"timers": dict(), "counters": dict()}
+
+def add_time(phase, start):
+    """
+    Add the time since start, a time.perf_counter() value, to a phase of
+    PROFILE, when profiling.
+    """
+
+    if PROFILE is not None:
+        timer = PROFILE["timers"].setdefault(phase, [0.0, 0])
+        timer[0] += time.perf_counter() - start
+        timer[1] += 1
+
+def count(**amounts):
+    """
+    Add amounts to the counters of PROFILE, when profiling.
+    """
+
+    if PROFILE is not None:
+        counters = PROFILE["counters"]
+        for name, amount in amounts.items():
+            counters[name] = counters.get(name, 0) + int(amount)
+
+def merge_profile(profile, other):
+    """
+    Add the timers and counters of other, e.g. from a worker, to profile.
+    """
+
+    if other is None:
+        return
+    for phase, (seconds, calls) in other["timers"].items():
+        timer = profile["timers"].setdefault(phase, [0.0, 0])
+        timer[0] += seconds
+        timer[1] += calls
+    for name, amount in other["counters"].items():
+        profile["counters"][name] = profile["counters"].get(name, 0) + amount
+
+@contextlib.contextmanager
+def task_profile():
+    """
+    Give a task its own PROFILE while profiling, so that its numbers can be
+    returned from a worker process and merged once. The yielded dictionary
+    holds the task's "profile" afterwards.
+    """
+
+    global PROFILE
+    outer = PROFILE
+    collected = dict()
+    if outer is not None:
+        PROFILE = new_profile()
+    try:
+        yield collected
+    finally:
+        if outer is not None:
+            collected["profile"] = PROFILE
+        PROFILE = outer
+
+def write_profile(file_name, profile, wall, workers):
+    """
+    Write a profile as JSON, with the timers sorted by time spent.
+
+    Args:
+        file_name: The path of the .json file.
+        profile: The profile of the run, including its workers.
+        wall: The wall time of the run, in seconds.
+        workers: The number of worker processes.
+
+    Returns:
+        Void
+    """
+
+    timers = sorted(profile["timers"].items(), key=lambda k: k[1][0],
+                    reverse=True)
+    summary = {"wall_seconds": wall, "workers": workers,
+               "timers": collections.OrderedDict(
+                   (phase, {"seconds": seconds, "calls": calls})
+                   for phase, (seconds, calls) in timers),
+               "counters": dict(sorted(profile["counters"].items()))}
+    with open(file_name, "w") as f:
+        json.dump(summary, f, indent=4)
+
+def log(*args):
+    """
+    Print a progress message of a simulation, unless QUIET is set.
+    """
+
+    if not QUIET:
+        print(*args)
+
+def weighted_sampler(weights):
+    """
+    Build a sampler of the keys of weights, with probability proportional to
+    their weights, from the running sum of the weights. Draws search the sums
+    in O(log n) instead of scanning every weight.
+
+    Args:
+        weights: A dictionary of non-negative weights.
+
+    Returns:
+        sampler: A (keys, cumulative weights) tuple.
+    """
+
+    keys = list(weights.keys())
+    return keys, list(itertools.accumulate(weights[key] for key in keys))
+
+def weighted_sample(sampler, size, rng=random):
+    """
+    Draw distinct keys from a weighted_sampler(), redrawing keys that were
+    already chosen. Each draw uses one number of the random stream, and picks
+    the same key as a linear scan of the weights in order would.
+
+    Args:
+        sampler: A weighted_sampler() of the weights.
+        size: The number of keys to draw.
+        rng: The random stream to draw from.
+
+    Returns:
+        chosen: A list of size distinct keys, in the order they were drawn.
+    """
+
+    keys, cumulative = sampler
+    chosen = list()
+    while len(chosen) < size:
+        number = rng.random() * cumulative[-1]
+        key = keys[bisect.bisect_left(cumulative, number)]
+        if key not in chosen:
+            chosen.append(key)
+
+    return chosen
+
+def write_targets(file_name, targets):
+    """
+    Write target sets to a .csv file, one set of airports per line.
+
+    Args:
+        file_name: The path of the file to write.
+        targets: A list of lists of airports.
+
+    Returns:
+        Void
+    """
+
+    with open(file_name, "w", newline="") as f:
+        csv.writer(f).writerows(targets)
+
+def read_targets(file_name, network):
+    """
+    Read target sets written by write_targets().
+
+    Args:
+        file_name: The path of the .csv file of target sets.
+        network: The NetworkX DiGraph the target sets belong to.
+
+    Returns:
+        targets: A list of lists of airports.
+    """
+
+    targets = list()
+    with open(file_name, "r", newline="") as f:
+        for row in csv.reader(f):
+            if not row:
+                continue
+            target_round = [int(airport) for airport in row]
+            missing = [airport for airport in target_round
+                       if airport not in network]
+            if missing:
+                print("Unknown target airports: {0}".format(missing))
+                exit()
+            targets.append(target_round)
+
+    return targets
+
+def pad_string(integer, n):
+    """
+    Add "0" to the front of an interger so that the resulting string in n 
+    characters long.
+
+    Args:
+        integer: The number to pad.
+        n: The desired length of the string
+
+    Returns
+        string: The padded string representation of the integer.
+        
+    """
+
+    string = str(integer)
+
+    while len(string) < n:
+        string = "0" + string
+
+    return string
+
+def simulation_data(network, time, targets, seed):
+    """
+    Output various statistics of the nature of the network to a file, including
+    the diameter, the number of verticies and edges, and the
+    average in and out degrees.
+
+    Args:
+        network: A NetworkX network graph.
+
+    Returns:
+        VOID
+
+    IO:
+        network.dat: A file with all of the relevent netowkr information.
+
+    """
+
+    print("\tDetermining network type.")
+    # Determine if the graph is directed or undirected
+    if isinstance(network,nx.DiGraph):
+        network_type = "Directed"
+    else:
+        network_type = "Undirected"
+
+    print("\tCalculaing edges and verticies.")
+    # Number of verticies and edges
+    edges = network.number_of_edges()
+    verticies = network.number_of_nodes()
+
+    
+    # Not every vertex can lead to every other vertex.
+    # Create a subgraph that can.
+    print("\tTemporarily converting to undirected.")
+    undirected = network.to_undirected()
+    print("\tFinding subgraphs.")
+    subgraphs = nx.connected_component_subgraphs(undirected)
+
+
+    # Find the number of vertices in the diameter of the network
+
+    print("\tFinding network diameter.")
+    diameter = nx.diameter(subgraphs[0])
+
+
+    print("\tStoring network parameters")
+
+    data_file = open("network.dat", "w")
+    data_file.write("Simulation name: {0}\n\n".format(time))
+    data_file.write("Network properties\n===============\n")
+    data_file.write("Network type: {0}\n".format(network_type))
+    data_file.write("Number of verticies: {0}\n".format(verticies))
+    data_file.write("Number of edges: {0}\n".format(edges))
+    data_file.write("Diameter: {0}\n".format(diameter))
+
+    data_file.close()
+
+def create_network(nodes, edges):
+    """
+    Create a NetworkX graph object using the airport and route databases.
+
+    Args:
+        nodes: The file path to the nodes .csv file, or its columns as read
+               by load_airports().
+        edeges: The file path to the edges .csv file, or its columns as read
+                by load_routes().
+
+    Returns:
+        G: A NetworkX DiGraph object populated with the nodes and edges assigned
+           by the data files from the arguments.
+           
+    """
+
+    print("Creating network.")
+    G = nx.DiGraph()
+
+    print("\tLoading airports", end="")
+    sys.stdout.flush()
+    start = time.perf_counter()
+    # Populate the graph with nodes.
+    airports = nodes if isinstance(nodes, dict) else load_airports(nodes)
+    G.add_nodes_from((airport, {"country": country, "name": name,
+                                "lat": lat, "lon": lon})
+                     for airport, country, name, lat, lon in
+                     zip(airports["id"].tolist(), airports["country"],
+                         airports["name"], airports["lat"], airports["lon"]))
+    add_time("create_network/airports", start)
+    print("\t\t\t\t\t[Done]")
+    
+    print("\tLoading routes",end="")
+    sys.stdout.flush()
+    start = time.perf_counter()
+    # Populate the graph with edges.
+    routes = edges if isinstance(edges, dict) else load_routes(edges)
+    G.add_edges_from((i, j, {"IATAFrom": iata_from, "IATATo": iata_to})
+                     for i, j, iata_from, iata_to in
+                     zip(routes["source"].tolist(), routes["target"].tolist(),
+                         routes["IATAFrom"], routes["IATATo"]))
+    add_time("create_network/routes", start)
+    print("\t\t\t\t\t\t[Done]")
+    print("\t\t{0} routes, {1} duplicates, {2} errors".format(
+          len(routes["source"]), routes["duplicates"], routes["errors"]))
+
+    # Limit to the first subgraph
+    print("\tFinding largest subgraph",end="")
+    start = time.perf_counter()
+    undirected = G.to_undirected()
+    subgraphs = nx.connected_component_subgraphs(undirected)
+    subgraph_nodes = set(subgraphs[0].nodes())
+    to_remove = list()
+    for node in G.nodes():
+        if node not in subgraph_nodes:
+            to_remove.append(node)
+    G.remove_nodes_from(to_remove)
+    add_time("create_network/components", start)
+    print("\t\t\t\t[Done]")
+
+    
+    print("\tRemoving isolated vertices",end="")
+    # Remove nodes without inbound edges
+    indeg = G.in_degree()
+    outdeg = G.out_degree()
+    to_remove = [n for n in indeg if (indeg[n] + outdeg[n] < 1)] 
+    G.remove_nodes_from(to_remove)
+    print("\t\t\t\t[Done]")
+
+
+
+    # Calculate the edge weights
+    print("\tCalculating edge weights",end="")
+    G = calculate_weights(G)
+    print("\t\t\t\t[Done]")
+    
+    # Add clustering data
+    print("\tCalculating clustering coefficents",end="")
+    start = time.perf_counter()
+    lcluster = clustering_coefficients(G)
+    for i,j in G.edges():
+        cluster_sum = lcluster[i] + lcluster[j]
+        G[i][j]['cluster'] = cluster_sum
+    add_time("create_network/clustering", start)
+    print("\t\t\t[Done]")
+
+    # Flag flights as domestic or international.
+    print("\tCategorizing international and domestic flights",end="")
+    start = time.perf_counter()
+    for i,j in G.edges():
+        if G.node[i]["country"] == G.node[j]['country']:
+            G[i][j]['international'] = False
+        else:
+            G[i][j]['international'] = True
+    add_time("create_network/flags", start)
+    print("\t\t[Done]")
+
+    return G
+
+def clustering_coefficients(network):
+    """
+    Calculate the clustering coefficient of every airport in the undirected
+    network of its routes, as nx.clustering() does, by counting triangles
+    with sparse matrix products. Every route is oriented from the airport of
+    lower to the one of higher degree, so that hubs have few out-routes and
+    each triangle is found once, from its lowest ranked corner.
+
+    Args:
+        network: A NetworkX DiGraph object.
+
+    Returns:
+        clustering: A dictionary of clustering coefficients keyed by node.
+    """
+
+    nodes = network.nodes()
+    index = dict((node, i) for i, node in enumerate(nodes))
+    edges = network.edges()
+    sources = np.array([index[i] for i, j in edges], dtype=np.int64)
+    targets = np.array([index[j] for i, j in edges], dtype=np.int64)
+
+    # The simple undirected graph: both directions, no self-loops.
+    loops = sources == targets
+    sources, targets = sources[~loops], targets[~loops]
+    n = len(nodes)
+    undirected = sparse.csr_matrix(
+        (np.ones(2 * len(sources), dtype=np.int64),
+         (np.concatenate([sources, targets]),
+          np.concatenate([targets, sources]))), shape=(n, n))
+    undirected.data[:] = 1
+    degree = np.diff(undirected.indptr)
+
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degree))] = np.arange(n)
+    routes = undirected.tocoo()
+    upward = rank[routes.row] < rank[routes.col]
+    oriented = sparse.csr_matrix(
+        (np.ones(upward.sum(), dtype=np.int64),
+         (routes.row[upward], routes.col[upward])), shape=(n, n))
+
+    # A triangle u < v < w closes the path u-v-w at (u, w), and the pair of
+    # routes u-v and u-w at (v, w).
+    closing = (oriented @ oriented).multiply(oriented)
+    middle = (oriented.T @ oriented).multiply(oriented)
+    triangles = np.asarray(closing.sum(axis=1)).ravel() + \
+                np.asarray(closing.sum(axis=0)).ravel() + \
+                np.asarray(middle.sum(axis=1)).ravel()
+
+    coefficients = np.zeros(n)
+    closed = triangles > 0
+    coefficients[closed] = (2 * triangles[closed]) / \
+                           (degree[closed] * (degree[closed] - 1))
+
+    return dict(zip(nodes, coefficients.tolist()))
+
+def load_airports(nodes):
+    """
+    Stream an OpenFlights airport database into columns. Quoted fields may
+    contain commas, e.g. airport names like "Angaha, Niuafo'ou Island".
+
+    Args:
+        nodes: The file path to the nodes .csv file.
+
+    Returns:
+        airports: A dictionary of columns: "id" as an integer array, and the
+                  "name", "country", "lat" and "lon" string lists.
+    """
+
+    ids, names, countries, lats, lons = list(), list(), list(), list(), list()
+    with open(nodes, 'r', encoding='utf-8', newline='') as f:
+        for entries in csv.reader(f):
+            ids.append(int(entries[0]))
+            names.append(entries[1])
+            countries.append(entries[3])
+            lats.append(entries[6])
+            lons.append(entries[7])
+
+    return {"id": np.array(ids, dtype=np.int64),
+            "name": names,
+            "country": countries,
+            "lat": lats,
+            "lon": lons}
+
+def load_routes(edges):
+    """
+    Stream an OpenFlights route database into columns, keeping the first
+    route between every pair of airports. The first line is treated as a
+    header, and lines without both airport IDs are counted as errors.
+
+    Args:
+        edges: The file path to the edges .csv file.
+
+    Returns:
+        routes: A dictionary of the unique routes in file order, with the
+                "source" and "target" integer arrays, the "IATAFrom" and
+                "IATATo" string lists, and the number of "duplicates" and
+                "errors" skipped.
+    """
+
+    sources = array.array("q")
+    targets = array.array("q")
+    iata_from, iata_to = list(), list()
+    error_count = 0
+    with open(edges, 'r', encoding="utf-8", newline='') as f:
+        for line_num, entries in enumerate(csv.reader(f), 1):
+            try:
+                from_vertex = int(entries[3])
+                to_vertex = int(entries[5])
+            except (ValueError, IndexError):
+                # The value doesn't exist
+                error_count += 1
+                continue
+
+            if line_num > 1:
+                sources.append(from_vertex)
+                targets.append(to_vertex)
+                iata_from.append(entries[2])
+                iata_to.append(entries[4])
+
+    sources = np.frombuffer(sources, dtype=np.int64)
+    targets = np.frombuffer(targets, dtype=np.int64)
+
+    # Keep the first occurrence of every route, in file order.
+    if len(sources):
+        pairs = np.stack([sources, targets], axis=1)
+        unique = np.sort(np.unique(pairs, axis=0, return_index=True)[1])
+    else:
+        unique = np.zeros(0, dtype=np.int64)
+
+    return {"source": sources[unique],
+            "target": targets[unique],
+            "IATAFrom": [iata_from[i] for i in unique],
+            "IATATo": [iata_to[i] for i in unique],
+            "duplicates": len(sources) - len(unique),
+            "errors": error_count}
+
+def synthetic_databases(size, spokes=2, exponent=3.0, countries=None,
+                        domestic=0.5, one_way=0.0, seed=0):
+    """
+    Generate a scale-free, hub-and-spoke network of airports in the columns
+    of load_airports() and load_routes(). Every new airport opens routes to
+    spokes existing airports, chosen with probability proportional to their
+    number of routes plus a constant that sets the exponent of the degree
+    distribution, so a few hubs collect most routes. Airports belong to
+    countries scattered over the globe, and are placed around the center of
+    theirs.
+
+    Args:
+        size: The number of airports.
+        spokes: The number of airports every new airport connects to.
+        exponent: The exponent of the degree distribution, above 2. 3 is
+                  pure preferential attachment; lower values grow larger
+                  hubs, and higher values a more uniform network.
+        countries: The number of countries (default: one per 50 airports).
+        domestic: The share of routes that connect to an airport of the same
+                  country, when it has one.
+        one_way: The share of routes only flown from the new airport, instead
+                 of in both directions.
+        seed: The random seed.
+
+    Returns:
+        airports: The columns load_airports() reads from a database.
+        routes: The columns load_routes() reads from a database.
+    """
+
+    if exponent <= 2:
+        raise ValueError("The degree exponent must be above 2.")
+    rng = random.Random(seed)
+    countries = countries or max(1, size // 50)
+    # P(k) ~ k^-exponent when airports attach in proportion to k + offset.
+    offset = (exponent - 3.0) * spokes
+
+    # Scatter the country centers uniformly over the inhabited latitudes.
+    low, high = math.sin(math.radians(-60)), math.sin(math.radians(70))
+    centers = [(math.degrees(math.asin(rng.uniform(low, high))),
+                rng.uniform(-180, 180)) for country in range(countries)]
+
+    country = array.array("l", (rng.randrange(countries)
+                                for airport in range(size)))
+    degree = array.array("l", bytes(size * array.array("l").itemsize))
+    # Every route end once, so that uniform picks attach preferentially.
+    endpoints = array.array("l")
+    local = [array.array("l") for c in range(countries)]
+    members = [array.array("l") for c in range(countries)]
+    sources, targets = array.array("q"), array.array("q")
+
+    def connect(i, j):
+        sources.append(i)
+        targets.append(j)
+        for airport in (i, j):
+            degree[airport] += 1
+            endpoints.append(airport)
+            local[country[airport]].append(airport)
+
+    def attach(pool, airports):
+        # Mix in uniform picks for a positive offset, and reject picks of
+        # poorly connected airports for a negative one.
+        while True:
+            if offset > 0 and rng.random() * (len(pool) + offset *
+                                              len(airports)) >= len(pool):
+                return airports[rng.randrange(len(airports))]
+            hub = pool[rng.randrange(len(pool))]
+            if offset >= 0 or \
+               rng.random() * degree[hub] < degree[hub] + offset:
+                return hub
+
+    # Start from a complete core of spokes + 1 airports.
+    for airport in range(min(size, spokes + 1)):
+        for hub in range(airport):
+            connect(airport, hub)
+        members[country[airport]].append(airport)
+
+    for airport in range(spokes + 1, size):
+        home = country[airport]
+        chosen = set()
+        while len(chosen) < spokes:
+            if len(members[home]) >= spokes and rng.random() < domestic:
+                chosen.add(attach(local[home], members[home]))
+            else:
+                chosen.add(attach(endpoints, range(airport)))
+        for hub in sorted(chosen):
+            connect(airport, hub)
+        members[home].append(airport)
+
+    # Fly most routes in both directions.
+    source = np.frombuffer(sources, dtype=np.int64)
+    target = np.frombuffer(targets, dtype=np.int64)
+    both = np.array([rng.random() >= one_way for route in range(len(source))],
+                    dtype=bool)
+    pairs = np.empty((len(source) + both.sum(), 2), dtype=np.int64)
+    pairs[:len(source), 0], pairs[:len(source), 1] = source, target
+    pairs[len(source):, 0], pairs[len(source):, 1] = target[both], source[both]
+
+    codes = [airport_code(airport) for airport in range(size)]
+    lats, lons = list(), list()
+    for airport in range(size):
+        lat, lon = centers[country[airport]]
+        lats.append("{0:.6f}".format(max(-90.0, min(90.0, rng.gauss(lat, 3)))))
+        lons.append("{0:.6f}".format((rng.gauss(lon, 3) + 180) % 360 - 180))
+
+    airports = {"id": np.arange(1, size + 1, dtype=np.int64),
+                "name": ["Airport {0}".format(code) for code in codes],
+                "country": ["Country {0}".format(c) for c in country],
+                "lat": lats,
+                "lon": lons}
+    routes = {"source": pairs[:, 0] + 1,
+              "target": pairs[:, 1] + 1,
+              "IATAFrom": [codes[i] for i in pairs[:, 0].tolist()],
+              "IATATo": [codes[j] for j in pairs[:, 1].tolist()],
+              "duplicates": 0,
+              "errors": 0}
+
+    return airports, routes
+
+def airport_code(airport):
+    """
+    A unique code of letters for an airport index: A-Z, AA-ZZ, AAA, ...
+    """
+
+    letters = ""
+    airport += 1
+    while airport:
+        airport, letter = divmod(airport - 1, 26)
+        letters = chr(ord("A") + letter) + letters
+
+    return letters
+
+def write_databases(airports, routes, nodes, edges):
+    """
+    Write airport and route columns as OpenFlights databases, which
+    create_network() reads back into the same network.
+
+    Args:
+        airports: Columns in the format of load_airports().
+        routes: Columns in the format of load_routes().
+        nodes: The file path of the airport database to write.
+        edges: The file path of the route database to write.
+
+    Returns:
+        Void
+    """
+
+    with open(nodes, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for airport, name, country, lat, lon in zip(
+                airports["id"].tolist(), airports["name"],
+                airports["country"], airports["lat"], airports["lon"]):
+            writer.writerow([airport, name, "", country, "", "", lat, lon])
+
+    with open(edges, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["airline", "id", "from", "from_id", "to", "to_id",
+                         "codeshare", "stops", "equipment"])
+        for i, j, iata_from, iata_to in zip(
+                routes["source"].tolist(), routes["target"].tolist(),
+                routes["IATAFrom"], routes["IATATo"]):
+            writer.writerow(["XX", 0, iata_from, i, iata_to, j, "", 0, ""])
+
+def airport_label(network, node):
+    """
+    The name and number of flights of an airport, for progress output.
+
+    Args:
+        network: A NetworkX DiGraph object or a CompactNetwork.
+        node: The airport ID.
+
+    Returns:
+        name: The name of the airport.
+        degree: The number of flights from and to the airport.
+    """
+
+    if isinstance(network, CompactNetwork):
+        i = network.index[node]
+        return str(network.name[i]), int(network.degrees()[i])
+
+    return network.node[node]["name"], \
+           network.in_degree(node) + network.out_degree(node)
+
+def share_network(network, directory):
+    """
+    Publish a network for worker processes as uncompressed .npy files, one
+    per CompactNetwork column plus the CSR "indptr" and "indices" of the
+    array engines. Workers memory-map the files with attach_network(), so
+    every process reads the same pages instead of a pickled copy of the
+    DiGraph. Workers of the NetworkX engine, and of edge_betweenness(),
+    still build a DiGraph of their own from the mapped columns, as they
+    need one to run on; they are spared the pickling, but not its memory.
+
+    Args:
+        network: A NetworkX DiGraph object from create_network().
+        directory: An empty directory that outlives the workers.
+
+    Returns:
+        Void
+    """
+
+    compact = CompactNetwork.from_networkx(network)
+    columns = dict((column, getattr(compact, column)) for column in
+                   CompactNetwork.NODE_COLUMNS + CompactNetwork.EDGE_COLUMNS)
+    columns["indptr"] = compact.indptr
+    columns["indices"] = compact.target.astype(np.int64)
+    for column, values in columns.items():
+        np.save(os.path.join(directory, column + ".npy"), values)
+
+def share_ranking(directory, strategy, cancellist, arrays=None):
+    """
+    Publish a strategy's ranking next to a shared network: the ranked edges
+    as airport ID pairs and, for the array engines, their CSR positions.
+
+    Args:
+        directory: The directory of share_network().
+        strategy: The name of the cancellation strategy.
+        cancellist: The strategy's ranked list of edges to cancel.
+        arrays: The network_arrays() of the network, or None when the
+                workers run the NetworkX engine.
+
+    Returns:
+        Void
+    """
+
+    prefix = os.path.join(directory, strategy)
+    write_ranking(prefix + "-ranking.npy", cancellist)
+    if arrays is not None:
+        np.save(prefix + "-ranked.npy", edge_positions(arrays, cancellist))
+
+def attach_network(shared, engine):
+    """
+    Map a network and ranking published with share_network() and
+    share_ranking() read-only into a worker process. The array engines run
+    on the mapped arrays themselves, while the NetworkX engine, which
+    changes its own copy of the network, gets a DiGraph built from them.
+
+    Args:
+        shared: A (directory, strategy) tuple. A strategy of None attaches
+                the network alone.
+        engine: The infection engine of the worker.
+
+    Returns:
+        state: The "network", "arrays", "cancellist" and "ranked" entries of
+               the worker state.
+    """
+
+    directory, strategy = shared
+    columns = attach_arrays(directory, CompactNetwork.NODE_COLUMNS +
+                            CompactNetwork.EDGE_COLUMNS +
+                            ("indptr", "indices"))
+    indices = columns.pop("indices")
+
+    network = CompactNetwork(**columns)
+    arrays = {"nodes": network.nodes(), "index": network.index,
+              "indptr": network.indptr, "indices": indices,
+              "weight": network.weight}
+    state = {"network": network, "arrays": arrays, "ranked": None,
+             "cancellist": None}
+
+    if engine not in ARRAY_ENGINES:
+        state["network"] = network.to_networkx()
+    if strategy is None:
+        return state
+
+    prefix = os.path.join(directory, strategy)
+    if engine in ARRAY_ENGINES:
+        state["cancellist"] = np.load(prefix + "-ranking.npy", mmap_mode="r")
+        state["ranked"] = np.load(prefix + "-ranked.npy", mmap_mode="r")
+    else:
+        state["cancellist"] = read_ranking(prefix + "-ranking.npy")
+
+    return state
+
+def attach_arrays(directory, names):
+    """
+    Map .npy files published for worker processes read-only.
+
+    Args:
+        directory: The directory of the files.
+        names: The names of the files, without the .npy extension.
+
+    Returns:
+        arrays: A dictionary of memory-mapped arrays by name.
+    """
+
+    return dict((name, np.load(os.path.join(directory, name + ".npy"),
+                               mmap_mode="r")) for name in names)
+
+def worker_settings(settings):
+    """
+    The settings to hand to a pool of workers: without the network, arrays
+    and ranking when the workers attach them from shared files.
+    """
+
+    if not settings.get("SHARED"):
+        return settings
+
+    return dict((key, value) for key, value in settings.items()
+                if key not in ("network", "arrays", "cancellist"))
+
+def network_cache_path(nodes, edges, directory):
+    """
+    Find the cache location of the network built from the given databases.
+    The location is keyed by the contents of both databases and the version
+    of the network construction code.
+
+    Args:
+        nodes: The file path to the nodes .csv file.
+        edges: The file path to the edges .csv file.
+        directory: The directory holding the cached networks.
+
+    Returns:
+        path: The path prefix of the cache files for these databases.
+    """
+
+    digest = hashlib.sha256()
+    digest.update("{0}/{1}".format(CACHE_VERSION, nx.__version__).encode())
+    for file_name in (nodes, edges):
+        with open(file_name, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+    return os.path.join(os.path.abspath(directory), digest.hexdigest()[:32])
+
+def cached_network(nodes, edges, path, rebuild=False):
+    """
+    Load the network from the cache, creating and caching it when it is
+    missing or a rebuild is requested.
+
+    Args:
+        nodes: The file path to the nodes .csv file.
+        edges: The file path to the edges .csv file.
+        path: The cache path prefix from network_cache_path().
+        rebuild: Ignore any cached network.
+
+    Returns:
+        G: The NetworkX DiGraph object create_network() would return.
+    """
+
+    if not rebuild and os.path.exists(path + "-network.npz"):
+        print("Loading cached network.")
+        return load_network(path + "-network.npz")
+
+    G = create_network(nodes, edges)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    save_network(G, path + "-network.npz")
+
+    return G
+
+def save_network(G, file_name):
+    """
+    Store a network built by create_network() as a CompactNetwork. Nodes and
+    edges are stored in iteration order so the loaded network iterates, and
+    therefore ranks and samples its edges, exactly like the original.
+
+    Args:
+        G: A NetworkX DiGraph object from create_network().
+        file_name: The path of the .npz file to write.
+
+    Returns:
+        Void
+    """
+
+    CompactNetwork.from_networkx(G).save(file_name)
+
+def load_network(file_name):
+    """
+    Rebuild a network stored with save_network().
+
+    Args:
+        file_name: The path of the .npz file to read.
+
+    Returns:
+        G: A NetworkX DiGraph object.
+    """
+
+    return CompactNetwork.load(file_name).to_networkx()
+
+class CompactNetwork(object):
+    """
+    A network of airports numbered 0 to n-1 in the G.nodes() order of the
+    NetworkX network it was built from, the network order the engines visit
+    airports in, with every attribute in a typed array instead of a NetworkX
+    attribute dictionary. The original airport IDs are kept in ids. Node
+    states are the integer state codes, ages count days like the "age" of
+    the NetworkX engine, and edges are kept in parallel arrays grouped by
+    source, so that the out-edges of node n are at positions indptr[n] to
+    indptr[n+1].
+    """
+
+    NODE_COLUMNS = ("ids", "name", "country", "countries", "lat", "lon",
+                    "state", "age")
+    EDGE_COLUMNS = ("source", "target", "weight", "cluster",
+                    "international", "IATAFrom", "IATATo")
+
+    def __init__(self, indptr=None, **columns):
+        for column in self.NODE_COLUMNS + self.EDGE_COLUMNS:
+            setattr(self, column, columns[column])
+        self.index = dict((node, i) for i, node in
+                          enumerate(self.ids.tolist()))
+        self.indptr = indptr
+        if indptr is None:
+            self.indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.source, minlength=len(self.ids)),
+                      out=self.indptr[1:])
+        self._degrees = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_networkx(cls, G):
+        """
+        Compact a NetworkX DiGraph from create_network(), keeping the order
+        of its nodes and edges. The "status" and "age" of a network the
+        NetworkX engine has run on become states and ages.
+
+        Args:
+            G: A NetworkX DiGraph object.
+
+        Returns:
+            network: A CompactNetwork object.
+        """
+
+        nodes = G.nodes(data=True)
+        index = dict((node, i) for i, (node, data) in enumerate(nodes))
+        countries = sorted(set(data["country"] for node, data in nodes))
+        country_codes = dict((country, i) for i, country in
+                             enumerate(countries))
+        # Grouping the edges by source, in node order, keeps them in the
+        # order of the successor lists the engines iterate.
+        edges = [(i, j, G[i][j]) for i in G.nodes() for j in G.successors(i)]
+
+        return cls(
+            ids=np.array([node for node, data in nodes], dtype=np.int64),
+            name=np.array([data["name"] for node, data in nodes]),
+            country=np.array([country_codes[data["country"]]
+                              for node, data in nodes], dtype=np.int32),
+            countries=np.array(countries),
+            # The coordinates stay the database strings, as create_network()
+            # labels them, rather than rounding through a float.
+            lat=np.array([data["lat"] for node, data in nodes]),
+            lon=np.array([data["lon"] for node, data in nodes]),
+            state=np.array([STATE_CODES[data.get("status", "s")]
+                            for node, data in nodes], dtype=np.int8),
+            # Ages never pass MAX_STEPS, so they fit in a byte.
+            age=np.array([data.get("age", 0) for node, data in nodes],
+                         dtype=np.int8),
+            source=np.array([index[i] for i, j, data in edges],
+                            dtype=np.int32),
+            target=np.array([index[j] for i, j, data in edges],
+                            dtype=np.int32),
+            weight=np.array([data["weight"] for i, j, data in edges],
+                            dtype=np.float64),
+            cluster=np.array([data["cluster"] for i, j, data in edges],
+                             dtype=np.float64),
+            international=np.array([data["international"]
+                                    for i, j, data in edges], dtype=bool),
+            IATAFrom=np.array([data["IATAFrom"] for i, j, data in edges]),
+            IATATo=np.array([data["IATATo"] for i, j, data in edges]))
+
+    def to_networkx(self, states=False):
+        """
+        Expand the network into a NetworkX DiGraph, labeled with the original
+        airport IDs, for the analysis code.
+
+        Args:
+            states: Also label every node with the "status", "color" and
+                    "age" of the NetworkX engine.
+
+        Returns:
+            G: A NetworkX DiGraph object.
+        """
+
+        ids = self.ids.tolist()
+        countries = self.countries[self.country].tolist()
+        G = nx.DiGraph()
+        G.add_nodes_from((node, {"country": country, "name": name,
+                                 "lat": lat, "lon": lon})
+                         for node, country, name, lat, lon in
+                         zip(ids, countries, self.name.tolist(),
+                             self.lat.tolist(), self.lon.tolist()))
+        if states:
+            statuses = "seir"
+            for node, state, age in zip(ids, self.state.tolist(),
+                                        self.age.tolist()):
+                G.node[node].update({"status": statuses[state],
+                                     "color": STATE_COLORS[state],
+                                     "age": age})
+        G.add_edges_from((ids[i], ids[j],
+                          {"IATAFrom": iata_from, "IATATo": iata_to,
+                           "weight": weight, "cluster": cluster,
+                           "international": international})
+                         for i, j, iata_from, iata_to, weight, cluster,
+                             international in
+                         zip(self.source.tolist(), self.target.tolist(),
+                             self.IATAFrom.tolist(), self.IATATo.tolist(),
+                             self.weight.tolist(), self.cluster.tolist(),
+                             self.international.tolist()))
+
+        return G
+
+    def arrays(self):
+        """
+        The network_arrays() of the network, without building a DiGraph.
+        """
+
+        return {"nodes": self.ids.tolist(),
+                "index": self.index,
+                "indptr": self.indptr,
+                "indices": self.target.astype(np.int64),
+                "weight": self.weight}
+
+    def nodes(self):
+        """
+        The airport IDs, in order.
+        """
+
+        return self.ids.tolist()
+
+    def degrees(self):
+        """
+        The number of flights from and to every airport, in order. Counted
+        once, as the edges never change.
+        """
+
+        if self._degrees is None:
+            self._degrees = np.diff(self.indptr) + np.bincount(
+                self.target, minlength=len(self.ids))
+        return self._degrees
+
+    def successors(self, node):
+        """
+        The contiguous indices of the successors of the node at index node.
+        """
+
+        return self.target[self.indptr[node]:self.indptr[node + 1]]
+
+    def reset(self):
+        """
+        Make every airport susceptible again.
+        """
+
+        self.state[:] = SUSCEPTIBLE
+        self.age[:] = 0
+
+    def copy(self):
+        """
+        A copy of the network whose states and edge attributes can change
+        independently.
+        """
+
+        return CompactNetwork(**dict((column, getattr(self, column).copy())
+                                     for column in self.NODE_COLUMNS +
+                                                   self.EDGE_COLUMNS))
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes held by the attribute arrays.
+        """
+
+        return sum(getattr(self, column).nbytes for column in
+                   self.NODE_COLUMNS + self.EDGE_COLUMNS) + self.indptr.nbytes
+
+    def save(self, file_name):
+        """
+        Store the network in a compressed .npz file. The file is written to
+        a temporary name first, so an interrupted run never leaves a
+        truncated file behind.
+
+        Args:
+            file_name: The path of the .npz file to write.
+
+        Returns:
+            Void
+        """
+
+        temporary = file_name + ".tmp.npz"
+        np.savez_compressed(temporary, **dict(
+            (column, getattr(self, column)) for column in
+            self.NODE_COLUMNS + self.EDGE_COLUMNS))
+        os.replace(temporary, file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        Read a network stored with save().
+
+        Args:
+            file_name: The path of the .npz file to read.
+
+        Returns:
+            network: A CompactNetwork object.
+        """
+
+        with np.load(file_name) as data:
+            return cls(**dict((key, data[key]) for key in data.files))
+
+def edge_metrics(network):
+    """
+    Collect the metrics the edge strategies rank by, as arrays in
+    network.edges() order.
+
+    Args:
+        network: A NetworkX DiGraph object from create_network().
+
+    Returns:
+        metrics: A dictionary of the "cluster" sum and "weight" of every
+                 edge, the "degree" product of its airports, and whether it
+                 is "international".
+    """
+
+    edges = network.edges(data=True)
+    degree = network.degree()
+
+    return {"cluster": np.array([data["cluster"] for i, j, data in edges]),
+            "weight": np.array([data["weight"] for i, j, data in edges]),
+            "degree": np.array([degree[i] * degree[j] for i, j, data in edges],
+                               dtype=np.float64),
+            "international": np.array([data["international"]
+                                       for i, j, data in edges], dtype=bool)}
+
+def rank_edges(values, pool=None, low=None, high=None):
+    """
+    Rank edges by a metric, highest first. Ties keep the edge order, like
+    sorted(..., reverse=True) does.
+
+    Args:
+        values: The metric of every edge, in network.edges() order.
+        pool: A boolean mask of the edges that may be cancelled, or None.
+        low, high: Only rank edges whose value lies strictly between them.
+
+    Returns:
+        ranking: An integer array of edge indices into network.edges().
+    """
+
+    keep = np.ones(len(values), dtype=bool) if pool is None else pool.copy()
+    if low is not None:
+        keep &= values > low
+    if high is not None:
+        keep &= values < high
+    candidates = np.flatnonzero(keep)
+
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+def cached_ranking(path, name, rank, rebuild=False):
+    """
+    Rank edges with rank(), reusing the ranking stored next to the cached
+    network when there is one.
+
+    Args:
+        path: The cache path prefix from network_cache_path(), or None.
+        name: The name of the strategy, its parameters and edge filter.
+        rank: A function returning a rank_edges() ranking.
+        rebuild: Ignore any cached ranking.
+
+    Returns:
+        ranking: An integer array of edge indices into network.edges().
+    """
+
+    file_name = "{0}-ranking-{1}.npy".format(path, name)
+    if path is not None and not rebuild and os.path.exists(file_name):
+        return np.load(file_name)
+
+    ranking = rank()
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = file_name[:-len(".npy")] + ".tmp.npy"
+        np.save(temporary, ranking)
+        os.replace(temporary, file_name)
+
+    return ranking
+
+def cached_betweenness(network, path, rebuild=False, pivots=None, jobs=0,
+                       seed=None, shared=None):
+    """
+    Calculate the weighted edge betweenness of the network, reusing the value
+    stored next to the cached network when there is one.
+
+    Args:
+        network: The NetworkX DiGraph object of the cached network.
+        path: The cache path prefix from network_cache_path(), or None.
+        rebuild: Ignore any cached betweenness.
+        pivots, jobs, seed, shared: See edge_betweenness().
+
+    Returns:
+        betweennesses: A dictionary of edge betweenness keyed by edge.
+    """
+
+    if pivots is None:
+        file_name = "{0}-betweenness.npz".format(path)
+    else:
+        file_name = "{0}-betweenness-{1}-{2}.npz".format(path, pivots, seed)
+
+    if path is not None and not rebuild and os.path.exists(file_name):
+        with np.load(file_name) as data:
+            values = data["betweenness"].tolist()
+        return dict(zip(network.edges(), values))
+
+    betweennesses, agreement = edge_betweenness(network, pivots, jobs, seed,
+                                                shared)
+    if agreement is not None:
+        print("\tBetweenness from {0} pivots, top 5% agreement of both "
+              "halves {1:.0%}".format(pivots, agreement))
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = file_name[:-len(".npz")] + ".tmp.npz"
+        np.savez_compressed(temporary, betweenness=np.array(
+            [betweennesses[edge] for edge in network.edges()]))
+        os.replace(temporary, file_name)
+
+    return betweennesses
+
+def edge_betweenness(network, pivots=None, jobs=0, seed=None, shared=None,
+                     removed=None):
+    """
+    Calculate the normalized, weighted edge betweenness of a network. The
+    shortest path accumulations of the source airports are split between
+    worker processes, and can be restricted to a uniform sample of pivot
+    sources to approximate the betweenness.
+
+    The betweenness of most edges is orders of magnitude below the range a
+    single source can contribute, so bounds on the values themselves say
+    little. Only the top of the ranking is ever cancelled, so the pivots
+    are split into two halves instead, and the agreement of their top 5%
+    edges is reported. The full sample agrees at least as well with the
+    exact ranking, as each half has half its pivots.
+
+    Args:
+        network: A weighted NetworkX DiGraph object.
+        pivots: The number of sampled sources, or None for all sources.
+        jobs: The number of worker processes, or 0 for none.
+        seed: The seed of the pivot sample.
+        shared: The directory of a share_network() of the network the
+                workers attach instead of a pickled copy, or None.
+        removed: The edges removed from the shared network, and reweighted
+                 with update_weights(), to arrive at network.
+
+    Returns:
+        betweennesses: A dictionary of edge betweenness keyed by edge, in
+                       network.edges() order.
+        agreement: The top 5% overlap of the rankings of both halves of the
+                   pivots, between 0 and 1, or None if exact.
+    """
+
+    nodes = network.nodes()
+    if pivots is None or pivots >= len(nodes):
+        halves = [nodes]
+    else:
+        sources = random.Random(seed).sample(nodes, pivots)
+        halves = [sources[0::2], sources[1::2]]
+
+    if jobs > 1:
+        chunks = [half[i::jobs] for half in halves for i in range(jobs)]
+        if shared is not None:
+            settings = {"SHARED": (shared, None), "ENGINE": "networkx",
+                        "REMOVED": removed}
+        else:
+            settings = {"network": network}
+        pool = multiprocessing.Pool(jobs, initializer=init_betweenness,
+                                    initargs=(settings,))
+        chunk_sums = pool.map(betweenness_task, chunks)
+        pool.close()
+        pool.join()
+        partials = [chunk_sums[i:i + jobs]
+                    for i in range(0, len(chunk_sums), jobs)]
+    else:
+        partials = [[betweenness_sums(network, half)] for half in halves]
+
+    # Normalize as nx.edge_betweenness_centrality(), scaled up to every
+    # source when sampling.
+    n = len(nodes)
+    edges = network.edges()
+    scale = 1.0 / (sum(len(half) for half in halves) * (n - 1)) if n > 1 \
+            else 0
+    sums = np.array([[sum(chunk[edge] for chunk in half) for edge in edges]
+                     for half in partials]).reshape(len(halves), len(edges))
+    betweennesses = dict(zip(edges, (scale * sums.sum(axis=0)).tolist()))
+
+    agreement = None
+    if len(halves) > 1 and all(halves):
+        k = max(1, int(len(edges) * 0.05))
+        tops = [set(rank_edges(values)[:k].tolist()) for values in sums]
+        agreement = len(tops[0] & tops[1]) / k
+
+    return betweennesses, agreement
+
+def adaptive_betweenness(network, efforts, pool=None, pivots=None, jobs=0,
+                         seed=None, shared=None):
+    """
+    Rank edges by weighted edge betweenness, recomputed as they are
+    cancelled. Each batch of the ranking holds the edges an effort level
+    cancels beyond the previous level: the most central edges of the network
+    left after cancelling, and reweighting, every earlier batch. Each batch
+    samples its own pivot sources from a budget shared by all batches, so
+    the whole ranking costs about as much as one static ranking from that
+    many pivots.
+
+    Args:
+        network: A weighted NetworkX DiGraph object from create_network().
+        efforts: The effort levels of the sweep, in increasing order.
+        pool: A boolean mask of the edges that may be cancelled, or None.
+        pivots: The pivot budget of all batches together. Defaults to one
+                pass over every airport.
+        jobs: The number of worker processes, or 0 for none.
+        seed: The seed of the pivot samples.
+        shared: The directory of a share_network() of network, which the
+                workers of each batch attach and cancel the earlier batches
+                from, or None.
+
+    Returns:
+        ranking: An integer array of edge indices into network.edges().
+    """
+
+    edges = network.edges()
+    position = dict((edge, k) for k, edge in enumerate(edges))
+    remaining = np.ones(len(edges), dtype=bool) if pool is None else \
+                pool.copy()
+
+    # Batch boundaries are the prefix lengths effort_cancellations() takes.
+    sizes = sorted(set(int(remaining.sum() * (effort/100)) - 1
+                       for effort in efforts if effort > 0))
+    sizes = [size for size in sizes if size > 0]
+    budget = pivots or len(network)
+    batch_pivots = max(1, budget // max(1, len(sizes)))
+
+    G = network.copy()
+    ranking = list()
+    values = np.zeros(len(edges))
+    for batch, size in enumerate(sizes):
+        betweennesses, agreement = edge_betweenness(
+            G, batch_pivots, jobs, seed=task_seed(seed, batch),
+            shared=shared, removed=[edges[k] for k in ranking])
+        values[:] = 0
+        for edge, value in betweennesses.items():
+            values[position[edge]] = value
+
+        chosen = rank_edges(values, remaining)[:size - len(ranking)]
+        ranking.extend(chosen.tolist())
+        remaining[chosen] = False
+
+        cancelled = [edges[k] for k in chosen.tolist()]
+        G.remove_edges_from(cancelled)
+        update_weights(G, cancelled)
+        log("\tBatch {0}: {1} edges from {2} pivots".format(
+            batch, len(ranking), batch_pivots))
+
+    # Edges no effort level reaches keep the order of the last batch.
+    ranking.extend(rank_edges(values, remaining).tolist())
+
+    return np.array(ranking, dtype=np.int64)
+
+def init_betweenness(settings):
+    """
+    Attach the network of an edge_betweenness() pool in a worker process,
+    and remove the edges the pool's network no longer has.
+    """
+
+    init_worker(settings)
+    removed = settings.get("REMOVED")
+    if removed:
+        network = WORKER_STATE["network"]
+        network.remove_edges_from(removed)
+        update_weights(network, removed)
+
+def betweenness_task(sources):
+    """
+    Sum the edge dependencies of a chunk of sources in a worker process.
+    """
+
+    return betweenness_sums(WORKER_STATE["network"], sources)
+
+def betweenness_sums(network, sources):
+    """
+    Sum the unnormalized, weighted edge dependencies of the given sources on
+    every edge of the network.
+
+    Args:
+        network: A weighted NetworkX DiGraph object.
+        sources: A list of source nodes.
+
+    Returns:
+        sums: A dictionary of dependency sums keyed by edge.
+    """
+
+    return nx.edge_betweenness_centrality_subset(network, sources,
+                                                 network.nodes(),
+                                                 normalized=False,
+                                                 weight="weight")
+
+def calculate_weights(input_network):
+    """
+    Add weights to the edges of a network based on the degrees of the connecting
+    verticies, and return the network.
+
+    Args:
+        input_network: A NetworkX graph object
+    Returns:
+        G: A weighted NetworkX graph object.
+    """
+    
+    start = time.perf_counter()
+    G = input_network.copy()
+
+    # Add weights to edges
+    for node in G.nodes():
+        node_weights(G, node)
+    add_time("calculate_weights", start)
+    count(weighted_nodes=len(G))
+
+    return G
+
+def update_weights(G, removed):
+    """
+    Recalculate, in place, the edge weights affected by removing edges from a
+    network weighted with calculate_weights(). Only the out-edges of nodes
+    that lost a successor, or whose successors lost out-degree, are changed,
+    and the result is identical to recalculating every weight.
+
+    Args:
+        G: A weighted NetworkX graph object the edges were removed from.
+        removed: A list of the removed (u, v) or (u, v, data) edges.
+
+    Returns:
+        G: The same NetworkX graph object.
+    """
+
+    # Nodes that lost a flight changed both their successors and out-degree,
+    # so their own weights and those of every predecessor are stale.
+    start = time.perf_counter()
+    sources = set(edge[0] for edge in removed if G.has_node(edge[0]))
+    stale = set(sources)
+    for source in sources:
+        stale.update(G.predecessors(source))
+
+    for node in stale:
+        node_weights(G, node)
+    add_time("update_weights", start)
+    count(weighted_nodes=len(stale))
+
+    return G
+
+def node_weights(G, node):
+    """
+    Weight the out-edges of a node by the out-degree of each successor,
+    relative to the other successors of the node.
+
+    Args:
+        G: A NetworkX graph object.
+        node: The node whose out-edges are weighted.
+
+    Returns:
+        Void
+    """
+
+    successors = G.successors(node)
+    weights = dict()
+
+    # Calculate the total out degree of all succs
+    total_degree = 0
+    for successor in successors:
+
+        try:
+            total_degree += G.out_degree(successor)
+        except TypeError:
+            # Don't add anything
+            pass
+
+    # Find the weight for all possible successors
+    for successor in successors:
+        successor_degree = G.out_degree(successor)
+
+        try:
+            int(successor_degree)
+        except TypeError:
+            successor_degree = 0
+
+        if total_degree > 0:
+            probability_of_infection = successor_degree / \
+                                       total_degree
+        else:
+            probability_of_infection = 0
+
+        weights[successor] = probability_of_infection
+    
+    largest_weight = 0
+    smallest_weight = 2
+    for successor, weight in weights.items():
+        if weight > largest_weight:
+            largest_weight = weight
+        elif weight < smallest_weight:
+            smallest_weight = weight
+    #(strat.shared_fitness - lowest_fitness) / \
+    #                       (highest_fitness - lowest_fitness)
+
+    for successor in successors:
+        if largest_weight != smallest_weight:
+            relative_weight = (weights[successor] - smallest_weight) /\
+                              (largest_weight - smallest_weight)
+        else:
+            relative_weight = 0
+        G[node][successor]['weight'] = relative_weight
+
+def infection(input_network, vaccination, starts,DELAY=0, vis = False, 
+              file_name = "sir.csv", title="",  RECALCULATE = True,
+              record=None, snapshots=None, forks=None, fork=None):
+    """
+    Simulate an infection within network, generated using seed, and with the
+    givin vaccination strategy. This function will write data from each timestep
+    to file_name once the simulation has ended.
+
+    Args:
+        network: A NetworkX DiGraph object.
+        vaccination: A list of node indices to label as recovered from the 
+                     begining.
+        file_name: The .csv file of the S/E/I/R counts, or None to skip it.
+        record: An optional (MAX_STEPS, 4) array that receives the S/E/I/R
+                counts of every step, repeating the last counts once the
+                infection has ended.
+        snapshots: An optional (MAX_STEPS, nodes) array that receives the
+                   state code of every node, in network.nodes() order, at
+                   every step, repeating the last states likewise.
+        forks: An optional dictionary keyed by steps. The fork_state() at
+               the start of each of these steps, before any cancellation,
+               is stored under it, and the simulation stops once it has
+               taken the last one. Steps never reached keep None.
+        fork: A fork_state() of this simulation to continue from, instead
+              of starting from the target airports.
+
+    Returns:
+        state: A dictionary of the total suscceptable, infected, and recovered.
+
+    """
+
+    log("Simulating infection.")
+
+    start = time.perf_counter()
+    network = input_network.copy()
+    add_time("infection/copy", start)
+    
+    # Recalculate the weights of the network as per necessary
+
+    # Keep the counts in memory, and write the data file once at the end.
+    if record is None:
+        record = np.empty((MAX_STEPS, 4), dtype=np.int32)
+
+    # Set the default to susceptable
+    sys.stdout.flush()
+    for node in network.nodes():
+        network.node[node]["status"] =  "s"
+        network.node[node]["color"] = "#A0C8F0"
+        network.node[node]["age"] = 0
+    
+    # Assign the infected
+    for start in starts:
+        infected = start
+        network.node[infected]["status"] = "i"
+        network.node[infected]["color"]  = "green"
+        
+        if QUIET:
+            continue
+        if isinstance(network,nx.DiGraph):
+            in_degree = network.in_degree(infected)
+            out_degree = network.out_degree(infected)
+            degree = in_degree + out_degree
+        else:
+            degree = network.degree(infected)
+
+        log("\t",network.node[infected]["name"],"[",degree,"]")
+
+
+    if vaccination is not None:
+        log("\tVaccinated: ", len(vaccination) )
+    else: 
+        log("\tVaccinated: None")
+
+    if snapshots is not None:
+        nodes = network.nodes()
+
+    # Continue a forked simulation where its fork was taken.
+    first = 0
+    if fork is not None:
+        first = resume_fork(fork, record, snapshots)
+        for node, (status, age, color) in fork["nodes"].items():
+            network.node[node].update(status=status, age=age, color=color)
+        random.setstate(fork["random"])
+
+    if vis:
+        pos = nx.spring_layout(network, scale=2)
+
+    # Iterate through the evolution of the disease.
+    start = time.perf_counter()
+    evaluated = 0
+    for step in range(first,MAX_STEPS):
+        if forks is not None and step in forks:
+            forks[step] = fork_state(step, record, snapshots,
+                                     random=random.getstate(),
+                                     nodes=dict((node, (data["status"],
+                                                        data["age"],
+                                                        data["color"]))
+                                                for node, data in
+                                                network.nodes(data=True)))
+
+        # If the delay is over, vaccinate.
+        # Convert the STRING! 
+        if int(step) == int(DELAY):
             if vaccination is not None:
-                print(DELAY,"on step",step)
+                log(DELAY,"on step",step)
+                cancelling = time.perf_counter()
                 network.remove_edges_from(vaccination)
                 # Recalculate the weights of the network as per necessary
                 if RECALCULATE == True:
-                    network = calculate_weights(network)
+                    update_weights(network, vaccination)
+                add_time("infection/cancel", cancelling)
 
 
         # Create variables to hold the outcomes as they happen
@@ -587,6 +3655,7 @@ def infection(input_network, vaccination, starts,DELAY=0, vis = False,
                 # Propogate the infection.
                 if age > 0:
                     victims = network.successors(node)
+                    evaluated += len(victims)
                     number_infections = 0
                     for victim in victims:
                         infect_status = network.node[victim]["status"]
@@ -629,25 +3698,1103 @@ def infection(input_network, vaccination, starts,DELAY=0, vis = False,
             elif status is "i":
                 
                 I += 1
-        print("{0}, {1}, {2}, {3}, {4}".format(step, S, E, I, R))
-
-        printline = "{0}, {1}, {2}, {3}, {4}".format(step, S, E, I, R)
-        f.write(printline + "\n")
+        log("{0}, {1}, {2}, {3}, {4}".format(step, S, E, I, R))
 
-       # print("\t"+printline)
+        record[step:] = (S, E, I, R)
+        if snapshots is not None:
+            snapshots[step:] = [STATE_CODES[network.node[node]["status"]]
+                                for node in nodes]
 
         if I is 0:
             break
 
+        if forks is not None and None not in forks.values():
+            break
+
         if vis:
             #write_dot(network, title+".dot")
             visualize(network, title, pos)
+    add_time("infection/steps", start)
+
+    # Every step visits all nodes twice, and draws once per flight.
+    count(simulations=1, steps=step+1-first,
+          nodes_scanned=2*(step+1-first)*len(network),
+          edges_evaluated=evaluated, draws=evaluated)
+
+    if file_name is not None:
+        start = time.perf_counter()
+        write_counts(file_name, record[:step+1])
+        add_time("infection/output", start)
         
-    print("\t----------\n\tS: {0}, I: {1}, R: {2}".format(S,I,R))
+    log("\t----------\n\tS: {0}, I: {1}, R: {2}".format(S,I,R))
+
+    return {"Suscceptable":S,"Infected":I, "Recovered":R}
+
+def common_draws(key, step, edges):
+    """
+    Draw the transmissions of flights at a step from common random numbers.
+    Every (key, step, flight) has a draw of its own, hashed from the three
+    with splitmix64, whatever else is drawn. Simulations of a target set
+    under the same key see the same draws on every flight they keep, so
+    effort levels, strategies and delays differ only by their
+    cancellations.
+
+    Args:
+        key: The 64 bit key of the target set, or an array of the key of
+             every flight's simulation.
+        step: The step of the simulation.
+        edges: An array of the CSR positions of the flights.
+
+    Returns:
+        draws: A float array of uniform draws in [0, 1), one per flight.
+    """
+
+    def mix(z):
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+    golden = np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over="ignore"):
+        z = mix(np.asarray(key, dtype=np.uint64) + np.uint64(step) * golden)
+        z = mix(z + (np.asarray(edges, dtype=np.uint64) + np.uint64(1)) *
+                golden)
+    return (z >> np.uint64(11)) * (1.0 / (1 << 53))
+
+def common_key(settings, iteration):
+    """
+    The common random numbers key of a target set, or None when the
+    settings of a sweep or search do not ask for them.
+    """
+
+    if not settings.get("CRN"):
+        return None
+    return task_seed(settings["seed"], "crn", iteration)
+
+def fork_state(step, record, snapshots, **state):
+    """
+    Take the state of a simulation at the start of a step, to continue it
+    from there with another cancellation delay. The engines pass whatever
+    they need to resume: node states and ages, and the random stream.
+
+    Args:
+        step: The step the simulation is about to run.
+        record: The engine's S/E/I/R counts, of which the steps before are
+                kept.
+        snapshots: The engine's state snapshots, or None.
+        state: The engine's own state, as keyword arguments.
+
+    Returns:
+        fork: A dictionary of the "step", the "record" and "snapshots" so
+              far, and the engine's state.
+    """
+
+    state.update({"step": step, "record": record[:step].copy(),
+                  "snapshots": None if snapshots is None else
+                               snapshots[:step].copy()})
+    return state
+
+def resume_fork(fork, record, snapshots):
+    """
+    Restore the counts and state snapshots of the steps before a
+    fork_state(), and return the step to continue from.
+    """
+
+    record[:fork["step"]] = fork["record"]
+    if snapshots is not None:
+        snapshots[:fork["step"]] = fork["snapshots"]
+    return fork["step"]
+
+def network_arrays(network, nodes=None):
+    """
+    Flatten the successor lists and edge weights of a network into compressed
+    sparse row (CSR) arrays for the array-backed infection engine.
+
+    Args:
+        network: A weighted NetworkX DiGraph object, or a CompactNetwork.
+        nodes: An optional node ordering. Defaults to network.nodes().
+
+    Returns:
+        arrays: A dictionary holding the node ordering ("nodes"), a mapping of
+                node to row ("index"), and the CSR arrays "indptr", "indices"
+                and "weight". The out-edges of row n are stored at positions
+                indptr[n] to indptr[n+1].
+    """
+
+    if isinstance(network, CompactNetwork) and nodes is None:
+        return network.arrays()
+
+    if nodes is None:
+        nodes = list(network.nodes())
+    index = dict((node, i) for i, node in enumerate(nodes))
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indices = list()
+    weight = list()
+    for i, node in enumerate(nodes):
+        for successor in network.successors(node):
+            indices.append(index[successor])
+            weight.append(network[node][successor].get("weight", 0))
+        indptr[i + 1] = len(indices)
+
+    return {"nodes": nodes,
+            "index": index,
+            "indptr": indptr,
+            "indices": np.array(indices, dtype=np.int64),
+            "weight": np.array(weight, dtype=np.float64)}
+
+def out_edge_positions(indptr, rows):
+    """
+    Find the CSR positions of every out-edge of the given rows.
+
+    Args:
+        indptr: The CSR row pointer array.
+        rows: An integer array of source rows.
+
+    Returns:
+        positions: An integer array of edge positions, grouped by row.
+    """
+
+    counts = indptr[rows + 1] - indptr[rows]
+    offsets = np.repeat(indptr[rows] - (np.cumsum(counts) - counts), counts)
+
+    return np.arange(counts.sum(), dtype=np.int64) + offsets
+
+def exposed_ages(victims, sources, size):
+    """
+    The ages that airports exposed during a step end it with, as in
+    infection(): an airport visited after its exposure, i.e. exposed by an
+    airport earlier in the network order, ages once in the same step.
+
+    Args:
+        victims: An integer array of the exposed nodes, with repeats when
+                 several infected nodes reached the same one.
+        sources: An integer array of the infected node of every victim.
+        size: The number of nodes, or of flattened (row, node) cells.
+
+    Returns:
+        ages: An integer array of 0 or 1, by victim.
+    """
+
+    first = np.full(size, size, dtype=np.int64)
+    np.minimum.at(first, victims, sources)
+    return (first[victims] < victims).astype(np.int32)
+
+def edge_positions(arrays, edges):
+    """
+    Find the CSR positions of a list of edges.
+
+    Args:
+        arrays: The network_arrays() of a network.
+        edges: A list of (u, v) or (u, v, data) edges of the network.
+
+    Returns:
+        positions: An integer array of edge positions, in the order of edges.
+    """
+
+    # Index every edge by its endpoints on first use.
+    if "position" not in arrays:
+        sources = np.repeat(np.arange(len(arrays["nodes"])),
+                            np.diff(arrays["indptr"]))
+        arrays["position"] = dict(zip(zip(sources.tolist(),
+                                          arrays["indices"].tolist()),
+                                      range(len(sources))))
+
+    index, position = arrays["index"], arrays["position"]
+    return np.array([position[(index[edge[0]], index[edge[1]])]
+                     for edge in edges], dtype=np.int64)
+
+def cancellation_overlay(arrays, ranked, count, RECALCULATE=True, base=None):
+    """
+    Describe the network with the first count ranked edges cancelled as a
+    mask of active edges over the intact network's arrays, and the weights
+    calculate_weights() would give the remaining edges. Cancelling a longer
+    prefix of the same ranking extends a previous overlay.
+
+    Args:
+        arrays: The network_arrays() of the intact network.
+        ranked: The CSR positions of the ranked edges to cancel.
+        count: The number of ranked edges to cancel.
+        RECALCULATE: Recalculate the weights of the remaining edges.
+        base: An overlay of the same ranking with at most count edges
+              cancelled, or None.
+
+    Returns:
+        overlay: A dictionary of the "active" edge mask, the edge "weight"
+                 array and the "count" of cancelled edges.
+    """
+
+    started = time.perf_counter()
+    if base is None or base["count"] > count:
+        active = np.ones(len(arrays["indices"]), dtype=bool)
+        start = 0
+    else:
+        active = base["active"].copy()
+        start = base["count"]
+    active[ranked[start:count]] = False
+
+    if RECALCULATE == True:
+        weight = masked_weights(arrays, active)
+    else:
+        weight = arrays["weight"]
+    add_time("cancellation_overlay", started)
+
+    return {"active": active, "weight": weight, "count": count}
+
+def masked_weights(arrays, active):
+    """
+    Calculate the weights calculate_weights() gives the active edges of a
+    network, from the intact network's arrays and a mask of active edges.
+    Each node's weights are normalized exactly like node_weights(), which
+    only lowers its smallest weight with weights that are not a new largest
+    weight in successor order.
+
+    Args:
+        arrays: The network_arrays() of the intact network.
+        active: A boolean mask of the active edge positions.
+
+    Returns:
+        weight: An array of edge weights. Inactive edges have no weight.
+    """
+
+    indptr, indices = arrays["indptr"], arrays["indices"]
+    sources = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+    kept = np.flatnonzero(active)
+    weight = np.zeros(len(indices))
+    if len(kept) == 0:
+        return weight
+
+    # The share of each successor in the out-degree of all successors.
+    out_degree = np.bincount(sources[kept], minlength=len(indptr) - 1)
+    rows = sources[kept]
+    degree = out_degree[indices[kept]].astype(np.float64)
+    total = np.bincount(rows, weights=degree, minlength=len(indptr) - 1)
+    probability = np.zeros(len(kept))
+    np.divide(degree, total[rows], out=probability, where=total[rows] > 0)
+
+    # Running largest weight of each node, before each successor. Weights
+    # are replaced by their exact ranks so the running maximum of all nodes
+    # can be taken in one pass by offsetting each node's ranks.
+    values, ranks = np.unique(np.r_[0.0, probability], return_inverse=True)
+    zero, ranks = ranks[0], ranks[1:]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    segment = np.cumsum(np.r_[True, rows[1:] != rows[:-1]]) - 1
+    offset = segment * np.int64(len(values))
+    running = np.maximum.accumulate(ranks + offset) - offset
+    previous = np.maximum(np.r_[zero, running[:-1]], zero)
+    previous[starts] = zero
+
+    largest = np.maximum.reduceat(probability, starts)
+    smallest = np.minimum.reduceat(np.where(ranks > previous, 2.0,
+                                            probability), starts)
+    largest, smallest = largest[segment], smallest[segment]
+
+    relative = np.zeros(len(kept))
+    np.divide(probability - smallest, largest - smallest, out=relative,
+              where=largest != smallest)
+    weight[kept] = relative
+
+    return weight
+
+def infection_numpy(input_network, vaccination, starts, DELAY=0,
+                    file_name="sir.csv", title="", RECALCULATE=True,
+                    arrays=None, seed=None, overlay=None, record=None,
+                    snapshots=None, forks=None, fork=None, crn=None):
+    """
+    Simulate an infection within network with the given vaccination strategy,
+    keeping node states and ages in NumPy arrays instead of node attributes.
+    The network itself is never copied or changed; cancelled flights are
+    masked out of its arrays. This function will write data from each
+    timestep to file_name once the simulation has ended.
+
+    The transmissions of every infected node in a step are drawn in one
+    batch. Nodes are updated as infection() visits them in network order: an
+    airport exposed during a step by an airport earlier in that order ages
+    in the same step, as it is visited after its exposure. The outcomes
+    follow the same distribution as infection(), though not the same draws.
+
+    Args:
+        input_network: A weighted NetworkX DiGraph object.
+        vaccination: A list of edges to cancel once the delay is over.
+        starts: A list of nodes to infect at the start of the simulation.
+        arrays: The network_arrays() of input_network. Computed when missing.
+        seed: The seed of the transmission draws. Drawn from the module level
+              random generator when missing.
+        overlay: The cancellation_overlay() of vaccination. Computed when
+                 missing.
+        record: An optional (MAX_STEPS, 4) array that receives the S/E/I/R
+                counts of every step, as in infection().
+        snapshots: An optional (MAX_STEPS, nodes) array that receives the
+                   state codes of every step, as in infection().
+        forks: Steps to take fork_state()s at, as in infection().
+        fork: A fork_state() to continue from, as in infection(). It
+              carries its own transmission draws, so seed is unused.
+        crn: The key of the common_draws() to draw transmissions from,
+             instead of the seeded stream.
+
+    Returns:
+        state: A dictionary of the total suscceptable, infected, and recovered.
+
+    """
+
+    log("Simulating infection.")
+
+    if arrays is None:
+        arrays = network_arrays(input_network)
+    nodes = arrays["nodes"]
+    indptr, indices, weight = (arrays["indptr"], arrays["indices"],
+                               arrays["weight"])
+    if vaccination is not None and overlay is None:
+        ranked = edge_positions(arrays, vaccination)
+        overlay = cancellation_overlay(arrays, ranked, len(ranked),
+                                       RECALCULATE)
+    edge_active = None
+
+    # Follow the module level random seed.
+    if fork is not None:
+        rng = np.random.RandomState()
+        rng.set_state(fork["rng"])
+    else:
+        if seed is None:
+            seed = random.getrandbits(32)
+        rng = np.random.RandomState(seed)
+
+    # Keep the counts in memory, and write the data file once at the end.
+    if record is None:
+        record = np.empty((MAX_STEPS, 4), dtype=np.int32)
+
+    # Set the default to susceptable
+    state = np.full(len(nodes), SUSCEPTIBLE, dtype=np.int8)
+    age = np.zeros(len(nodes), dtype=np.int32)
+
+    # Assign the infected
+    for start in starts:
+        state[arrays["index"][start]] = INFECTED
+        if QUIET:
+            continue
+        name, degree = airport_label(input_network, start)
+        log("\t",name,"[",degree,"]")
+
+    if vaccination is not None:
+        log("\tVaccinated: ", len(vaccination) )
+    else:
+        log("\tVaccinated: None")
+
+    # Continue a forked simulation where its fork was taken.
+    first = 0
+    if fork is not None:
+        first = resume_fork(fork, record, snapshots)
+        state[:], age[:] = fork["state"], fork["age"]
+
+    # Iterate through the evolution of the disease.
+    start = time.perf_counter()
+    evaluated = 0
+    for step in range(first,MAX_STEPS):
+        if forks is not None and step in forks:
+            forks[step] = fork_state(step, record, snapshots,
+                                     rng=rng.get_state(), state=state.copy(),
+                                     age=age.copy())
+
+        # If the delay is over, vaccinate.
+        if step == int(DELAY) and vaccination is not None:
+            log(DELAY,"on step",step)
+            edge_active, weight = overlay["active"], overlay["weight"]
+
+        recovering = (state == INFECTED) & (age >= RECOVERY_AGE)
+        incubated = (state == EXPOSED) & (age >= LATENT_PERIOD)
+        spreading = np.flatnonzero((state == INFECTED) & (age > 0))
+
+        # Draw every transmission of this step at once.
+        edges = out_edge_positions(indptr, spreading)
+        sources = np.repeat(spreading,
+                            indptr[spreading + 1] - indptr[spreading])
+        if edge_active is not None:
+            sources = sources[edge_active[edges]]
+            edges = edges[edge_active[edges]]
+        if crn is not None:
+            hits = common_draws(crn, step, edges) <= weight[edges]
+        else:
+            hits = rng.random_sample(len(edges)) <= weight[edges]
+        evaluated += len(edges)
+        sources = sources[hits]
+        victims = indices[edges[hits]]
+        susceptible = state[victims] == SUSCEPTIBLE
+        victims, sources = victims[susceptible], sources[susceptible]
+
+        # Age everyone who was exposed or infected before this step.
+        age[((state == EXPOSED) & ~incubated) | (state == INFECTED)] += 1
+
+        state[recovering] = RECOVERED
+        state[incubated] = INFECTED
+        state[victims] = EXPOSED
+        age[victims] = exposed_ages(victims, sources, len(nodes))
+
+        S, E, I, R = np.bincount(state, minlength=4)
+        log("{0}, {1}, {2}, {3}, {4}".format(step, S, E, I, R))
+
+        record[step:] = (S, E, I, R)
+        if snapshots is not None:
+            snapshots[step:] = state
+
+        if I == 0:
+            break
+
+        if forks is not None and None not in forks.values():
+            break
+    add_time("infection/steps", start)
+
+    # Every step updates the arrays of all nodes.
+    count(simulations=1, steps=step+1-first,
+          nodes_scanned=(step+1-first)*len(nodes),
+          edges_evaluated=evaluated, draws=evaluated)
+
+    if file_name is not None:
+        start = time.perf_counter()
+        write_counts(file_name, record[:step+1])
+        add_time("infection/output", start)
+
+    log("\t----------\n\tS: {0}, I: {1}, R: {2}".format(S,I,R))
+
+    return {"Suscceptable":int(S),"Infected":int(I), "Recovered":int(R)}
+
+def infection_frontier(input_network, vaccination, starts, DELAY=0,
+                       file_name="sir.csv", title="", RECALCULATE=True,
+                       arrays=None, overlay=None, record=None,
+                       snapshots=None, forks=None, fork=None, crn=None):
+    """
+    Simulate an infection like infection(), but only visit the exposed and
+    infected airports of each step, and keep the S/E/I/R counts up to date
+    as airports change state. A step costs time in the number of active
+    airports and their flights rather than in the size of the network.
+
+    Active airports are visited in network order, and airports exposed during
+    a step are still visited in it when they come later in that order, so
+    every transmission draw matches infection() under the same random seed.
+
+    Args:
+        input_network: A weighted NetworkX DiGraph object.
+        vaccination: A list of edges to cancel once the delay is over.
+        starts: A list of nodes to infect at the start of the simulation.
+        arrays: The network_arrays() of input_network. Computed when missing.
+        overlay: The cancellation_overlay() of vaccination. Computed when
+                 missing.
+        record: An optional (MAX_STEPS, 4) array that receives the S/E/I/R
+                counts of every step, as in infection().
+        snapshots: An optional (MAX_STEPS, nodes) array that receives the
+                   state codes of every step, as in infection().
+        forks: Steps to take fork_state()s at, as in infection().
+        fork: A fork_state() to continue from, as in infection().
+        crn: The key of the common_draws() to draw transmissions from,
+             instead of the module level random stream.
+
+    Returns:
+        state: A dictionary of the total suscceptable, infected, and recovered.
+
+    """
+
+    log("Simulating infection.")
+
+    if arrays is None:
+        arrays = network_arrays(input_network)
+    nodes = arrays["nodes"]
+    indptr = arrays["indptr"].tolist()
+    indices = arrays["indices"].tolist()
+    weight = arrays["weight"].tolist()
+    if vaccination is not None and overlay is None:
+        ranked = edge_positions(arrays, vaccination)
+        overlay = cancellation_overlay(arrays, ranked, len(ranked),
+                                       RECALCULATE)
+    edge_active = None
+
+    # Keep the counts in memory, and write the data file once at the end.
+    if record is None:
+        record = np.empty((MAX_STEPS, 4), dtype=np.int32)
+
+    # Set the default to susceptable, and assign the infected. Only active
+    # airports have an age.
+    state = bytearray(len(nodes))
+    ages = dict()
+    for start in starts:
+        ages[arrays["index"][start]] = 0
+        state[arrays["index"][start]] = INFECTED
+        if QUIET:
+            continue
+        name, degree = airport_label(input_network, start)
+        log("\t",name,"[",degree,"]")
+
+    if vaccination is not None:
+        log("\tVaccinated: ", len(vaccination) )
+    else:
+        log("\tVaccinated: None")
+
+    S, E, I, R = len(nodes) - len(ages), 0, len(ages), 0
+    frontier = sorted(ages)
+
+    # Continue a forked simulation where its fork was taken.
+    first = 0
+    if fork is not None:
+        first = resume_fork(fork, record, snapshots)
+        state, ages = bytearray(fork["state"]), dict(fork["ages"])
+        frontier, (S, E, I, R) = list(fork["frontier"]), fork["counts"]
+        random.setstate(fork["random"])
+
+    # Iterate through the evolution of the disease.
+    start = time.perf_counter()
+    scanned, evaluated, draws = 0, 0, 0
+    for step in range(first,MAX_STEPS):
+        if forks is not None and step in forks:
+            forks[step] = fork_state(step, record, snapshots,
+                                     random=random.getstate(),
+                                     state=bytes(state), ages=dict(ages),
+                                     frontier=list(frontier),
+                                     counts=(S, E, I, R))
+
+        # If the delay is over, vaccinate.
+        if step == int(DELAY) and vaccination is not None:
+            log(DELAY,"on step",step)
+            edge_active = overlay["active"].tolist()
+            weight = overlay["weight"].tolist()
+
+        # Only airports infected before this step spread in it, so their
+        # common draws are known up front.
+        if crn is not None:
+            spreading = [node for node in frontier
+                         if state[node] == INFECTED and ages[node] > 0]
+            offsets, total = dict(), 0
+            for node in spreading:
+                offsets[node] = total
+                total += indptr[node + 1] - indptr[node]
+            drawn = common_draws(crn, step, out_edge_positions(
+                                 arrays["indptr"],
+                                 np.array(spreading, dtype=np.int64))
+                                 ).tolist()
+
+        # The sorted frontier is already a heap; airports exposed later in
+        # the network order join it and are visited in this step.
+        heap = frontier
+        frontier = list()
+        scanned += len(heap)
+        while heap:
+            node = heapq.heappop(heap)
+            status = state[node]
+            age = ages[node]
+
+            if status == INFECTED and age >= RECOVERY_AGE:
+                # The infected has reached its recovery time
+                state[node] = RECOVERED
+                I, R = I - 1, R + 1
+
+            if status == EXPOSED and LATENT_PERIOD <= age < RECOVERY_AGE:
+                state[node] = INFECTED
+                E, I = E - 1, I + 1
+
+            elif status == EXPOSED:
+                ages[node] = age + 1
+
+            elif status == INFECTED:
+                # Propogate the infection, drawing once per flight.
+                if age > 0:
+                    first_edge, last_edge = indptr[node], indptr[node + 1]
+                    evaluated += last_edge - first_edge
+                    if crn is not None:
+                        offset = offsets[node] - first_edge
+                    for edge in range(first_edge, last_edge):
+                        if edge_active is not None and not edge_active[edge]:
+                            continue
+                        draws += 1
+                        victim = indices[edge]
+                        draw = random.random() if crn is None else \
+                               drawn[offset + edge]
+                        if draw <= weight[edge] and \
+                           state[victim] == SUSCEPTIBLE:
+                            state[victim] = EXPOSED
+                            ages[victim] = 0
+                            S, E = S - 1, E + 1
+                            if victim > node:
+                                scanned += 1
+                                heapq.heappush(heap, victim)
+                            else:
+                                frontier.append(victim)
+                ages[node] = age + 1
+
+            if state[node] == RECOVERED:
+                del ages[node]
+            else:
+                frontier.append(node)
+        frontier.sort()
+
+        log("{0}, {1}, {2}, {3}, {4}".format(step, S, E, I, R))
+
+        record[step:] = (S, E, I, R)
+        if snapshots is not None:
+            snapshots[step:] = np.frombuffer(state, dtype=np.int8)
+
+        if I == 0:
+            break
+
+        if forks is not None and None not in forks.values():
+            break
+    add_time("infection/steps", start)
+    count(simulations=1, steps=step+1-first, nodes_scanned=scanned,
+          edges_evaluated=evaluated, draws=draws)
+
+    if file_name is not None:
+        start = time.perf_counter()
+        write_counts(file_name, record[:step+1])
+        add_time("infection/output", start)
+
+    log("\t----------\n\tS: {0}, I: {1}, R: {2}".format(S,I,R))
 
     return {"Suscceptable":S,"Infected":I, "Recovered":R}
 
-       
+def infection_batch(input_network, vaccination, targets, DELAY=0,
+                    RECALCULATE=True, arrays=None, seeds=None, overlay=None,
+                    record=None, snapshots=None, crn=None):
+    """
+    Simulate one infection per target set with the same vaccination strategy.
+    The simulations are the rows of a single state matrix that is stepped
+    together over the shared edge arrays until no row has any infected
+    airports left. Every row keeps its own random stream, so a row produces
+    the same outcome as infection_numpy() given the same seed.
+
+    Args:
+        input_network: A weighted NetworkX DiGraph object.
+        vaccination: A list of edges to cancel once the delay is over.
+        targets: A list of target sets, each a list of nodes to infect.
+        arrays: The network_arrays() of input_network. Computed when missing.
+        seeds: One transmission seed per target set. Drawn from the module
+               level random generator when missing.
+        overlay: The cancellation_overlay() of vaccination. Computed when
+                 missing.
+        record: An optional (targets, MAX_STEPS, 4) array that receives the
+                S/E/I/R counts of every row at every step, as in infection().
+        snapshots: An optional (targets, MAX_STEPS, nodes) array that receives
+                   the state codes of every row at every step.
+        crn: An optional list of the common_draws() key of every target set,
+             to draw its transmissions from instead of its seed.
+
+    Returns:
+        states: A list with a dictionary of the total suscceptable, infected,
+                and recovered for every target set.
+
+    """
+
+    log("Simulating {0} infections.".format(len(targets)))
+
+    if arrays is None:
+        arrays = network_arrays(input_network)
+    nodes = arrays["nodes"]
+    indptr, indices, weight = (arrays["indptr"], arrays["indices"],
+                               arrays["weight"])
+
+    if vaccination is not None and overlay is None:
+        ranked = edge_positions(arrays, vaccination)
+        overlay = cancellation_overlay(arrays, ranked, len(ranked),
+                                       RECALCULATE)
+    edge_active = None
+
+    if seeds is None:
+        seeds = [random.getrandbits(32) for target in targets]
+    rngs = [np.random.RandomState(seed) for seed in seeds]
+
+    # Set the default to susceptable, and assign the infected.
+    state = np.full((len(targets), len(nodes)), SUSCEPTIBLE, dtype=np.int8)
+    age = np.zeros((len(targets), len(nodes)), dtype=np.int32)
+    for row, starts in enumerate(targets):
+        for start in starts:
+            state[row, arrays["index"][start]] = INFECTED
+
+    # Rows stop changing once their simulation would have ended.
+    active = np.ones(len(targets), dtype=bool)
+
+    start = time.perf_counter()
+    scanned, evaluated = 0, 0
+    for step in range(0,MAX_STEPS):
+        # If the delay is over, vaccinate.
+        if step == int(DELAY) and vaccination is not None:
+            edge_active, weight = overlay["active"], overlay["weight"]
+
+        live = active[:, np.newaxis]
+        recovering = live & (state == INFECTED) & (age >= RECOVERY_AGE)
+        incubated = live & (state == EXPOSED) & (age >= LATENT_PERIOD)
+        rows, spreading = np.nonzero(live & (state == INFECTED) & (age > 0))
+
+        # Draw the transmissions of every row, each from its own stream.
+        edges = out_edge_positions(indptr, spreading)
+        lengths = indptr[spreading + 1] - indptr[spreading]
+        edge_rows = np.repeat(rows, lengths)
+        sources = np.repeat(spreading, lengths)
+        if edge_active is not None:
+            edge_rows = edge_rows[edge_active[edges]]
+            sources = sources[edge_active[edges]]
+            edges = edges[edge_active[edges]]
+        if crn is not None:
+            draws = common_draws(np.array(crn, dtype=np.uint64)[edge_rows],
+                                 step, edges)
+        else:
+            counts = np.bincount(edge_rows, minlength=len(targets))
+            draws = np.concatenate([np.zeros(0)] +
+                                   [rngs[row].random_sample(counts[row])
+                                    for row in np.flatnonzero(counts)])
+        hits = draws <= weight[edges]
+        scanned += active.sum() * len(nodes)
+        evaluated += len(edges)
+        victim_rows = edge_rows[hits]
+        victims = indices[edges[hits]]
+        sources = sources[hits]
+        susceptible = state[victim_rows, victims] == SUSCEPTIBLE
+        victim_rows, victims = victim_rows[susceptible], victims[susceptible]
+        sources = sources[susceptible]
+
+        # Age everyone who was exposed or infected before this step.
+        age[live & (((state == EXPOSED) & ~incubated) |
+                    (state == INFECTED))] += 1
+
+        state[recovering] = RECOVERED
+        state[incubated] = INFECTED
+        state[victim_rows, victims] = EXPOSED
+        age[victim_rows, victims] = exposed_ages(
+            victim_rows * len(nodes) + victims,
+            victim_rows * len(nodes) + sources, state.size)
+
+        if record is not None:
+            for code in (SUSCEPTIBLE, EXPOSED, INFECTED, RECOVERED):
+                record[:, step:, code] = \
+                    (state == code).sum(axis=1)[:, np.newaxis]
+        if snapshots is not None:
+            snapshots[:, step:] = state[:, np.newaxis]
+
+        active &= (state == INFECTED).any(axis=1)
+        log("{0}, {1}".format(step, active.sum()))
+        if not active.any():
+            break
+    add_time("infection/steps", start)
+    count(simulations=len(targets), steps=step+1, nodes_scanned=scanned,
+          edges_evaluated=evaluated, draws=evaluated)
+
+    states = list()
+    for row in range(len(targets)):
+        S, E, I, R = np.bincount(state[row], minlength=4)
+        states.append({"Suscceptable":int(S),"Infected":int(I),
+                       "Recovered":int(R)})
+
+    return states
+
+def create_results(file_name, strategies, targets, efforts, metadata):
+    """
+    Create a results store for a sweep: a memory-mapped (strategy, target,
+    effort, step, S/E/I/R) integer array, and a .json file next to it with
+    the labels of each axis and the run metadata. Simulations that never
+    ran, e.g. after a target set stopped spreading, are left at -1.
+
+    Args:
+        file_name: The path of the .npy file to create.
+        strategies: The names of the strategies, in order.
+        targets: The number of target sets.
+        efforts: The effort levels, in order.
+        metadata: A dictionary of run metadata, e.g. seed and delay.
+
+    Returns:
+        store: The writable memory-mapped results array.
+    """
+
+    store = np.lib.format.open_memmap(file_name, mode="w+", dtype=np.int32,
+                                      shape=(len(strategies), targets,
+                                             len(efforts), MAX_STEPS, 4))
+    store[:] = -1
+    store.flush()
+
+    metadata = dict(metadata)
+    metadata.update({"strategies": list(strategies), "targets": targets,
+                     "efforts": list(efforts), "steps": MAX_STEPS,
+                     "counts": ["s", "e", "i", "r"]})
+    with open(os.path.splitext(file_name)[0] + ".json", "w") as f:
+        json.dump(metadata, f, indent=4)
+
+    return store
+
+def open_results(file_name):
+    """
+    Open a results store read-only, without loading it into memory.
+
+    Args:
+        file_name: The path of the .npy file of the store.
+
+    Returns:
+        store: The read-only memory-mapped results array.
+        metadata: The dictionary of run metadata and axis labels.
+    """
+
+    with open(os.path.splitext(file_name)[0] + ".json", "r") as f:
+        metadata = json.load(f)
+
+    return np.load(file_name, mmap_mode="r"), metadata
+
+def update_results(file_name, metadata):
+    """
+    Add entries to the run metadata of a results store.
+
+    Args:
+        file_name: The path of the .npy file of the store.
+        metadata: A dictionary of the entries to add or replace.
+
+    Returns:
+        Void
+    """
+
+    metadata_file = os.path.splitext(file_name)[0] + ".json"
+    with open(metadata_file, "r") as f:
+        stored = json.load(f)
+    stored.update(metadata)
+    with open(metadata_file, "w") as f:
+        json.dump(stored, f, indent=4)
+
+def result_totals(store, strategy_index):
+    """
+    Find the total number of infected airports of every target set at every
+    effort level of a strategy. Effort levels that were skipped once a target
+    set stopped spreading repeat the last total, like write_efforts().
+
+    Args:
+        store: A results array from open_results().
+        strategy_index: The index of the strategy.
+
+    Returns:
+        totals: A (targets, efforts) integer array.
+    """
+
+    final = store[strategy_index, :, :, -1, :]
+    totals = final[..., INFECTED].astype(np.int64) + final[..., RECOVERED]
+    ran = final[..., INFECTED] >= 0
+
+    for level in range(1, totals.shape[1]):
+        totals[~ran[:, level], level] = totals[~ran[:, level], level - 1]
+
+    return totals
+
+def export_results(file_name, directory=None):
+    """
+    Write the files the R scripts read from a results store: the
+    <strategy>.matrix of totals by target and effort, the <strategy>.csv of
+    mean totals by effort, and the <strategy>/<strategy>_NNNN.csv files.
+
+    Args:
+        file_name: The path of the .npy file of the store.
+        directory: The output directory. Defaults to the store's directory.
+
+    Returns:
+        Void
+    """
+
+    store, metadata = open_results(file_name)
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(file_name))
+
+    for strategy_index, strategy in enumerate(metadata["strategies"]):
+        # Adaptive sweeps only filled the target sets they needed.
+        rounds = metadata.get("rounds", {}).get(strategy, metadata["targets"])
+        totals = result_totals(store, strategy_index)[:rounds]
+
+        # MASS::write.matrix right-justifies every field to the width of
+        # the widest one in the whole matrix.
+        width = max([len(str(value)) for value in totals.flat] or [0])
+        with open(os.path.join(directory, strategy + ".matrix"), "w") as f:
+            for row in totals:
+                f.write(",".join(str(value).rjust(width)
+                                 for value in row) + "\n")
+
+        # data_agregator.R labels the effort levels 0, 5, ..., 100.
+        with open(os.path.join(directory, strategy + ".csv"), "w") as f:
+            f.write('"Effort","Median"\n')
+            for level, mean in enumerate(totals.mean(axis=0)):
+                f.write("{0},{1:.15g}\n".format(level * 5, mean))
+
+        os.makedirs(os.path.join(directory, strategy), exist_ok=True)
+        for iteration, row in enumerate(totals):
+            ran = store[strategy_index, iteration, :, -1, INFECTED] >= 0
+            rows = [(effort, int(total)) for effort, total, done in
+                    zip(metadata["efforts"], row, ran) if done]
+            write_efforts(strategy, iteration, rows, directory)
+
+def geographic_layout(network):
+    """
+    Place every airport at its longitude and latitude, an equirectangular
+    projection of the globe.
+
+    Args:
+        network: A NetworkX DiGraph object from create_network().
+
+    Returns:
+        layout: A dictionary of the "nodes", their (nodes, 2) "positions"
+                and the (edges, 2) "edges" as indices into nodes.
+    """
+
+    nodes = network.nodes()
+    index = dict((node, position) for position, node in enumerate(nodes))
+    positions = np.array([(float(network.node[node]["lon"]),
+                           float(network.node[node]["lat"]))
+                          for node in nodes])
+    edges = np.array([(index[i], index[j]) for i, j in network.edges()],
+                     dtype=np.int64).reshape(-1, 2)
+
+    return {"nodes": np.array(nodes), "positions": positions,
+            "edges": edges}
+
+def cached_layout(network, path, rebuild=False):
+    """
+    Compute the geographic_layout() of the network, reusing the layout
+    stored next to the cached network when there is one.
+
+    Args:
+        network: The NetworkX DiGraph object of the cached network.
+        path: The cache path prefix from network_cache_path(), or None.
+        rebuild: Ignore any cached layout.
+
+    Returns:
+        layout: The geographic_layout() of the network.
+    """
+
+    file_name = "{0}-layout.npz".format(path)
+    if path is not None and not rebuild and os.path.exists(file_name):
+        with np.load(file_name) as data:
+            return dict(data)
+
+    layout = geographic_layout(network)
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = file_name[:-len(".npz")] + ".tmp.npz"
+        np.savez_compressed(temporary, **layout)
+        os.replace(temporary, file_name)
+
+    return layout
+
+def render_run(directory, jobs=0, dpi=600):
+    """
+    Render a frame of every step of every "nodes" trace of a run, from the
+    layout.npz saved in its directory. The frames of
+    <strategy>/trace_NNNN.npz go to <strategy>/trace_NNNN/, one
+    infection-<effort>-<step>.png per step until the infection ended. A
+    pool of workers memory-maps the layout and the states of every frame
+    from files published once, instead of receiving them with each task.
+
+    Args:
+        directory: The directory of the run.
+        jobs: The number of worker processes, or 0 to render in this one.
+        dpi: The resolution of the frames.
+
+    Returns:
+        Void
+    """
+
+    with np.load(os.path.join(directory, "layout.npz")) as data:
+        layout = dict(data)
+    index = dict((node, position)
+                 for position, node in enumerate(layout["nodes"].tolist()))
+
+    tasks = list()
+    frames = list()
+    for strategy in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, strategy)
+        if not os.path.isdir(folder):
+            continue
+        for trace_file in sorted(os.listdir(folder)):
+            if not (trace_file.startswith("trace_") and
+                    trace_file.endswith(".npz")):
+                continue
+            with np.load(os.path.join(folder, trace_file)) as trace:
+                if "states" not in trace:
+                    continue
+                order = [index[node] for node in trace["nodes"].tolist()]
+                states = np.full((trace["states"].shape[0], MAX_STEPS,
+                                  len(layout["nodes"])), SUSCEPTIBLE,
+                                 dtype=np.int8)
+                states[:, :, order] = trace["states"]
+                counts = trace["counts"]
+                efforts = trace["efforts"].tolist()
+
+            output = os.path.join(folder, trace_file[:-len(".npz")])
+            os.makedirs(output, exist_ok=True)
+            for level, effort in enumerate(efforts):
+                if counts[level, 0, 0] < 0:
+                    continue
+                ended = np.flatnonzero(counts[level, :, INFECTED] == 0)
+                last = ended[0] if len(ended) else MAX_STEPS - 1
+                for step in range(last + 1):
+                    tasks.append((os.path.join(output,
+                                  "infection-{0}-{1}.png".format(
+                                  pad_string(effort,3), pad_string(step,3))),
+                                  len(frames),
+                                  "{0} - {1}% - day {2}".format(
+                                  strategy, effort, step)))
+                    frames.append(states[level, step])
+
+    print("Rendering {0} frames.".format(len(tasks)))
+    if jobs:
+        with tempfile.TemporaryDirectory(prefix="frames-") as shared:
+            np.save(os.path.join(shared, "positions.npy"),
+                    layout["positions"])
+            np.save(os.path.join(shared, "edges.npy"), layout["edges"])
+            published = np.lib.format.open_memmap(
+                os.path.join(shared, "states.npy"), mode="w+",
+                dtype=np.int8, shape=(len(frames), len(layout["nodes"])))
+            for row, frame in enumerate(frames):
+                published[row] = frame
+            published.flush()
+            del published, frames
+
+            pool = multiprocessing.Pool(jobs, initializer=init_worker,
+                                        initargs=({"FRAMES": shared,
+                                                   "dpi": dpi},))
+            pool.map(render_frame, tasks, chunksize=16)
+            pool.close()
+            pool.join()
+    else:
+        init_worker({"positions": layout["positions"],
+                     "edges": layout["edges"], "states": frames, "dpi": dpi})
+        for task in tasks:
+            render_frame(task)
+    print("\tFrames\t\t[Done]")
+
+def render_frame(task):
+    """
+    Render the states of one step onto the layout stored by init_worker(),
+    coloring the flights out of infected airports like visualize().
+
+    Args:
+        task: A (file_name, frame, title) tuple, with the row of the frame's
+              state codes, of every node of the layout, in the worker's
+              "states".
+
+    Returns:
+        Void
+    """
+
+    file_name, frame, title = task
+    states = np.asarray(WORKER_STATE["states"][frame])
+    positions, edges = WORKER_STATE["positions"], WORKER_STATE["edges"]
+
+    spreading = states[edges[:, 0]] == INFECTED
+    figure = plt.figure(figsize=(7,7))
+    axes = figure.gca()
+    axes.add_collection(LineCollection(positions[edges[~spreading]],
+                                       linewidths=0.5, colors="#A6A6A6",
+                                       alpha=0.5))
+    axes.add_collection(LineCollection(positions[edges[spreading]],
+                                       linewidths=0.5, colors="#29A229",
+                                       alpha=0.75))
+    axes.scatter(positions[:, 0], positions[:, 1], s=10, linewidths=0.5,
+                 c=[STATE_COLORS[state] for state in states.tolist()],
+                 edgecolors="black", zorder=2)
+
+    axes.set_xlim(-180, 180)
+    axes.set_ylim(-90, 90)
+    axes.set_title(title)
+    axes.axis('off')
+
+    figure.savefig(file_name, bbox_inches='tight', dpi=WORKER_STATE["dpi"])
+    plt.close(figure)
+
 def visualize(network, title,pos):
     """
     Visualize the network given an array of posisitons.
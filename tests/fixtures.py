@@ -0,0 +1,44 @@
+"""
+Shared fixtures of the tests: the simulator module, and synthetic networks
+built once per test run.
+"""
+
+import contextlib
+import functools
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+import simulator
+
+
+def quietly(function, *args, **kwargs):
+    """
+    Call a function without printing its progress messages.
+    """
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+@functools.lru_cache(maxsize=None)
+def synthetic_network(size=300, one_way=0.2, seed=4):
+    """
+    The create_network() of a synthetic airport network. One-way routes
+    leave some airports with successors that have no flights back. The
+    network is shared by every test, so tests that change it change a
+    copy.
+
+    Args:
+        size: The number of airports.
+        one_way: The share of routes only flown in one direction.
+        seed: The random seed of the databases.
+
+    Returns:
+        G: A weighted NetworkX DiGraph object.
+    """
+
+    return quietly(simulator.create_network,
+                   *simulator.synthetic_databases(size, one_way=one_way,
+                                                  seed=seed))
@@ -0,0 +1,62 @@
+"""
+Tests that a CompactNetwork expands back into the DiGraph it was built from,
+and that a network loaded from the cache is the network create_network()
+builds from the same databases, down to the airport coordinate strings.
+"""
+
+import os
+import tempfile
+import unittest
+
+from fixtures import quietly, simulator, synthetic_network
+
+
+class CompactNetworkTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.compact = simulator.CompactNetwork.from_networkx(cls.network)
+
+    def test_round_trip(self):
+        G = self.compact.to_networkx()
+        self.assertEqual(G.nodes(), self.network.nodes())
+        self.assertEqual(G.edges(), self.network.edges())
+        for i, j, data in self.network.edges(data=True):
+            with self.subTest(edge=(i, j)):
+                self.assertEqual(G[i][j]["weight"], data["weight"])
+                self.assertEqual(G[i][j], data)
+
+    def test_airport_labels(self):
+        for node in self.network.nodes():
+            with self.subTest(node=node):
+                self.assertEqual(
+                    simulator.airport_label(self.compact, node),
+                    simulator.airport_label(self.network, node))
+
+
+class CachedNetworkTest(unittest.TestCase):
+
+    def test_cache_hit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            databases = [os.path.join(directory, name)
+                         for name in ("airports.dat", "routes.dat")]
+            simulator.write_databases(*simulator.synthetic_databases(
+                100, one_way=0.2, seed=4), *databases)
+            path = simulator.network_cache_path(*databases, directory)
+
+            expected = quietly(simulator.create_network, *databases)
+            built = quietly(simulator.cached_network, *databases, path)
+            cached = quietly(simulator.cached_network, *databases, path)
+
+        for G in (built, cached):
+            self.assertEqual(G.nodes(), expected.nodes())
+            self.assertEqual(G.edges(data=True), expected.edges(data=True))
+            for node, data in expected.nodes(data=True):
+                with self.subTest(node=node):
+                    self.assertEqual(G.node[node], data)
+                    self.assertIsInstance(G.node[node]["lat"], str)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests that simulations continued from a fork_state() at the start of each
+cancellation delay record exactly what separate simulations of every delay
+record under the same seed.
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+from fixtures import quietly, simulator, synthetic_network
+
+
+class ForkTest(unittest.TestCase):
+
+    DELAYS = (0, 2, 5)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.arrays = simulator.network_arrays(cls.network)
+
+        edges = cls.network.edges()
+        cls.ranking = random.Random(0).sample(edges, len(edges))
+        cls.cancelled = simulator.effort_cancellations(cls.ranking, 26)
+        cls.overlay = simulator.cancellation_overlay(
+            cls.arrays, simulator.edge_positions(cls.arrays, cls.ranking),
+            len(cls.cancelled))
+
+        weights = dict((airport, cls.network.degree(airport))
+                       for airport in cls.network.nodes())
+        sampler = simulator.weighted_sampler(weights)
+        rng = random.Random(1)
+        cls.targets = (simulator.choose_targets(sampler, 2, size=1, rng=rng) +
+                       simulator.choose_targets(sampler, 2, rng=rng))
+
+    def run_engine(self, engine, cancelled, target, seed, **options):
+        """
+        Run one simulation from a seed, and return its S/E/I/R record.
+        """
+
+        record = np.zeros((simulator.MAX_STEPS, 4), dtype=np.int32)
+        random.seed(seed)
+        overlay = self.overlay if cancelled is not None else None
+        quietly(simulator.run_engine, engine, self.network, cancelled,
+                target, arrays=self.arrays, overlay=overlay, record=record,
+                **options)
+        return record
+
+    def test_forks_match_separate_runs(self):
+        for engine in ("networkx", "numpy", "frontier"):
+            for iteration, target in enumerate(self.targets):
+                seed = simulator.task_seed(0, engine, iteration)
+                forks = dict((delay, None) for delay in self.DELAYS)
+                prefix = self.run_engine(engine, None, target, seed,
+                                         forks=forks)
+                for delay in self.DELAYS:
+                    expected = self.run_engine(engine, self.cancelled,
+                                               target, seed, DELAY=delay)
+                    if forks[delay] is None:
+                        # The infection ended before the delay was over.
+                        record = prefix
+                    else:
+                        # The fork carries the random stream, whatever the
+                        # module level stream is now.
+                        record = self.run_engine(engine, self.cancelled,
+                                                 target, seed + 1,
+                                                 DELAY=delay,
+                                                 fork=forks[delay])
+                    with self.subTest(engine=engine, target=iteration,
+                                      delay=delay):
+                        np.testing.assert_array_equal(record, expected)
+
+    def test_simulate_delays(self):
+        # Under common random numbers every effort level of every delay
+        # draws the same as its separate simulate_target() sweep.
+        efforts = [0, 1, 26, 51]
+        for iteration, target in enumerate(self.targets):
+            crn = simulator.task_seed(0, "crn", iteration)
+            records = dict((delay, np.zeros((len(efforts),
+                                             simulator.MAX_STEPS, 4),
+                                            dtype=np.int32))
+                           for delay in self.DELAYS)
+            totals = quietly(simulator.simulate_delays, self.network,
+                             self.ranking, target, efforts, self.DELAYS,
+                             ENGINE="frontier", arrays=self.arrays,
+                             records=records, crn=crn)
+            for delay in self.DELAYS:
+                record = np.zeros_like(records[delay])
+                expected = quietly(simulator.simulate_target, self.network,
+                                   self.ranking, target, efforts,
+                                   ENGINE="frontier", DELAY=delay,
+                                   arrays=self.arrays, record=record,
+                                   crn=crn)
+                with self.subTest(target=iteration, delay=delay):
+                    self.assertEqual(totals[delay], expected)
+                    np.testing.assert_array_equal(records[delay], record)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+"""
+Tests that infection_frontier() steps an outbreak exactly as infection() does
+under the same random seed, and exactly as infection_numpy() does under the
+same common random numbers key, that every row of infection_batch() steps
+exactly as infection_numpy() does with the same seed, and that common random
+numbers give every effort level the same draws without changing its
+distribution of outcomes.
+"""
+
+import contextlib
+import io
+import random
+import unittest
+
+import numpy as np
+from scipy import stats
+
+from fixtures import quietly, simulator, synthetic_network
+
+
+class FrontierEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.arrays = simulator.network_arrays(cls.network)
+
+        edges = cls.network.edges()
+        cls.ranking = random.Random(0).sample(edges, len(edges))
+
+        weights = dict((airport, cls.network.degree(airport))
+                       for airport in cls.network.nodes())
+        sampler = simulator.weighted_sampler(weights)
+        rng = random.Random(1)
+        cls.targets = (simulator.choose_targets(sampler, 4, size=1, rng=rng) +
+                       simulator.choose_targets(sampler, 4, rng=rng))
+
+    def run_engine(self, engine, vaccination, target, DELAY, seed=None,
+                   crn=None):
+        """
+        The per-step S/E/I/R record of one simulation.
+        """
+
+        record = np.zeros((simulator.MAX_STEPS, 4), dtype=np.int32)
+        if seed is not None:
+            random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if engine == "networkx":
+                simulator.infection(self.network, vaccination, target,
+                                    DELAY=DELAY, file_name=None,
+                                    record=record)
+            else:
+                simulator.run_engine(engine, self.network, vaccination,
+                                     target, arrays=self.arrays, crn=crn,
+                                     DELAY=DELAY, record=record)
+        return record
+
+    def cases(self):
+        """
+        Every combination of target set, cancellations and delay to compare.
+        """
+
+        for effort in (0, 26, 76):
+            vaccination = simulator.effort_cancellations(self.ranking, effort)
+            for DELAY in (0, 4):
+                for iteration, target in enumerate(self.targets):
+                    yield effort, vaccination, DELAY, iteration, target
+
+    def test_matches_networkx(self):
+        # infection() draws from the module level random stream only.
+        for effort, vaccination, DELAY, iteration, target in self.cases():
+            seed = simulator.task_seed(0, effort, DELAY, iteration)
+            expected = self.run_engine("networkx", vaccination, target,
+                                       DELAY, seed=seed)
+            record = self.run_engine("frontier", vaccination, target, DELAY,
+                                     seed=seed)
+            with self.subTest(effort=effort, DELAY=DELAY, target=iteration):
+                np.testing.assert_array_equal(record, expected)
+
+    def test_matches_numpy(self):
+        for effort, vaccination, DELAY, iteration, target in self.cases():
+            crn = simulator.task_seed(0, "crn", effort, DELAY, iteration)
+            expected = self.run_engine("numpy", vaccination, target, DELAY,
+                                       crn=crn)
+            record = self.run_engine("frontier", vaccination, target, DELAY,
+                                     crn=crn)
+            with self.subTest(effort=effort, DELAY=DELAY, target=iteration):
+                np.testing.assert_array_equal(record, expected)
+
+
+class BatchEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.arrays = simulator.network_arrays(cls.network)
+
+        edges = cls.network.edges()
+        cls.ranking = random.Random(0).sample(edges, len(edges))
+        cls.ranked = simulator.edge_positions(cls.arrays, cls.ranking)
+
+        weights = dict((airport, cls.network.degree(airport))
+                       for airport in cls.network.nodes())
+        sampler = simulator.weighted_sampler(weights)
+        rng = random.Random(1)
+        cls.targets = (simulator.choose_targets(sampler, 4, size=1, rng=rng) +
+                       simulator.choose_targets(sampler, 4, rng=rng))
+
+    def assertRowsMatch(self, effort, DELAY, common):
+        """
+        Run every target set in one batch, and one by one with the seed or
+        common random numbers key of its row.
+        """
+
+        vaccination = simulator.effort_cancellations(self.ranking, effort)
+        overlay = None
+        if vaccination is not None:
+            overlay = simulator.cancellation_overlay(self.arrays, self.ranked,
+                                                     len(vaccination))
+        seeds = [simulator.task_seed(0, effort, DELAY, row) & 0xFFFFFFFF
+                 for row in range(len(self.targets))]
+        crn = None
+        if common:
+            crn = [simulator.task_seed(0, "crn", effort, DELAY, row)
+                   for row in range(len(self.targets))]
+
+        record = np.zeros((len(self.targets), simulator.MAX_STEPS, 4),
+                          dtype=np.int32)
+        snapshots = np.zeros((len(self.targets), simulator.MAX_STEPS,
+                              len(self.arrays["nodes"])), dtype=np.int8)
+        results = quietly(simulator.infection_batch, self.network,
+                          vaccination, self.targets, DELAY=DELAY,
+                          arrays=self.arrays, seeds=seeds, overlay=overlay,
+                          record=record, snapshots=snapshots, crn=crn)
+
+        for row, target in enumerate(self.targets):
+            expected = np.zeros((simulator.MAX_STEPS, 4), dtype=np.int32)
+            states = np.zeros(snapshots.shape[1:], dtype=np.int8)
+            result = quietly(simulator.infection_numpy, self.network,
+                             vaccination, target, DELAY=DELAY,
+                             file_name=None, arrays=self.arrays,
+                             seed=seeds[row], overlay=overlay,
+                             record=expected, snapshots=states,
+                             crn=None if crn is None else crn[row])
+            with self.subTest(effort=effort, DELAY=DELAY, crn=common,
+                              target=row):
+                np.testing.assert_array_equal(record[row], expected)
+                np.testing.assert_array_equal(snapshots[row], states)
+                self.assertEqual(results[row], result)
+
+    def test_rows_match_numpy(self):
+        for effort in (0, 26, 76):
+            for DELAY in (0, 4):
+                self.assertRowsMatch(effort, DELAY, common=False)
+
+    def test_rows_match_numpy_crn(self):
+        for effort in (0, 26, 76):
+            for DELAY in (0, 4):
+                self.assertRowsMatch(effort, DELAY, common=True)
+
+
+class CommonRandomNumbersTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.arrays = simulator.network_arrays(cls.network)
+
+        edges = cls.network.edges()
+        cls.ranking = random.Random(0).sample(edges, len(edges))
+        cls.ranked = simulator.edge_positions(cls.arrays, cls.ranking)
+
+        weights = dict((airport, cls.network.degree(airport))
+                       for airport in cls.network.nodes())
+        cls.target, = simulator.choose_targets(
+            simulator.weighted_sampler(weights), 1, rng=random.Random(1))
+
+    def test_same_draws_across_efforts(self):
+        positions = np.arange(len(self.arrays["indices"]))
+        for iteration in range(4):
+            target_key = simulator.task_seed(0, "crn", iteration)
+            for replicate in (None, 0, 1):
+                # Threshold searches key each replicate off the target set.
+                key = target_key if replicate is None else \
+                      simulator.task_seed(target_key, replicate)
+                for step in (0, 1, 17):
+                    draws = simulator.common_draws(key, step, positions)
+                    for effort in (1, 26, 76):
+                        overlay = simulator.cancellation_overlay(
+                            self.arrays, self.ranked, len(
+                                simulator.effort_cancellations(self.ranking,
+                                                               effort)))
+                        kept = np.flatnonzero(overlay["active"])
+                        with self.subTest(iteration=iteration,
+                                          replicate=replicate, step=step,
+                                          effort=effort):
+                            np.testing.assert_array_equal(
+                                simulator.common_draws(key, step, kept),
+                                draws[kept])
+                            # As infection_batch() keys every flight.
+                            np.testing.assert_array_equal(
+                                simulator.common_draws(
+                                    np.full(len(kept), key, dtype=np.uint64),
+                                    step, kept),
+                                draws[kept])
+
+    def outcomes(self, cancelled, crn):
+        """
+        The final outbreak sizes of 200 simulations of the target set, from
+        common random numbers or from the random stream.
+        """
+
+        sizes = []
+        for replicate in range(200):
+            random.seed(simulator.task_seed(0, len(cancelled or ()),
+                                            replicate))
+            key = simulator.task_seed(0, "crn", replicate) if crn else None
+            results = quietly(simulator.run_engine, "numpy", self.network,
+                              cancelled, self.target, arrays=self.arrays,
+                              crn=key)
+            sizes.append(results["Infected"] + results["Recovered"])
+        return sizes
+
+    def test_marginal_distributions(self):
+        for effort in (0, 51):
+            cancelled = simulator.effort_cancellations(self.ranking, effort)
+            with self.subTest(effort=effort):
+                # The seeds are fixed, so the test is deterministic.
+                self.assertGreater(stats.ks_2samp(
+                    self.outcomes(cancelled, False),
+                    self.outcomes(cancelled, True)).pvalue, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests that export_results() writes the per-target CSV files, .matrix and
+median .csv of a results store in the layouts data_agregator.R reads and
+writes, so aggregating the exported CSV files reproduces the store's totals.
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fixtures import simulator
+
+
+class ExportTest(unittest.TestCase):
+
+    STRATEGIES = ("weight", "random")
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        # The effort levels of a sweep, as main() builds them.
+        self.efforts = [0]
+        self.efforts.extend(range(1, 101, 5))
+
+        # Every target set ends with a total at each effort level, but the
+        # second stops spreading at 26% and skips the levels after it.
+        self.totals = np.array([
+            [[40, 38, 35, 31, 30, 22, 20, 17, 15, 12, 11, 9, 8, 7, 5, 5, 4,
+              3, 2, 2, 2],
+             [12, 10, 9, 7, 6, 4, 1] + [1] * 14,
+             [155, 150, 148, 140, 133, 128, 120, 101, 99, 87, 70, 66, 51, 43,
+              40, 31, 25, 19, 10, 4, 3]],
+            [[40, 39, 39, 37, 36, 36, 34, 33, 33, 30, 29, 27, 26, 25, 22, 20,
+              18, 17, 14, 12, 9],
+             [12, 11, 11, 10, 8, 8, 1] + [1] * 14,
+             [155, 153, 151, 151, 150, 149, 148, 144, 140, 137, 136, 130,
+              129, 124, 118, 116, 110, 104, 99, 90, 88]]])
+
+        self.file_name = os.path.join(self.directory.name, "results.npy")
+        store = simulator.create_results(self.file_name, self.STRATEGIES,
+                                         3, self.efforts, {"seed": 100})
+        for strategy_index in range(len(self.STRATEGIES)):
+            for iteration in range(3):
+                for level in range(len(self.efforts)):
+                    total = self.totals[strategy_index, iteration, level]
+                    if level and self.totals[strategy_index, iteration,
+                                             level - 1] == 1:
+                        continue
+                    store[strategy_index, iteration, level, -1] = \
+                        [300 - total, 0, 0, total]
+        store.flush()
+        del store
+
+    def aggregate(self, strategy):
+        """
+        Read the per-target CSV files of a strategy into a (targets,
+        efforts) matrix, as read_to_M() in data_agregator.R does.
+        """
+
+        folder = os.path.join(self.directory.name, strategy)
+        rows = []
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), newline="") as f:
+                reader = csv.reader(f)
+                self.assertEqual(next(reader),
+                                 ["effort", "total_infected, edges_closed"])
+                rows.append([int(total) for effort, total in reader])
+        return np.array(rows)
+
+    def test_round_trip(self):
+        simulator.export_results(self.file_name)
+        for strategy_index, strategy in enumerate(self.STRATEGIES):
+            expected = self.totals[strategy_index]
+            with self.subTest(strategy=strategy):
+                matrix = self.aggregate(strategy)
+                np.testing.assert_array_equal(matrix, expected)
+
+                # MASS::write.matrix() pads every field to one width.
+                with open(os.path.join(self.directory.name,
+                                       strategy + ".matrix")) as f:
+                    fields = [line.rstrip("\n").split(",") for line in f]
+                self.assertEqual(len(set(len(field) for row in fields
+                                         for field in row)), 1)
+                np.testing.assert_array_equal(
+                    np.array([[int(field) for field in row]
+                              for row in fields]), expected)
+
+                # write.csv() of the effort labels and the column means.
+                with open(os.path.join(self.directory.name,
+                                       strategy + ".csv"), newline="") as f:
+                    reader = csv.reader(f)
+                    self.assertEqual(next(reader), ["Effort", "Median"])
+                    effort, median = zip(*((int(effort), float(median))
+                                           for effort, median in reader))
+                self.assertEqual(list(effort), list(range(0, 101, 5)))
+                np.testing.assert_allclose(median, matrix.mean(axis=0),
+                                           rtol=1e-14)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests that load_airports() and load_routes() read quoted fields containing
+commas and \\N placeholders without dropping or shifting rows or columns.
+"""
+
+import os
+import tempfile
+import unittest
+
+from fixtures import simulator
+
+
+AIRPORTS = r'''1,"Goroka","Goroka","Papua New Guinea","GKA","AYGA",-6.081689,145.391881,5282,10,"U","Pacific/Port_Moresby"
+2,"Angaha, Niuafo'ou Island","Niuafo'ou","Tonga","NFO","NFTO",-15.5708,-175.633,160,13,"U","Pacific/Tongatapu"
+3,"Sde Dov","Tel-aviv","Israel",\N,"LLSD",32.114661,34.782239,43,2,"E","Asia/Jerusalem"
+4,"Washington Dulles, ""IAD""","Washington, D.C.","United States","IAD","KIAD",38.944533,-77.455811,313,-5,"A","America/New_York"
+'''
+
+ROUTES = r'''airline,airline ID,source airport,source airport id,destination airport,destination airport id,codeshare,stops,equipment
+2B,410,GKA,1,NFO,2,,0,CR2
+2B,410,NFO,2,\N,\N,,0,CR2
+2B,410,GKA,1,NFO,2,,0,CR2
+AA,24,IAD,4,TLV,\N,Y,0,"738, 757"
+"Air, Inc",\N,TLV,3,IAD,4,,0,"738, 757"
+AA,24,IAD,4,GKA,1,,0,738
+'''
+
+
+class LoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def database(self, name, text):
+        """
+        Write a database fixture, and return its path.
+        """
+
+        file_name = os.path.join(self.directory.name, name)
+        with open(file_name, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return file_name
+
+    def test_airports(self):
+        airports = simulator.load_airports(self.database("airports.dat",
+                                                         AIRPORTS))
+        self.assertEqual(airports["id"].tolist(), [1, 2, 3, 4])
+        self.assertEqual(airports["name"],
+                         ["Goroka", "Angaha, Niuafo'ou Island", "Sde Dov",
+                          'Washington Dulles, "IAD"'])
+        self.assertEqual(airports["country"],
+                         ["Papua New Guinea", "Tonga", "Israel",
+                          "United States"])
+        self.assertEqual(airports["lat"],
+                         ["-6.081689", "-15.5708", "32.114661", "38.944533"])
+        self.assertEqual(airports["lon"],
+                         ["145.391881", "-175.633", "34.782239",
+                          "-77.455811"])
+
+    def test_routes(self):
+        routes = simulator.load_routes(self.database("routes.dat", ROUTES))
+        self.assertEqual(routes["source"].tolist(), [1, 3, 4])
+        self.assertEqual(routes["target"].tolist(), [2, 4, 1])
+        self.assertEqual(routes["IATAFrom"], ["GKA", "TLV", "IAD"])
+        self.assertEqual(routes["IATATo"], ["NFO", "IAD", "GKA"])
+        self.assertEqual(routes["duplicates"], 1)
+        # The header and the two routes with a \N airport ID.
+        self.assertEqual(routes["errors"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Tests that the sparse clustering coefficients match nx.clustering(), that
+cached edge rankings give the same cancellation order as sorting the edge
+pool by each strategy's metric, and that approximate edge betweenness is the
+same in a pool of workers attached to the shared network.
+"""
+
+import os
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from fixtures import quietly, simulator, synthetic_network
+
+
+class ClusteringTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # One-way routes leave some airport pairs with a single direction,
+        # the others are flown both ways.
+        cls.network = synthetic_network(one_way=0.3)
+
+    def assertClusteringMatches(self, G):
+        """
+        Compare the sparse coefficients of a network with nx.clustering() of
+        its undirected routes.
+        """
+
+        expected = nx.clustering(nx.Graph(G))
+        coefficients = simulator.clustering_coefficients(G)
+        self.assertEqual(set(coefficients), set(expected))
+        for node in G.nodes():
+            with self.subTest(node=node):
+                self.assertAlmostEqual(coefficients[node], expected[node])
+
+    def test_reciprocal_and_one_way_routes(self):
+        pairs = set(self.network.edges())
+        one_way = [(i, j) for i, j in pairs if (j, i) not in pairs]
+        self.assertTrue(one_way)
+        self.assertTrue(len(one_way) < len(pairs))
+        self.assertClusteringMatches(self.network)
+
+    def test_self_loops(self):
+        G = self.network.copy()
+        G.add_edges_from((node, node) for node in G.nodes()[::7])
+        self.assertClusteringMatches(G)
+
+
+class CachedRankingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        betweennesses = quietly(simulator.edge_betweenness, cls.network)[0]
+        cls.edges = cls.network.edges()
+        cls.metrics = simulator.edge_metrics(cls.network)
+
+        # The value every strategy sorts the edge pool by.
+        degree = cls.network.degree()
+        cls.keys = {
+            "clustering": lambda edge: edge[2]["cluster"],
+            "betweenness": lambda edge: betweennesses[edge[:2]],
+            "degree": lambda edge: degree[edge[0]] * degree[edge[1]],
+            "weight": lambda edge: edge[2]["weight"]}
+        cls.values = {
+            "clustering": cls.metrics["cluster"],
+            "betweenness": np.array([betweennesses[edge]
+                                     for edge in cls.edges]),
+            "degree": cls.metrics["degree"],
+            "weight": cls.metrics["weight"]}
+
+    def filters(self):
+        """
+        The edge filters of the -i and -d flags, and of neither, by name.
+        """
+
+        international = self.metrics["international"]
+        return {"all": None, "international": international,
+                "domestic": ~international}
+
+    def sorted_pool(self, strategy, edge_filter):
+        """
+        Sort the edge pool by a strategy's metric, the way the strategies
+        ranked edges before rankings were cached.
+        """
+
+        edgepool = self.network.edges(data=True)
+        if edge_filter is not None:
+            edgepool = [edge for edge, keep in zip(edgepool, edge_filter)
+                        if keep]
+        ranked = sorted(edgepool, key=self.keys[strategy], reverse=True)
+        if strategy == "clustering":
+            ranked = [edge for edge in ranked if 0 < edge[2]["cluster"] < 2]
+
+        return [(i, j) for i, j, data in ranked]
+
+    def test_cached_rankings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network")
+            for strategy in self.keys:
+                bounds = {"low": 0, "high": 2} if strategy == "clustering" \
+                         else {}
+                for filter_name, edge_filter in self.filters().items():
+                    name = "{0}-{1}".format(strategy, filter_name)
+                    rank = lambda: simulator.rank_edges(self.values[strategy],
+                                                        edge_filter, **bounds)
+                    expected = self.sorted_pool(strategy, edge_filter)
+
+                    # The first call ranks and stores, the second loads.
+                    ranked = simulator.cached_ranking(path, name, rank)
+                    cached = simulator.cached_ranking(path, name, None)
+                    with self.subTest(strategy=strategy,
+                                      filter=filter_name):
+                        self.assertTrue(os.path.exists(
+                            "{0}-ranking-{1}.npy".format(path, name)))
+                        self.assertTrue(expected)
+                        self.assertEqual([self.edges[k]
+                                          for k in ranked.tolist()],
+                                         expected)
+                        self.assertEqual([self.edges[k]
+                                          for k in cached.tolist()],
+                                         expected)
+
+
+class BetweennessTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+
+    def test_exact(self):
+        betweennesses, agreement = quietly(simulator.edge_betweenness,
+                                           self.network)
+        self.assertIsNone(agreement)
+        self.assertEqual(set(betweennesses), set(self.network.edges()))
+
+    def test_shared_pool(self):
+        expected, agreement = quietly(simulator.edge_betweenness,
+                                      self.network, pivots=40, seed=3)
+        self.assertTrue(0 <= agreement <= 1)
+        with tempfile.TemporaryDirectory() as directory:
+            simulator.share_network(self.network, directory)
+            betweennesses, shared = quietly(simulator.edge_betweenness,
+                                            self.network, pivots=40, jobs=2,
+                                            seed=3, shared=directory)
+        self.assertEqual(shared, agreement)
+        for edge in self.network.edges():
+            with self.subTest(edge=edge):
+                self.assertAlmostEqual(betweennesses[edge], expected[edge])
+
+
+if __name__ == "__main__":
+    unittest.main()
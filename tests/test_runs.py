@@ -0,0 +1,127 @@
+"""
+Tests that whole simulator runs record the same results however their target
+sets are run: one after the other, in a pool of workers, batched, or resumed
+after the run was killed.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from fixtures import simulator
+
+
+SIMULATOR = os.path.abspath(simulator.__file__)
+
+
+class RunTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.databases = [os.path.join(cls.directory.name, name)
+                         for name in ("airports.dat", "routes.dat")]
+        simulator.write_databases(*simulator.synthetic_databases(
+            200, one_way=0.2, seed=4), *cls.databases)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def simulate(self, *options):
+        """
+        Run the simulator on the synthetic databases in a directory of its
+        own, and return the path of the run directory it creates.
+        """
+
+        cwd = tempfile.mkdtemp(dir=self.directory.name)
+        subprocess.run([sys.executable, SIMULATOR, "--cache=", "--quiet",
+                        "--nsim=4"] + list(options) + self.databases,
+                       cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        run, = os.listdir(cwd)
+        return os.path.join(cwd, run)
+
+    def interrupted(self, *options, done=2):
+        """
+        Start the simulator as simulate() does, kill it once its checkpoint
+        records the given number of finished target sets, and return the
+        path of its run directory.
+        """
+
+        cwd = tempfile.mkdtemp(dir=self.directory.name)
+        process = subprocess.Popen([sys.executable, SIMULATOR, "--cache=",
+                                    "--quiet", "--nsim=4"] + list(options) +
+                                   self.databases, cwd=cwd,
+                                   stdout=subprocess.DEVNULL)
+        try:
+            while process.poll() is None:
+                runs = os.listdir(cwd)
+                checkpoint = os.path.join(cwd, runs[0], "checkpoint.json") \
+                             if runs else None
+                if checkpoint and os.path.exists(checkpoint) and sum(
+                        len(iterations) for iterations in
+                        simulator.read_checkpoint(checkpoint)["done"]
+                        .values()) >= done:
+                    break
+                time.sleep(0.01)
+        finally:
+            process.kill()
+            process.wait()
+
+        run, = os.listdir(cwd)
+        checkpoint = simulator.read_checkpoint(os.path.join(cwd, run,
+                                                            "checkpoint.json"))
+        self.assertLess(sum(len(iterations) for iterations in
+                            checkpoint["done"].values()), 4,
+                        "the run finished before it was killed")
+        return os.path.join(cwd, run)
+
+    def assertSameResults(self, first, second, name="results.npy"):
+        """
+        Compare the results stores of two runs.
+        """
+
+        np.testing.assert_array_equal(np.load(os.path.join(first, name)),
+                                      np.load(os.path.join(second, name)))
+
+    def test_jobs(self):
+        self.assertSameResults(self.simulate("-r", "-w"),
+                               self.simulate("-r", "-w", "--jobs=2"))
+
+    def test_batch(self):
+        self.assertSameResults(self.simulate("-w", "--engine=numpy"),
+                               self.simulate("-w", "--batch"))
+
+    def test_delays(self):
+        first = self.simulate("-w", "--engine=frontier", "--delays=0,3")
+        second = self.simulate("-w", "--engine=frontier", "--delays=0,3",
+                               "--jobs=2")
+        for delay in (0, 3):
+            with self.subTest(delay=delay):
+                self.assertSameResults(first, second, os.path.join(
+                    simulator.delay_directory(delay), "results.npy"))
+
+    def test_resume(self):
+        expected = self.simulate("-w")
+        run = self.interrupted("-w")
+        subprocess.run([sys.executable, SIMULATOR, "--resume=" + run],
+                       check=True, stdout=subprocess.DEVNULL)
+        self.assertSameResults(expected, run)
+
+    def test_threshold(self):
+        first = self.simulate("-w", "--engine=frontier", "--mode=threshold")
+        second = self.simulate("-w", "--engine=frontier", "--mode=threshold",
+                               "--jobs=2")
+        with open(os.path.join(first, "weight", "threshold.csv")) as f:
+            expected = f.read()
+        with open(os.path.join(second, "weight", "threshold.csv")) as f:
+            self.assertEqual(f.read(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
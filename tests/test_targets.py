@@ -0,0 +1,72 @@
+"""
+Tests that target sets drawn with weighted_sampler() and choose_targets()
+depend only on the random stream they are drawn from, and that target sets
+written with write_targets() read back unchanged with read_targets().
+"""
+
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+from fixtures import quietly, simulator, synthetic_network
+
+
+class TargetsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.weights = dict((airport, cls.network.degree(airport))
+                           for airport in cls.network.nodes())
+        cls.module_seeds = itertools.count()
+
+    def choose(self, seed, count=20, size=10):
+        """
+        Choose target sets from a fresh sampler and a stream of the seed,
+        with the module level stream seeded differently every time.
+        """
+
+        random.seed(next(self.module_seeds))
+        return simulator.choose_targets(
+            simulator.weighted_sampler(self.weights), count, size=size,
+            rng=random.Random(seed))
+
+    def test_reproducible(self):
+        for size in (1, 10):
+            with self.subTest(size=size):
+                targets = self.choose(7, size=size)
+                self.assertEqual(self.choose(7, size=size), targets)
+                self.assertNotEqual(self.choose(8, size=size), targets)
+                for target in targets:
+                    self.assertEqual(len(set(target)), size)
+                    self.assertTrue(all(airport in self.weights
+                                        for airport in target))
+
+    def test_zero_weights(self):
+        weights = dict(self.weights)
+        unweighted = self.network.nodes()[::2]
+        for airport in unweighted:
+            weights[airport] = 0
+        targets = simulator.choose_targets(
+            simulator.weighted_sampler(weights), 20, rng=random.Random(7))
+        chosen = set(airport for target in targets for airport in target)
+        self.assertFalse(chosen & set(unweighted))
+
+    def test_round_trip(self):
+        targets = self.choose(7) + self.choose(9, size=1)
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "targets.csv")
+            simulator.write_targets(file_name, targets)
+            self.assertEqual(simulator.read_targets(file_name, self.network),
+                             targets)
+
+            # Airports of another network stop the run.
+            simulator.write_targets(file_name, [[-1]])
+            with self.assertRaises(SystemExit):
+                quietly(simulator.read_targets, file_name, self.network)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests that a threshold search at the default settings runs fewer simulations
+per target set than a sweep of every effort level, and that its confidence
+limits narrow the range of efforts it probed.
+"""
+
+import contextlib
+import io
+import math
+import random
+import unittest
+
+from fixtures import quietly, simulator, synthetic_network
+
+
+class ThresholdSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+
+        # Cancel the flights of the highest transmission weight first, as
+        # the weight strategy does.
+        cls.cancellist = sorted(cls.network.edges(),
+                                key=lambda edge: cls.network[edge[0]][
+                                    edge[1]]["weight"],
+                                reverse=True)
+
+        weights = dict((airport, cls.network.degree(airport))
+                       for airport in cls.network.nodes())
+        cls.targets = simulator.choose_targets(
+            simulator.weighted_sampler(weights), 5, rng=random.Random(1))
+
+        # The effort levels of a sweep, as main() builds them.
+        cls.efforts = [0]
+        cls.efforts.extend(range(1, 101, 5))
+
+    def test_fewer_simulations_than_a_sweep(self):
+        random.seed(0)
+        for iteration, target in enumerate(self.targets):
+            with contextlib.redirect_stdout(io.StringIO()):
+                sweep = simulator.simulate_target(self.network,
+                                                  self.cancellist, target,
+                                                  self.efforts)
+                threshold = simulator.threshold_search(self.network,
+                                                       self.cancellist,
+                                                       target)
+            with self.subTest(target=iteration):
+                self.assertEqual(len(sweep), len(self.efforts))
+                self.assertLess(threshold["simulations"], len(sweep))
+
+    def test_probes_stop_once_decided(self):
+        # Two or three simulations decide a majority of three, and a search
+        # at the defaults probes full effort, then bisects four times down to
+        # a 10% bracket.
+        random.seed(0)
+        for iteration, target in enumerate(self.targets):
+            with contextlib.redirect_stdout(io.StringIO()):
+                threshold = simulator.threshold_search(self.network,
+                                                       self.cancellist,
+                                                       target)
+            with self.subTest(target=iteration):
+                self.assertLessEqual(threshold["simulations"], 15)
+                if not math.isnan(threshold["threshold"]):
+                    self.assertGreaterEqual(threshold["simulations"], 10)
+
+    def test_interval_narrower_than_probed(self):
+        # Every search probes 50% and full effort, so the probed range is at
+        # least 50% wide.
+        random.seed(0)
+        for iteration, target in enumerate(self.targets):
+            threshold = quietly(simulator.threshold_search, self.network,
+                                self.cancellist, target)
+            with self.subTest(target=iteration):
+                self.assertLessEqual(threshold["lower"],
+                                     threshold["threshold"])
+                self.assertLessEqual(threshold["threshold"],
+                                     threshold["upper"])
+                self.assertLess(threshold["upper"] - threshold["lower"], 50)
+
+    def test_interval_pools_neighbouring_probes(self):
+        # No single probe of three replicates is decided, but the two failed
+        # and the two contained probes next to the threshold are.
+        probes = [(100.0, 2, 2), (50.0, 3, 3), (25.0, 0, 3), (37.5, 0, 3),
+                  (43.75, 3, 3)]
+        for effort, contained, trials in probes:
+            low, high = simulator.wilson_interval(contained, trials)
+            self.assertTrue(low <= 0.5 <= high)
+        self.assertEqual(simulator.threshold_interval(probes), (25.0, 50.0))
+
+        # More replicates decide the probes on their own.
+        probes = [(effort, contained * 4, trials * 4)
+                  for effort, contained, trials in probes]
+        self.assertEqual(simulator.threshold_interval(probes), (37.5, 43.75))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests that update_weights() and the masked_weights() of a cancellation
+overlay recalculate the edge weights of a network after cancellations exactly
+as calculate_weights() does from scratch.
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+from fixtures import simulator, synthetic_network
+
+
+def edge_weights(G):
+    """
+    The weight of every edge of a network, by (u, v).
+    """
+
+    return dict(((u, v), data["weight"]) for u, v, data in G.edges(data=True))
+
+
+class UpdateWeightsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+
+    def assertUpdateMatches(self, removed):
+        """
+        Remove edges from a copy of the network, update its weights, and
+        compare them with weights calculated from scratch.
+        """
+
+        G = self.network.copy()
+        G.remove_edges_from(removed)
+        expected = edge_weights(simulator.calculate_weights(G))
+
+        simulator.update_weights(G, removed)
+        self.assertEqual(edge_weights(G), expected)
+
+    def test_random_removals(self):
+        edges = self.network.edges()
+        for seed in range(20):
+            rng = random.Random(seed)
+            removed = rng.sample(edges, rng.randint(1, len(edges) // 4))
+            with self.subTest(seed=seed, removed=len(removed)):
+                self.assertUpdateMatches(removed)
+
+    def test_removals_with_data(self):
+        edges = self.network.edges(data=True)
+        removed = random.Random(0).sample(edges, len(edges) // 10)
+        self.assertUpdateMatches(removed)
+
+    def test_all_out_edges_of_a_node(self):
+        # Airports left without flights out change the weights of every
+        # flight into them.
+        sources = sorted((node for node in self.network.nodes()
+                          if self.network.out_degree(node) > 0),
+                         key=self.network.out_degree, reverse=True)
+        for node in sources[:3] + sources[-3:]:
+            with self.subTest(node=node):
+                self.assertUpdateMatches(self.network.out_edges(node))
+
+    def test_every_edge(self):
+        self.assertUpdateMatches(self.network.edges())
+
+
+class MaskedWeightsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = synthetic_network()
+        cls.arrays = simulator.network_arrays(cls.network)
+
+    def overlay_weights(self, overlay):
+        """
+        The weight of every active edge of an overlay, by (u, v).
+        """
+
+        nodes, indptr = self.arrays["nodes"], self.arrays["indptr"]
+        sources = np.repeat(np.arange(len(nodes)), np.diff(indptr))
+        return dict(((nodes[sources[k]], nodes[self.arrays["indices"][k]]),
+                     overlay["weight"][k])
+                    for k in np.flatnonzero(overlay["active"]).tolist())
+
+    def assertOverlayMatches(self, cancellist):
+        """
+        Cancel growing prefixes of cancellist, as the effort levels of a
+        sweep do, and compare the overlay weights with weights calculated
+        from scratch on a copy of the network without the prefix.
+        """
+
+        ranked = simulator.edge_positions(self.arrays, cancellist)
+        overlay = None
+        for effort in (1, 6, 26, 51, 76, 96, 100):
+            cancelled = simulator.effort_cancellations(cancellist, effort)
+            G = self.network.copy()
+            G.remove_edges_from(cancelled)
+            expected = edge_weights(simulator.calculate_weights(G))
+
+            overlay = simulator.cancellation_overlay(self.arrays, ranked,
+                                                     len(cancelled),
+                                                     base=overlay)
+            fresh = simulator.cancellation_overlay(self.arrays, ranked,
+                                                   len(cancelled))
+            with self.subTest(effort=effort):
+                self.assertEqual(self.overlay_weights(overlay), expected)
+                self.assertEqual(self.overlay_weights(fresh), expected)
+
+    def test_random_ranking(self):
+        edges = self.network.edges()
+        self.assertOverlayMatches(random.Random(0).sample(edges, len(edges)))
+
+    def test_weight_ranking(self):
+        # Cancelling the heaviest flights first empties whole airports of
+        # their flights out.
+        edges = sorted(self.network.edges(data=True),
+                       key=lambda edge: edge[2]["weight"], reverse=True)
+        self.assertOverlayMatches(edges)
+
+
+if __name__ == "__main__":
+    unittest.main()